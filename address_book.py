@@ -1,17 +1,98 @@
+import calendar
 from collections import UserDict
-from datetime import date, timedelta
-from typing import List
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Callable, Iterable, Iterator, List, Tuple
 
-from field import Date, Name, Address, Email, Birthday
+from field import Date, Name, Address, Email, Birthday, PHONE_DIGITS, collection_paused, phone_digits
+from indexes import BKTree, OrderedIndex, PhoneIndex, PrefixTrie, SortedIndex, TrigramIndex
+from paging import Page, paginate
 from record import Record, ADDRESS_BOOK_FIELDS
+from search_cache import SearchCache, SearchCacheStats
 from views.TableView import Sort
 from views.AddressBookView import AddressBookView
 
+def get_birthday_in_year(birthday: date, year: int) -> date:
+    """
+    Returns the date the birthday is celebrated on in the given year.
+    Birthdays on February 29 are celebrated on March 1 in non-leap years.
+    """
+    if birthday.month == 2 and birthday.day == 29 and not calendar.isleap(year):
+        return date(year, 3, 1)
+    return birthday.replace(year=year)
+
+
+def get_celebration_date(birthday: date, current_date: date) -> date:
+    """
+    Returns the closest day (starting from current_date) the birthday is celebrated on.
+    Parameters:
+        birthday (date): The date of birth.
+        current_date (date): The date to look for the celebration from.
+    Returns:
+        date: The celebration date.
+    """
+    # prepare comparison data
+    celebration_date = get_birthday_in_year(birthday, current_date.year)
+
+    # if the birthday has already happened, we'll celebrate next year
+    if celebration_date < current_date:
+        celebration_date = get_birthday_in_year(birthday, current_date.year + 1)
+
+    # if the birthday is on weekend, shift the celebration to the next Monday
+    celebration_week_day = celebration_date.weekday()
+    if celebration_week_day >= 5:
+        celebration_date = celebration_date + timedelta(days=7 - celebration_week_day)
+
+    return celebration_date
+
+
+def get_birthday_ranges(current_date: date, days_prior: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Returns the inclusive (month, day) ranges the birthdays celebrated in the period may fall into,
+    in chronological order starting from current_date.
+    Parameters:
+        current_date (date): The first day of the period.
+        days_prior (int): The length of the period in days.
+    Returns:
+        list: A list of ((month, day), (month, day)) ranges.
+    """
+    start = (current_date.month, current_date.day)
+    if start == (3, 1) and not calendar.isleap(current_date.year):
+        # February 29 birthdays are celebrated today
+        start = (2, 29)
+
+    if days_prior >= 365:
+        # the whole year, starting from today
+        end_date = current_date - timedelta(days=1)
+        if start == (1, 1):
+            return [((1, 1), (12, 31))]
+    else:
+        end_date = current_date + timedelta(days=days_prior)
+    end = (end_date.month, end_date.day)
+
+    if start <= end and days_prior < 365:
+        return [(start, end)]
+    # the period wraps around the New Year
+    return [(start, (12, 31)), ((1, 1), end)]
+
+
 class AddressBook(UserDict):
 
     """
     A simple address book implementation that stores records in a dictionary.
     """
+    fields = ADDRESS_BOOK_FIELDS
+    # serialization.Journal the mutations are appended to, if journaled storage is used
+    journal = None
+    # the sequence of the last journal log replayed into the book, see serialization.replay
+    journal_sequence = 0
+    # fields searched by substring through trigram indexes
+    indexed_fields = [ADDRESS_BOOK_FIELDS.NAME, ADDRESS_BOOK_FIELDS.ADDRESS, ADDRESS_BOOK_FIELDS.EMAIL, ADDRESS_BOOK_FIELDS.PHONE]
+
+    def __init__(self, *args, **kwargs):
+        self.__init_indexes()
+        super().__init__(*args, **kwargs)
+
     def __str__(self) -> str:
         return "\n".join([str(record) for record in self.data.values()])
 
@@ -26,6 +107,53 @@ class AddressBook(UserDict):
         if record.name.value in self.data:
             raise KeyError(f"A record with name {record.name.value} already exists.")
         self.data[record.name.value] = record
+        record.book = self
+        self.__positions[record] = self.__next_position()
+        self.__index(record)
+        if self.__names is not None:
+            self.__names.add(record.name.value.lower(), record.name.value)
+        if self.__prefixes is not None:
+            self.__prefixes.add(record.name.value.lower(), record.name.value)
+        self.__cache.invalidate()
+        if self.journal is not None:
+            self.journal.append("put", record.name.value, record)
+
+    def add_records(self, records: Iterable[Record]):
+        """
+        Adds many records, updating the birthday indexes once for all of them.
+        The names tree for fuzzy lookups is built again on the next lookup.
+        Parameters:
+            records (Iterable[Record]): The records to add.
+        Raises:
+            KeyError: If a record with the same name already exists, no record is added then.
+        """
+        records = list(records)
+        names = set()
+        for record in records:
+            if record.name.value in self.data or record.name.value in names:
+                raise KeyError(f"A record with name {record.name.value} already exists.")
+            names.add(record.name.value)
+
+        birthdays = []
+        for record in records:
+            self.data[record.name.value] = record
+            record.book = self
+            self.__positions[record] = self.__next_position()
+            self.__index_texts(record)
+            if isinstance(record.birthday, Birthday):
+                birthdays.append((record.birthday.value, record))
+        self.__birthdays.add_many(((birthday.month, birthday.day), record) for birthday, record in birthdays)
+        self.__birth_dates.add_many(birthdays)
+        self.__phones.add_many((phone.number, record) for record in records for phone in record.phones)
+        for order in self.__orders.values():
+            order.add_many((record, self.__positions[record]) for record in records)
+        self.__names = None
+        if self.__prefixes is not None:
+            for record in records:
+                self.__prefixes.add(record.name.value.lower(), record.name.value)
+        self.__cache.invalidate()
+        if self.journal is not None:
+            self.journal.append_many(("put", record.name.value, record) for record in records)
 
     def find(self, name: str) -> Record:
         """
@@ -37,6 +165,51 @@ class AddressBook(UserDict):
         """
         return self.data.get(name)
 
+    def find_by_phone(self, phone: str) -> List[Record]:
+        """
+        Finds the records by a phone number, e.g. of an incoming call, or its first digits.
+        Parameters:
+            phone (str): The number in any format, with or without the country code, or a few first digits of it.
+        Returns:
+            List[Record]: The records having a number starting with the digits, in the order they were added.
+        """
+        digits = phone_digits(phone)
+        if not digits:
+            return []
+        return sorted(set(self.__phones.prefix(digits)), key=self.__positions.__getitem__)
+
+    def find_similar(self, name: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        """
+        Finds the names closest to the given one, to suggest them when it's misspelled.
+        Parameters:
+            name (str): The name to look for.
+            max_distance (int, optional): The maximum number of edits (case-insensitive). Defaults to 2.
+            limit (int, optional): The maximum number of names to return. Defaults to 5.
+        Returns:
+            List[str]: The closest names, closest first.
+        """
+        if self.__names is None:
+            self.__names = BKTree()
+            for record_name in self.data:
+                self.__names.add(record_name.lower(), record_name)
+        return [record_name for _distance, record_name in self.__names.search(name.lower(), max_distance)[:limit]]
+
+    def names_starting_with(self, prefix: str, limit: int | None = None) -> List[str]:
+        """
+        Finds the names starting with the prefix, to complete a name being typed.
+        Parameters:
+            prefix (str): The start of the names (case-insensitive).
+            limit (int | None, optional): The maximum number of names to return, None for all of them.
+        Returns:
+            List[str]: The names in alphabetical order.
+        """
+        if self.__prefixes is None:
+            with collection_paused():
+                self.__prefixes = PrefixTrie()
+                for record_name in self.data:
+                    self.__prefixes.add(record_name.lower(), record_name)
+        return self.__prefixes.items(prefix.lower(), limit)
+
     def delete(self, name: str):
         """
         Deletes a record by name.
@@ -46,97 +219,371 @@ class AddressBook(UserDict):
             KeyError: If no record with the given name is found.
         """
         if name in self.data:
-            del self.data[name]
+            record = self.data.pop(name)
+            record.book = None
+            self.__unindex(record)
+            del self.__positions[record]
+            if self.__names is not None:
+                self.__names.remove(name.lower(), name)
+            if self.__prefixes is not None:
+                self.__prefixes.remove(name.lower(), name)
+            self.__cache.invalidate()
+            if self.journal is not None:
+                self.journal.append("del", name)
         else:
             raise KeyError(f"A record with name {name} not found.")
 
-    def get_upcoming_birthdays(self, days_prior: int = 7) -> None:
+    def record_changing(self, record: Record):
         """
-        Returns a list of upcoming birthdays (celebration days).
+        Called by a record of this book right before it gets changed.
         Parameters:
-            days_prior (int, optional): The number of days in the future to look for birthdays.
-                Defaults to 7.
-        Returns:
-            list: A list of dictionaries with names and celebration dates.
+            record (Record): The record about to change.
         """
-        celebration_list = []
-        current_date = date.today()
-        celebration_period = current_date + timedelta(days=days_prior)
-        for name, record in self.data.items():
-            # Birthday is an optional field. Skip if it's empty
-            if record.birthday is None:
-                continue
+        self.__unindex(record)
+
+    def record_changed(self, record: Record, old_name: str):
+        """
+        Called by a record of this book right after it has been changed.
+        Parameters:
+            record (Record): The changed record.
+            old_name (str): The name of the record before the change.
+        """
+        renamed = record.name.value != old_name
+        if renamed:
+            # a renamed record moves to the end, the ordered indexes take its new position
+            self.data[record.name.value] = self.data.pop(old_name)
+            self.__positions[record] = self.__next_position()
+        self.__index(record)
+        self.__cache.invalidate()
+        if renamed:
+            if self.__names is not None:
+                self.__names.remove(old_name.lower(), old_name)
+                self.__names.add(record.name.value.lower(), record.name.value)
+            if self.__prefixes is not None:
+                self.__prefixes.remove(old_name.lower(), old_name)
+                self.__prefixes.add(record.name.value.lower(), record.name.value)
+            if self.journal is not None:
+                self.journal.append("rename", old_name, record.name.value)
+        if self.journal is not None:
+            self.journal.append("put", record.name.value, record)
 
-            # prepare comparison data
-            celebration_date = record.birthday.value.replace(year=date.today().year).date()
+    def apply_change(self, operation: str, name: str, value=None):
+        """
+        Applies a single change previously recorded in a journal.
+        The logs already merged into the snapshot are skipped by their sequence, see serialization.replay.
+        Parameters:
+            operation (str): One of "put", "del" or "rename".
+            name (str): The name of the affected record.
+            value: The record for "put", or the new name for "rename".
+        """
+        match operation:
+            case "put":
+                record = self.find(name)
+                if record is None:
+                    self.add_record(value)
+                else:
+                    # update in place to keep the position of the record
+                    with record._changing():
+                        record.phones = value.phones
+                        record.email = value.email
+                        record.birthday = value.birthday
+                        record.address = value.address
+            case "del":
+                if name in self.data:
+                    self.delete(name)
+            case "rename":
+                if name in self.data and value not in self.data:
+                    self.find(name).edit_name(value)
 
-            # if the birthday has already happened, we'll celebrate next year
-            if celebration_date < current_date:
-                celebration_date = celebration_date.replace(year=celebration_date.year + 1)
+    def __getstate__(self):
+        # the journal is attached on load, the cheap indexes are rebuilt on load,
+        # the names tree is saved once it's built
+        return {"data": self.data, "names": self.__names, "journal_sequence": self.journal_sequence}
 
-            # if the birthday is on weekend, shift the celebration to the next Monday
-            celebration_week_day = celebration_date.weekday()
-            if celebration_week_day >= 5:
-                celebration_date = celebration_date + timedelta(days=7 - celebration_week_day)
+    def __setstate__(self, state):
+        self.__init_indexes()
+        self.data = state["data"]
+        self.journal_sequence = state.get("journal_sequence", 0)
+        self.__names = state.get("names")
+        for record in self.data.values():
+            record.book = self
+            self.__positions[record] = self.__next_position()
+            self.__index(record)
 
-            # if the celebration date fits the celebration period, add it to the list
-            if celebration_date <= celebration_period:
-                celebration_list.append(record)
+    def __init_indexes(self):
+        # insertion order of the records, to keep the order of the results narrowed by the indexes
+        self.__positions = {}
+        self.__position = 0
+        self.__trigrams = {field: TrigramIndex() for field in self.indexed_fields}
+        # records by (month, day) of birthday for upcoming birthdays, and by birth date for date ranges,
+        # the records with the same birthday in the order they were added in
+        self.__birthdays = SortedIndex(self.__positions.__getitem__)
+        self.__birth_dates = SortedIndex(self.__positions.__getitem__)
+        # records by phone number, for the exact numbers and the number prefixes
+        self.__phones = PhoneIndex(PHONE_DIGITS)
+        # names by edit distance, built on the first fuzzy lookup as building it is relatively expensive
+        self.__names = None
+        # names by their lowercase prefixes for completing them, built on the first completion
+        self.__prefixes = None
+        # records by the sort key of a field, built on the first search sorted by the field
+        self.__orders = {}
+        # results of the recent searches, dropped on every change
+        self.__cache = SearchCache()
+
+    def __next_position(self) -> int:
+        self.__position += 1
+        return self.__position
+
+    @staticmethod
+    def __field_texts(record: Record, field: ADDRESS_BOOK_FIELDS) -> List[str]:
+        match field:
+            case ADDRESS_BOOK_FIELDS.NAME:
+                return [record.name.value] if isinstance(record.name, Name) else []
+            case ADDRESS_BOOK_FIELDS.ADDRESS:
+                return [record.address.value] if isinstance(record.address, Address) else []
+            case ADDRESS_BOOK_FIELDS.EMAIL:
+                return [record.email.value] if isinstance(record.email, Email) else []
+            case ADDRESS_BOOK_FIELDS.PHONE:
+                return [phone.value for phone in record.phones]
+        return []
 
+    def __index(self, record: Record):
+        self.__index_texts(record)
+        for order in self.__orders.values():
+            order.add(record, self.__positions[record])
+        for phone in record.phones:
+            self.__phones.add(phone.number, record)
+        if isinstance(record.birthday, Birthday):
+            birthday = record.birthday.value
+            self.__birthdays.add((birthday.month, birthday.day), record)
+            self.__birth_dates.add(birthday, record)
 
-        view = AddressBookView(celebration_list)
+    def __index_texts(self, record: Record):
+        for field, index in self.__trigrams.items():
+            index.add(record, self.__field_texts(record, field))
+
+    def __unindex(self, record: Record):
+        for field, index in self.__trigrams.items():
+            index.remove(record, self.__field_texts(record, field))
+        for order in self.__orders.values():
+            order.remove(record)
+        for phone in record.phones:
+            self.__phones.remove(phone.number, record)
+        if isinstance(record.birthday, Birthday):
+            birthday = record.birthday.value
+            self.__birthdays.remove((birthday.month, birthday.day), record)
+            self.__birth_dates.remove(birthday, record)
+
+    def __candidates(self, keyword: str, field: ADDRESS_BOOK_FIELDS) -> set | None:
+        """
+        Narrows down the records that may match the keyword using the trigram indexes,
+        or the phone index for a whole phone number.
+        Returns None if the indexes can't help, and all the records should be checked.
+        """
+        if field == ADDRESS_BOOK_FIELDS.ALL:
+            candidates = set()
+            for index_field in self.__trigrams:
+                field_candidates = self.__field_candidates(keyword, index_field)
+                if field_candidates is None:
+                    return None
+                candidates |= field_candidates
+            return candidates
+        if field in self.__trigrams:
+            return self.__field_candidates(keyword, field)
+        return None
+
+    def __field_candidates(self, keyword: str, field: ADDRESS_BOOK_FIELDS) -> set | None:
+        if field == ADDRESS_BOOK_FIELDS.PHONE and len(keyword) == PHONE_DIGITS and keyword.isascii() and keyword.isdigit():
+            # a phone contains a keyword of all its digits only if it's the same number
+            return set(self.__phones.get(int(keyword)))
+        return self.__trigrams[field].candidates(keyword)
+
+    def get_upcoming_birthdays(self, days_prior: int = 7) -> None:
+        """
+        Shows upcoming birthdays (celebration days).
+        Parameters:
+            days_prior (int, optional): The number of days in the future to look for birthdays.
+                Defaults to 7.
+        """
+        view = AddressBookView(self.iter_upcoming_birthdays(days_prior))
         view.sort_column = Sort(column=ADDRESS_BOOK_FIELDS.BIRTHDAY, order="asc")
         view.output()
 
+    def iter_upcoming_birthdays(self, days_prior: int = 7) -> Iterator[Record]:
+        """
+        Yields the records whose birthdays are celebrated in the coming days, in the order of the birthdays
+        starting from today.
+        Parameters:
+            days_prior (int, optional): The number of days in the future to look for birthdays.
+                Defaults to 7.
+        """
+        current_date = date.today()
+        celebration_period = current_date + timedelta(days=days_prior)
+        # only the birthdays falling into the period are read from the index,
+        # some of them may still be shifted out of it by a weekend
+        candidates = chain.from_iterable(self.__birthdays.range(low, high)
+                                         for low, high in get_birthday_ranges(current_date, days_prior))
+        return (record for record in candidates
+                if get_celebration_date(record.birthday.value.date(), current_date) <= celebration_period)
+
     def search_by_date(self, from_date: Date, to_date: Date) -> None:
-        records = [record for record in self.data.values() if record.birthday.is_between(from_date=from_date, to_date=to_date)]
-        view = AddressBookView(records)
+        view = AddressBookView(self.iter_by_date(from_date, to_date))
         view.sort_column = Sort(column=ADDRESS_BOOK_FIELDS.BIRTHDAY, order="asc")
         view.output()
 
-    def search(self, keyword: str, field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL, sort: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.EMPTY, direction_text: str = "asc") -> None:
+    def iter_by_date(self, from_date: Date | None, to_date: Date | None) -> Iterator[Record]:
+        """
+        Yields the records born in the period, ordered by the birth date.
+        Parameters:
+            from_date (Date | None): The first day of the period, None for no lower bound.
+            to_date (Date | None): The last day of the period, None for no upper bound.
+        """
+        return self.__birth_dates.range(from_date.value if from_date is not None else None,
+                                        to_date.value if to_date is not None else None)
+
+    def search_by_phone(self, phone: str) -> None:
+        view = AddressBookView(self.find_by_phone(phone))
+        view.keyword = phone_digits(phone)
+        view.output()
+
+    def search(self, keyword: str, field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL, sort: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.EMPTY, direction_text: str = "asc",
+               limit: int | None = None, offset: int = 0) -> None:
         if field not in ADDRESS_BOOK_FIELDS or sort not in ADDRESS_BOOK_FIELDS:
             raise KeyError(f"Field {field} not found.")
 
-        records = self.__filter(keyword, field)
-        records = self.__sort(records, sort, direction_text)
+        key = (keyword, field, sort, direction_text, limit, offset)
+        page = self.__cache.get(key)
+        if page is None:
+            page = self.__page(keyword, field, sort, direction_text, limit, offset)
+            self.__cache.put(key, page, len(page.items))
 
-        view = AddressBookView(records)
+        view = AddressBookView(page.items)
         view.sort_column=Sort(column=sort, order=direction_text)
         view.keyword=keyword
+        view.page = page
         view.output()
 
-    def __filter(self, keyword: str, field: ADDRESS_BOOK_FIELDS):
-        records = self.data.values()
+    def iter_search(self, keyword: str = "", field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL, sort: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.EMPTY, direction_text: str = "asc") -> Iterator[Record]:
+        """
+        Yields the records search shows, as they are consumed, so they can be processed without keeping all of them.
+        An unsorted search checks the records as they are read, a sorted one reads the ordered index of the field.
+        The book should not be changed until the records are read.
+        Parameters:
+            keyword (str, optional): The substring to look for, all the records by default.
+            field (ADDRESS_BOOK_FIELDS, optional): The field to look in, all fields by default.
+            sort (ADDRESS_BOOK_FIELDS, optional): The field to sort by, the order the records were added in by default.
+            direction_text (str, optional): "asc" or "desc".
+        Returns:
+            Iterator[Record]: The matching records.
+        Raises:
+            KeyError: If the field or the sort field is not found.
+        """
+        if field not in ADDRESS_BOOK_FIELDS or sort not in ADDRESS_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+        records, _total = self.__results(keyword, field, sort, direction_text)
+        return iter(records)
+
+    def cache_stats(self) -> SearchCacheStats:
+        """
+        Returns the statistics of the cache of the search results.
+        """
+        return self.__cache.stats()
+
+    def filter(self, keyword: str, field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL) -> List[Record]:
+        """
+        Returns the records matching the keyword, in the order they were added.
+        Keywords of 3+ characters only check the records found by the trigram indexes.
+        Parameters:
+            keyword (str): The substring to look for.
+            field (ADDRESS_BOOK_FIELDS): The field to look in, all fields by default.
+        Returns:
+            List[Record]: The matching records.
+        """
+        return list(self.iter_filter(keyword, field))
+
+    def iter_filter(self, keyword: str = "", field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL) -> Iterator[Record]:
+        """
+        Same as filter, yielding the records one by one.
+        """
+        candidates = self.__candidates(keyword, field)
+        if candidates is None:
+            records = self.data.values()
+        else:
+            records = sorted(candidates, key=self.__positions.__getitem__)
+
+        # lowercase the keyword once, the fields keep their lowercased values
+        keyword = keyword.lower()
         match field:
             case ADDRESS_BOOK_FIELDS.ALL:
-                records = [record for record in records if record.match(keyword)]
+                records = (record for record in records if record.match_lower(keyword))
             case ADDRESS_BOOK_FIELDS.NAME:
-                records = [record for record in records if isinstance(record.name, Name) and record.name.match(keyword)]
+                records = (record for record in records if isinstance(record.name, Name) and record.name.match_lower(keyword))
             case ADDRESS_BOOK_FIELDS.ADDRESS:
-                records = [record for record in records if isinstance(record.address, Address) and record.address.match(keyword)]
-            case ADDRESS_BOOK_FIELDS.EMAIL:
-                records = [record for record in records if isinstance(record.email, Email) and record.email.match(keyword)]
+                records = (record for record in records if isinstance(record.address, Address) and record.address.match_lower(keyword))
             case ADDRESS_BOOK_FIELDS.EMAIL:
-                records = [record for record in records if record.match_phone(keyword)]
+                records = (record for record in records if isinstance(record.email, Email) and record.email.match_lower(keyword))
+            case ADDRESS_BOOK_FIELDS.PHONE:
+                records = (record for record in records if record.match_phone_lower(keyword))
+
+        yield from records
+
+    def __page(self, keyword: str, field: ADDRESS_BOOK_FIELDS, sort: ADDRESS_BOOK_FIELDS, direction_text: str,
+               limit: int | None, offset: int) -> Page:
+        """
+        Takes a page of the matching records sorted by the field, reading only the records the page needs where it can.
+        """
+        top = None if limit is None else offset + limit + 1
+        records, total = self.__results(keyword, field, sort, direction_text, top)
+        return paginate(records, offset, limit, total)
 
-        return records
+    def __results(self, keyword: str, field: ADDRESS_BOOK_FIELDS, sort: ADDRESS_BOOK_FIELDS, direction_text: str,
+                  top: int | None = None) -> Tuple[Iterable[Record], int | None]:
+        """
+        Returns the matching records sorted by the field, read lazily where they can be:
+        the order of the whole book is read from the ordered index of the field,
+        and the results of an unsorted search are checked as they are read.
+        Parameters:
+            top (int | None, optional): The number of the first results that will be read, if only they will.
+        Returns:
+            tuple: The records, and their number if it's known without reading all of them.
+        """
+        order = self.__order(sort)
+        reverse = direction_text != "asc"
+        if not keyword and field == ADDRESS_BOOK_FIELDS.ALL:
+            return (self.data.values() if order is None else order.iterate(reverse)), len(self.data)
+        if order is None:
+            # the results are counted only if all of them are read
+            return self.iter_filter(keyword, field), None
+        records = self.filter(keyword, field)
+        return order.select(records, reverse, top), len(records)
 
-    def __sort(self, records: List[Record], field: ADDRESS_BOOK_FIELDS, direction_text: str):
-        direction = False if direction_text == "asc" else True
+    def __order(self, sort: ADDRESS_BOOK_FIELDS) -> OrderedIndex | None:
+        """
+        Returns the ordered index of the field, building it on the first use, or None if the field isn't sortable.
+        """
+        order = self.__orders.get(sort)
+        if order is None:
+            sort_key = self.__sort_key(sort)
+            if sort_key is None:
+                return None
+            order = self.__orders[sort] = OrderedIndex(sort_key)
+            # the entries are not garbage, collecting while they are created would only walk the book again
+            with collection_paused():
+                order.add_many(self.__positions.items())
+        return order
 
+    @staticmethod
+    def __sort_key(field: ADDRESS_BOOK_FIELDS) -> Callable[[Record], object] | None:
         match field:
             case ADDRESS_BOOK_FIELDS.NAME:
-                records = sorted(records, key=lambda record: record.name.value if isinstance(record.name, Name) else "", reverse=direction)
+                return lambda record: record.name.value if isinstance(record.name, Name) else ""
             case ADDRESS_BOOK_FIELDS.ADDRESS:
-                records = sorted(records, key=lambda record: record.address.value if isinstance(record.address, Address) else "", reverse=direction)
+                return lambda record: record.address.value if isinstance(record.address, Address) else ""
             case ADDRESS_BOOK_FIELDS.EMAIL:
-                records = sorted(records, key=lambda record: record.email.value if isinstance(record.email, Email) else "", reverse=direction)
+                return lambda record: record.email.value if isinstance(record.email, Email) else ""
             case ADDRESS_BOOK_FIELDS.PHONE:
-                records = sorted(records, key=lambda record: "".join(phone.value for phone in record.phones), reverse=direction)
+                return lambda record: "".join(phone.value for phone in record.phones)
             case ADDRESS_BOOK_FIELDS.BIRTHDAY:
-                records = sorted(records, key=lambda record: record.birthday.value if isinstance(record.birthday, Birthday) else "", reverse=direction)
-            case _:
-                pass
-
-        return records
+                # the records without a birthday go first, as the empty values of the other fields do
+                return lambda record: record.birthday.value if isinstance(record.birthday, Birthday) else datetime.min
+        return None
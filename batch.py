@@ -0,0 +1,81 @@
+import sys
+import time
+from contextlib import nullcontext
+from typing import Iterable, NamedTuple, TextIO
+
+from commands import last_errors, prompts_disabled, run_command
+
+# the lines of a script starting with it are comments
+COMMENT = "#"
+# the script path to read the commands from stdin
+STDIN_PATH = "-"
+
+
+class BatchSummary(NamedTuple):
+    commands: int
+    failed: int
+    # whether the script ended with a command stopping the app, e.g. exit
+    stopped: bool
+    elapsed: float
+
+
+def run_batch(lines: Iterable[str], address_book, notes_book, status: TextIO = sys.stderr) -> BatchSummary:
+    """
+    Runs the commands of a script, a command per line, the way they're entered in the app, on the books loaded once.
+    Nothing is asked for, the values of add-contact, edit-contact, add-note and edit-note are given inline,
+    e.g. add-contact John email:john@gmail.com, the ones not given are left as they are.
+    The empty lines and the ones starting with COMMENT are skipped, a command stopping the app, e.g. exit, ends the script.
+    Parameters:
+        lines (Iterable[str]): The lines of the script.
+        address_book (AddressBook | SqliteAddressBook | ColumnarAddressBook): The contacts.
+        notes_book (Notebook | SqliteNotebook): The notes.
+        status (TextIO, optional): Where to write the status of every command, a tab separated line
+            of the line number, "ok" or "error", and the result or the errors of the command.
+    Returns:
+        BatchSummary: The number of the commands run and of the failed ones.
+    """
+    start = time.perf_counter()
+    commands = failed = 0
+    stopped = False
+    with prompts_disabled():
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith(COMMENT):
+                continue
+            commands += 1
+            try:
+                result = run_command(line, address_book, notes_book)
+                errors = list(last_errors)
+            except SystemExit:
+                result, errors, stopped = None, [], True
+            except Exception as e:
+                # e.g. a wrong number of days of show-birthdays, the script goes on with the next command
+                result, errors = None, [str(e)]
+            if errors:
+                failed += 1
+                status.write(f"{number}\terror\t{one_line(' '.join(errors))}\n")
+            else:
+                status.write(f"{number}\tok\t{one_line(result) if isinstance(result, str) else ''}\n")
+            if stopped:
+                break
+    return BatchSummary(commands, failed, stopped, time.perf_counter() - start)
+
+
+def run_script(path: str, address_book, notes_book, status: TextIO = sys.stderr) -> BatchSummary:
+    """
+    Runs the commands of a script file, or of stdin if the path is STDIN_PATH, see run_batch.
+    Raises:
+        ValueError: If the file can't be read.
+    """
+    try:
+        script = nullcontext(sys.stdin) if path == STDIN_PATH else open(path, encoding="utf-8")
+    except OSError as e:
+        raise ValueError(f"Can't read {path}: {e.strerror}")
+    with script as lines:
+        summary = run_batch(lines, address_book, notes_book, status)
+    status.write(f"{summary.commands} commands, {summary.failed} failed, in {summary.elapsed:.2f}s\n")
+    return summary
+
+
+def one_line(text: str) -> str:
+    return " ".join(text.split())
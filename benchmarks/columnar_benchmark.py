@@ -0,0 +1,73 @@
+"""
+Compares building, loading and the queries of AddressBook with the ones of ColumnarAddressBook.
+Rendering of the results is left out, only the queries are timed, including the creation
+of the found records by ColumnarAddressBook.
+
+Run from the project folder:
+    python -m benchmarks.columnar_benchmark [sizes...]
+"""
+import gc
+import pickle
+import sys
+import time
+
+from address_book import AddressBook
+from benchmarks.data import make_records
+from columnar_storage import ColumnarAddressBook
+from field import Date
+from record import ADDRESS_BOOK_FIELDS
+from views.AddressBookView import AddressBookView
+
+QUERIES = [
+    ("search ko, sort by name", "search", ("ko", ADDRESS_BOOK_FIELDS.ALL, ADDRESS_BOOK_FIELDS.NAME, "asc")),
+    ("search gmail, sort by phone", "search", ("gmail", ADDRESS_BOOK_FIELDS.EMAIL, ADDRESS_BOOK_FIELDS.PHONE, "desc")),
+    ("search 067 in phones", "search", ("067", ADDRESS_BOOK_FIELDS.PHONE, ADDRESS_BOOK_FIELDS.EMPTY, "asc")),
+    ("birthdays in 30 days", "get_upcoming_birthdays", (30,)),
+    ("born in 1970-1980", "search_by_date", (Date("01.01.1970"), Date("31.12.1980"))),
+]
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run_queries(book) -> list:
+    """
+    Returns (hits, time) of every query.
+    """
+    hits = []
+    # the views may get the results as an iterator, read as they are shown
+    AddressBookView.output = lambda view, clear=False: hits.append(sum(1 for _ in view.data))
+    times = [timed(getattr(book, method), *args) for _title, method, args in QUERIES]
+    return list(zip(hits, times))
+
+
+def main(sizes):
+    for size in sizes:
+        # one book at a time, as the garbage collector slows down with every object kept
+        book = AddressBook()
+        build_time = timed(lambda: [book.add_record(record) for record in make_records(size)])
+        book_results = run_queries(book)
+        load_time = timed(pickle.loads, pickle.dumps(book))
+        del book
+        gc.collect()
+
+        columnar_book = ColumnarAddressBook()
+        columnar_build_time = timed(columnar_book.add_records, make_records(size))
+        columnar_results = run_queries(columnar_book)
+        columnar_load_time = timed(pickle.loads, pickle.dumps(columnar_book))
+        del columnar_book
+        gc.collect()
+
+        print(f"{size} contacts, built in {build_time:.1f}s, columnar in {columnar_build_time:.1f}s, "
+              f"unpickled in {load_time:.1f}s, columnar in {columnar_load_time:.1f}s")
+        for (title, _method, _args), (hits, book_time), (columnar_hits, columnar_time) in zip(QUERIES, book_results, columnar_results):
+            assert hits == columnar_hits
+            print(f"  {title:>28}: {hits:>7} hits, "
+                  f"objects {book_time * 1000:9.2f}ms, columns {columnar_time * 1000:9.2f}ms")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100_000, 1_000_000])
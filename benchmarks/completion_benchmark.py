@@ -0,0 +1,66 @@
+"""
+Times completing the contact names of edit-contact, keystroke by keystroke, the way tab completion asks for them,
+against scanning all the names for each keystroke. The first completion builds the prefix tree, it's timed apart.
+Exits with 1 if a completion takes longer than COMPLETION_BUDGET seconds.
+
+Run from the project folder:
+    python -m benchmarks.completion_benchmark [sizes...]
+"""
+import random
+import sys
+import time
+
+from address_book import AddressBook
+from benchmarks.data import make_records
+from commands import COMPLETION_LIMIT, CommandsCompleter
+
+# the names typed, a completion is asked for after every character of them
+TYPED_NAMES = 20
+# the time a completion shouldn't exceed, for any number of names
+COMPLETION_BUDGET = 0.005
+
+
+def scan(book: AddressBook, prefix: str) -> list:
+    prefix = prefix.lower()
+    return sorted(name for name in book if name.lower().startswith(prefix))[:COMPLETION_LIMIT]
+
+
+def main(sizes):
+    over_budget = False
+    for size in sizes:
+        book = AddressBook()
+        book.add_records(make_records(size))
+        completer = CommandsCompleter([], book)
+        names = random.Random(size).sample(list(book), min(TYPED_NAMES, size))
+
+        start = time.perf_counter()
+        completer.get_matches("", "edit-contact ")
+        build_time = time.perf_counter() - start
+
+        times = []
+        for name in names:
+            for end in range(1, len(name) + 1):
+                # the names are split at their spaces, so they're typed quoted
+                line = f'edit-contact "{name[:end]}'
+                start = time.perf_counter()
+                completer.get_matches(line.rsplit(" ", 1)[-1], line)
+                times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for name in names:
+            scan(book, name[:3])
+        scan_time = (time.perf_counter() - start) / len(names)
+
+        print(f"{size} names: the prefix tree built in {build_time:.2f}s, {len(times)} completions "
+              f"in {sum(times) / len(times) * 1000:.2f}ms on average, {max(times) * 1000:.2f}ms at most, "
+              f"scanning the names takes {scan_time * 1000:.0f}ms")
+        over_budget |= max(times) > COMPLETION_BUDGET
+        # a book of a million contacts takes most of the memory of a small machine
+        del book, completer
+    if over_budget:
+        print(f"A completion took longer than {COMPLETION_BUDGET * 1000:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,39 @@
+"""
+Synthetic contacts and notes for the benchmarks.
+"""
+import random
+from typing import Iterator
+
+from note import Note
+from record import Record
+
+FIRST_NAMES = ["Anna", "Bohdan", "Dmytro", "Eduard", "Iryna", "Maks", "Olena", "Serhii", "Taras", "Yulia"]
+LAST_NAMES = ["Kozachenko", "Shevchenko", "Bondarenko", "Tkachenko", "Kovalenko", "Melnyk", "Kravchenko", "Oliinyk"]
+STREETS = ["Khreshchatyk", "Sichovykh Striltsiv", "Velyka Vasylkivska", "Hrushevskoho", "Saksahanskoho", "Lesi Ukrainky"]
+DOMAINS = ["gmail.com", "ukr.net", "i.ua", "example.org"]
+WORDS = ["meeting", "project", "deadline", "call", "review", "budget", "release", "report", "idea", "travel",
+         "groceries", "birthday", "invoice", "design", "backlog", "retro", "urgent", "draft", "plan", "notes"]
+
+
+def make_records(count: int, seed: int = 42) -> Iterator[Record]:
+    rng = random.Random(seed)
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        record = Record(f"{first} {last} {i}")
+        record.add_phone(f"0{rng.randint(100000000, 999999999)}")
+        if rng.random() < 0.3:
+            record.add_phone(f"0{rng.randint(100000000, 999999999)}")
+        record.add_email(f"{first.lower()}.{last.lower()}{i}@{rng.choice(DOMAINS)}")
+        record.add_address(f"{rng.randint(1, 200)} {rng.choice(STREETS)} st, Kyiv")
+        if rng.random() < 0.8:
+            record.add_birthday(f"{rng.randint(1, 28):02}.{rng.randint(1, 12):02}.{rng.randint(1950, 2010)}")
+        yield record
+
+
+def make_notes(count: int, seed: int = 42) -> Iterator[Note]:
+    rng = random.Random(seed)
+    for i in range(count):
+        note = Note(f"{rng.choice(WORDS)} {i}", " ".join(rng.choices(WORDS, k=rng.randint(5, 40))))
+        note.tags = rng.sample(WORDS, k=rng.randint(0, 4))
+        yield note
+
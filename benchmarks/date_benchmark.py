@@ -0,0 +1,87 @@
+"""
+Compares validating birthdays with trying the date formats one by one with strptime,
+as Date and Birthday did before, with the format picked by the separator, one by one
+and in a batch. A few of the dates are invalid.
+
+Run from the project folder:
+    python -m benchmarks.date_benchmark [count]
+"""
+import random
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from field import Birthday
+
+FORMATS = ["%d.%m.%Y", "%d %m %Y", "%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"]
+
+
+def validate_birthday_strptime(value: str) -> datetime:
+    birth_date = None
+    for date_format in FORMATS:
+        try:
+            birth_date = datetime.strptime(value, date_format)
+            break
+        except ValueError:
+            continue
+    if not birth_date:
+        raise ValueError("Invalid date format. Try DD.MM.YYYY")
+    if (datetime.now() - birth_date).days / 365 > 115:
+        raise ValueError("Year of birth seems to be incorrect. Or you might be not alive already.")
+    if datetime.now() < birth_date:
+        raise ValueError("Year of birth seems to be incorrect. Or you are not born yet.")
+    return birth_date
+
+
+def make_dates(count: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    dates = []
+    for _ in range(count):
+        day, month, year = rng.randint(1, 31), rng.randint(1, 12), rng.randint(1940, 2015)
+        date_format = rng.choice(FORMATS)
+        # about one in forty days doesn't exist in its month
+        dates.append(date_format.replace("%d", f"{day:02}").replace("%m", f"{month:02}").replace("%Y", str(year)))
+    return dates
+
+
+def validate_all(validate, dates: List[str]) -> list:
+    # the results are kept, as a bulk load keeps the birthdays
+    results = []
+    for date in dates:
+        try:
+            results.append((validate(date), None))
+        except ValueError as e:
+            results.append((None, str(e)))
+    return results
+
+
+def count_valid(results: list) -> int:
+    return sum(error is None for _birthday, error in results)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(count: int):
+    dates = make_dates(count)
+    results, strptime_time = timed(validate_all, validate_birthday_strptime, dates)
+    valid = count_valid(results)
+    del results
+    results, parsed_time = timed(validate_all, Birthday, dates)
+    assert count_valid(results) == valid
+    del results
+    results, batch_time = timed(Birthday.validate_birthdays, dates)
+    assert count_valid(results) == valid
+
+    print(f"{count} dates in {len(FORMATS)} formats, {valid} valid")
+    print(f"  strptime, format by format: {strptime_time:7.2f}s")
+    print(f"  format by separator:        {parsed_time:7.2f}s ({strptime_time / parsed_time:.1f}x)")
+    print(f"  batch:                      {batch_time:7.2f}s ({strptime_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,54 @@
+"""
+Times finding the duplicate contacts, with a known number of duplicates added to the synthetic contacts:
+copies sharing a phone under another name, sharing an email, and with the name words swapped.
+
+Run from the project folder:
+    python -m benchmarks.duplicates_benchmark [sizes...]
+"""
+import sys
+import time
+from typing import Iterator
+
+from address_book import AddressBook
+from benchmarks.data import make_records
+from duplicates import find_duplicates
+from record import Record
+
+# every DUPLICATE_EVERY-th contact gets a duplicate
+DUPLICATE_EVERY = 50
+
+
+def make_duplicate(record: Record, kind: int) -> Record:
+    first, last, number = record.name.value.split()
+    match kind:
+        case 0:
+            duplicate = Record(f"{first[0]}. {last} {number}")
+            duplicate.add_phone(record.phones[0].value)
+        case 1:
+            duplicate = Record(f"{first} {number}")
+            duplicate.add_email(record.email.value.upper())
+        case _:
+            duplicate = Record(f"{last} {first} {number}")
+    return duplicate
+
+
+def make_records_with_duplicates(count: int) -> Iterator[Record]:
+    for i, record in enumerate(make_records(count)):
+        yield record
+        if i % DUPLICATE_EVERY == 0:
+            yield make_duplicate(record, i // DUPLICATE_EVERY % 3)
+
+
+def main(sizes):
+    for size in sizes:
+        book = AddressBook()
+        book.add_records(make_records_with_duplicates(size))
+        start = time.perf_counter()
+        groups = find_duplicates(book)
+        elapsed = time.perf_counter() - start
+        expected = (size + DUPLICATE_EVERY - 1) // DUPLICATE_EVERY
+        print(f"{len(book)} contacts: {len(groups)} groups of duplicates ({expected} added) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100_000, 1_000_000])
@@ -0,0 +1,56 @@
+"""
+Compares matching with the lowercased values cached in the fields and notes
+with lowercasing the values and the keyword on every check.
+
+Run from the project folder:
+    python -m benchmarks.match_benchmark [count]
+"""
+import sys
+import time
+
+from benchmarks.data import make_notes, make_records
+
+
+def record_match_uncached(record, keyword: str) -> bool:
+    def field_match(field) -> bool:
+        return field is not None and field.value.lower().find(keyword.lower()) >= 0
+    return (field_match(record.name)
+            or any([field_match(phone) for phone in record.phones])
+            or field_match(record.email)
+            or field_match(record.address))
+
+
+def note_match_uncached(note, keyword: str) -> bool:
+    return (note.title.lower().find(keyword.lower()) >= 0
+            or note.body.lower().find(keyword.lower()) >= 0
+            or any([tag.lower().find(keyword.lower()) >= 0 for tag in note.tags]))
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(count: int):
+    records = list(make_records(count))
+    notes = list(make_notes(count))
+    # the caches are filled by the first query
+    [record.match("Zz") for record in records]
+    [note.match("Zz") for note in notes]
+
+    for keyword in ["Zz", "Ko", "@i.ua"]:
+        uncached = timed(lambda: [record for record in records if record_match_uncached(record, keyword)])
+        lower_keyword = keyword.lower()
+        cached = timed(lambda: [record for record in records if record.match_lower(lower_keyword)])
+        print(f"contacts {keyword!r:>8}: uncached {uncached * 1000:8.1f}ms, cached {cached * 1000:8.1f}ms")
+
+    for keyword in ["Zz", "Re", "urgent"]:
+        uncached = timed(lambda: [note for note in notes if note_match_uncached(note, keyword)])
+        lower_keyword = keyword.lower()
+        cached = timed(lambda: [note for note in notes if note.match_lower(lower_keyword)])
+        print(f"notes    {keyword!r:>8}: uncached {uncached * 1000:8.1f}ms, cached {cached * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
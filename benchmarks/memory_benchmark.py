@@ -0,0 +1,53 @@
+"""
+Measures the memory taken by the contacts with tracemalloc, comparing the slotted
+fields and records with the previous layout, where every record and field had its own
+__dict__, phones were kept as strings and birthdays as datetimes.
+
+Run from the project folder:
+    python -m benchmarks.memory_benchmark [count]
+"""
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.data import make_records
+
+
+class DictField:
+    def __init__(self, value):
+        self.value = value
+        lower_value = value.lower() if type(value) is str else None
+        self.lower_value = value if lower_value == value else lower_value
+
+
+class DictRecord:
+    def __init__(self, record):
+        self.name = DictField(record.name.value)
+        self.phones = [DictField(phone.value) for phone in record.phones]
+        self.email = DictField(record.email.value) if record.email else None
+        self.birthday = DictField(record.birthday.value) if record.birthday else None
+        # a copy of the address, as it was not interned
+        self.address = DictField(record.address.value.encode().decode()) if record.address else None
+
+
+def measure(count: int, convert) -> float:
+    gc.collect()
+    tracemalloc.start()
+    # the records are generated one by one, so only the kept ones are counted
+    records = [convert(record) for record in make_records(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    gc.collect()
+    return size / count
+
+
+def main(count: int):
+    before = measure(count, DictRecord)
+    after = measure(count, lambda record: record)
+    print(f"{count} contacts: __dict__ layout {before:7.1f} bytes/contact, "
+          f"slotted layout {after:7.1f} bytes/contact ({after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
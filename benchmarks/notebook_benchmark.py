@@ -0,0 +1,40 @@
+"""
+Bulk-loads notes into a Notebook and measures the title lookups and removals.
+
+Run from the project folder:
+    python -m benchmarks.notebook_benchmark [count]
+"""
+import sys
+import time
+
+from benchmarks.data import make_notes
+from notes_book import Notebook
+
+
+def main(count: int):
+    notes = list(make_notes(count))
+    book = Notebook()
+
+    start = time.perf_counter()
+    for note in notes:
+        book.add_note(note)
+    print(f"add_note:          {count} notes in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for note in notes:
+        book.get_note_by_title(note.title)
+    print(f"get_note_by_title: {count} lookups in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for note in notes[::2]:
+        book.update_note(note, type(note)(f"{note.title} (edited)"))
+    print(f"update_note:       {count // 2} renames in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for note in notes:
+        book.remove_note(note.title)
+    print(f"remove_note:       {count} removals in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,50 @@
+"""
+Times rendering the search results table: the time to the first printed rows and the time of all of them,
+with and without a keyword to highlight, and writing the rows as TSV and JSON lines.
+
+Run from the project folder:
+    python -m benchmarks.render_benchmark [sizes...]
+"""
+import contextlib
+import io
+import sys
+import time
+
+from benchmarks.data import make_records
+from views.AddressBookView import AddressBookView
+from views.View import JSONL_FORMAT, TABLE_FORMAT, TSV_FORMAT, output_format
+
+# the output formats and the keywords to highlight in them
+RUNS = [(TABLE_FORMAT, ""), (TABLE_FORMAT, "ko"), (TSV_FORMAT, "ko"), (JSONL_FORMAT, "ko")]
+
+
+class TimedOutput(io.StringIO):
+    """
+    The output the view prints to, keeping the time of the first write.
+    """
+    first_write: float | None = None
+
+    def write(self, s: str) -> int:
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        return super().write(s)
+
+
+def main(sizes):
+    for size in sizes:
+        records = list(make_records(size))
+        for rows_format, keyword in RUNS:
+            view = AddressBookView(iter(records))
+            view.keyword = keyword
+            output = TimedOutput()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(output), output_format(rows_format):
+                view.output()
+            elapsed = time.perf_counter() - start
+            print(f"{size} rows, {rows_format:>5}, keyword {keyword!r:>4}: "
+                  f"first rows in {(output.first_write - start) * 1000:8.1f}ms, "
+                  f"all in {elapsed:7.2f}s, {output.getvalue().count(chr(10))} lines")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [1_000, 10_000, 100_000])
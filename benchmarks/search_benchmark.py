@@ -0,0 +1,55 @@
+"""
+Compares a full scan with the trigram index narrowed search in AddressBook.
+
+Run from the project folder:
+    python -m benchmarks.search_benchmark [sizes...]
+"""
+import sys
+import time
+
+from address_book import AddressBook
+from benchmarks.data import make_records
+from record import ADDRESS_BOOK_FIELDS
+
+QUERIES = [
+    ("shevchenko 12", ADDRESS_BOOK_FIELDS.ALL),
+    ("khreshchatyk", ADDRESS_BOOK_FIELDS.ALL),
+    ("gmail", ADDRESS_BOOK_FIELDS.EMAIL),
+    ("067123", ADDRESS_BOOK_FIELDS.PHONE),
+    ("Olena Melnyk", ADDRESS_BOOK_FIELDS.NAME),
+]
+
+
+def scan(book: AddressBook, keyword: str, field: ADDRESS_BOOK_FIELDS):
+    match field:
+        case ADDRESS_BOOK_FIELDS.ALL:
+            return [record for record in book.data.values() if record.match(keyword)]
+        case ADDRESS_BOOK_FIELDS.NAME:
+            return [record for record in book.data.values() if record.name.match(keyword)]
+        case ADDRESS_BOOK_FIELDS.EMAIL:
+            return [record for record in book.data.values() if record.email is not None and record.email.match(keyword)]
+        case ADDRESS_BOOK_FIELDS.PHONE:
+            return [record for record in book.data.values() if record.match_phone(keyword)]
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    for size in sizes:
+        book = AddressBook()
+        _, build_time = timed(lambda: [book.add_record(record) for record in make_records(size)])
+        print(f"{size} contacts, built with indexes in {build_time:.1f}s")
+        for keyword, field in QUERIES:
+            scanned, scan_time = timed(scan, book, keyword, field)
+            indexed, index_time = timed(book.filter, keyword, field)
+            assert scanned == indexed
+            print(f"  {field.value:>7} {keyword!r:>16}: {len(indexed):>7} hits, "
+                  f"scan {scan_time * 1000:9.2f}ms, index {index_time * 1000:9.2f}ms")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
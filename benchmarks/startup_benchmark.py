@@ -0,0 +1,93 @@
+"""
+Times the start of the app: the import time of new_main (python -X importtime), and, with a pickled book
+of each size, the wall-clock time to the first prompt, to the answer of help, which doesn't wait for the book,
+and to the answer of the first command reading the book.
+Exits with 1 if the first prompt takes longer than PROMPT_BUDGET seconds, whatever the size of the book.
+
+Run from the project folder:
+    python -m benchmarks.startup_benchmark [sizes...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from address_book import AddressBook
+from benchmarks.data import make_records
+from serialization import write_snapshot
+
+PROMPT = b"Enter command: "
+# the time to the first prompt the start of the app shouldn't exceed, for any size of the book,
+# the prompt comes in 90-210ms with the books loaded in background
+PROMPT_BUDGET = 0.3
+
+
+def import_time() -> float:
+    """
+    Returns the cumulative import time of new_main in seconds, as python -X importtime reports it.
+    """
+    with tempfile.TemporaryDirectory() as home:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import new_main"],
+                                env=os.environ | {"HOME": home}, capture_output=True, text=True, check=True)
+    last_line = result.stderr.strip().splitlines()[-1]
+    return int(last_line.split("|")[1]) / 1_000_000
+
+
+def read_until_prompt(process: subprocess.Popen) -> bytes:
+    output = b""
+    while not output.endswith(PROMPT):
+        chunk = os.read(process.stdout.fileno(), 65536)
+        if not chunk:
+            raise RuntimeError(f"The app stopped before the prompt: {output[-500:]!r}")
+        output += chunk
+    return output
+
+
+def time_start(size: int) -> tuple:
+    """
+    Returns the times to the first prompt, to the answer of help, and of the first command reading the book.
+    """
+    with tempfile.TemporaryDirectory() as home:
+        app_folder = os.path.join(home, ".mason_app")
+        os.makedirs(app_folder)
+        if size:
+            book = AddressBook()
+            book.add_records(make_records(size))
+            write_snapshot(book, os.path.join(app_folder, "addressbook.pkl"))
+            del book
+
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "new_main.py"], env=os.environ | {"HOME": home},
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        read_until_prompt(process)
+        prompt_time = time.perf_counter() - start
+
+        times = []
+        for command in (b"help\n", b"all-contacts limit:1\n"):
+            start = time.perf_counter()
+            process.stdin.write(command)
+            process.stdin.flush()
+            read_until_prompt(process)
+            times.append(time.perf_counter() - start)
+
+        process.stdin.close()
+        process.wait()
+    return prompt_time, *times
+
+
+def main(sizes):
+    print(f"new_main imported in {import_time() * 1000:.0f}ms")
+    over_budget = False
+    for size in sizes:
+        prompt_time, help_time, data_time = time_start(size)
+        print(f"{size} contacts: first prompt in {prompt_time * 1000:.0f}ms, help in {help_time * 1000:.0f}ms, "
+              f"the first search in {data_time * 1000:.0f}ms")
+        over_budget |= prompt_time > PROMPT_BUDGET
+    if over_budget:
+        print(f"The first prompt took longer than {PROMPT_BUDGET}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [0, 100_000, 300_000])
@@ -0,0 +1,531 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from address_book import get_birthday_ranges, get_celebration_date
+from field import Date, Name, Phone, Email, Birthday, Address, PHONE_DIGITS, collection_paused, phone_digits
+from indexes import BKTree, PrefixTrie
+from paging import paginate
+from record import Record, ADDRESS_BOOK_FIELDS
+from views.TableView import Sort
+from views.AddressBookView import AddressBookView
+
+STRING = np.dtypes.StringDType()
+
+# the columns of a contact, an empty string or 0 stands for a missing value
+CONTACT_COLUMNS = {
+    "alive": np.bool_,
+    "name": STRING,
+    "lower_name": STRING,
+    "email": STRING,
+    "lower_email": STRING,
+    "address": STRING,
+    "lower_address": STRING,
+    # all the phone digits of a contact joined, to sort by
+    "phones": STRING,
+    # date ordinal of the birthday
+    "birthday": np.int32,
+    # month * 100 + day of the birthday, for the birthdays of a period of the year
+    "birthday_day": np.int16,
+    # the phones of a contact are kept together, phone_count of them from first_phone on
+    "first_phone": np.int64,
+    "phone_count": np.int32,
+}
+
+# the columns of a phone, a contact may have any number of them
+PHONE_COLUMNS = {
+    "number": np.int64,
+    # row of the contact the phone belongs to, -1 for the phones of deleted or changed contacts
+    "row": np.int64,
+}
+
+# the number of records created at a time when they are streamed
+RESTORE_CHUNK_SIZE = 1000
+
+
+def grown(columns: Dict[str, np.ndarray], size: int, capacity: int) -> Dict[str, np.ndarray]:
+    """
+    Returns copies of the columns with room for capacity values, keeping the first size values.
+    """
+    result = {}
+    for name, column in columns.items():
+        result[name] = np.zeros(capacity, dtype=column.dtype)
+        result[name][:size] = column[:size]
+    return result
+
+
+class ColumnarAddressBook:
+    """
+    An address book keeping the contacts in parallel arrays, one per field, instead of Record objects,
+    so searches filter and sort the whole book with array operations.
+    Records are created on demand, and their changes are written back to the arrays.
+    Deleted contacts are only marked as such until most of the rows are deleted.
+    """
+    fields = ADDRESS_BOOK_FIELDS
+    journal = None
+    # keyword searched columns of the fields
+    text_columns = {
+        ADDRESS_BOOK_FIELDS.NAME: "name",
+        ADDRESS_BOOK_FIELDS.EMAIL: "email",
+        ADDRESS_BOOK_FIELDS.ADDRESS: "address",
+    }
+    # columns to sort by
+    sort_columns = {
+        ADDRESS_BOOK_FIELDS.NAME: "name",
+        ADDRESS_BOOK_FIELDS.EMAIL: "email",
+        ADDRESS_BOOK_FIELDS.ADDRESS: "address",
+        ADDRESS_BOOK_FIELDS.PHONE: "phones",
+        ADDRESS_BOOK_FIELDS.BIRTHDAY: "birthday",
+    }
+
+    def __init__(self, records: Iterable[Record] = ()):
+        self.__columns = grown({name: np.zeros(0, dtype) for name, dtype in CONTACT_COLUMNS.items()}, 0, 16)
+        self.__phones = grown({name: np.zeros(0, dtype) for name, dtype in PHONE_COLUMNS.items()}, 0, 16)
+        self.__size = 0
+        self.__phones_size = 0
+        self.__deleted = 0
+        self.__deleted_phones = 0
+        # row of every contact by name
+        self.__rows = {}
+        # names by edit distance, built on the first fuzzy lookup
+        self.__names = None
+        # names by their lowercase prefixes for completing them, built on the first completion
+        self.__prefixes = None
+        self.add_records(records)
+
+    def __str__(self) -> str:
+        return "\n".join([str(record) for record in self.values()])
+
+    def __len__(self) -> int:
+        return len(self.__rows)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__rows
+
+    def __iter__(self):
+        return iter(list(self.__rows))
+
+    def values(self) -> List[Record]:
+        return self.__restore(np.nonzero(self.__column("alive"))[0])
+
+    def add_record(self, record: Record):
+        """
+        Adds a record to the address book.
+        Parameters:
+            record (Record): The record to add.
+        Raises:
+            KeyError: If a record with the same name already exists.
+        """
+        self.add_records([record])
+
+    def add_records(self, records: Iterable[Record]):
+        """
+        Adds many records writing each column once.
+        Parameters:
+            records (Iterable[Record]): The records to add.
+        Raises:
+            KeyError: If a record with the same name already exists, no record is added then.
+        """
+        records = list(records)
+        names = set()
+        for record in records:
+            if record.name.value in self.__rows or record.name.value in names:
+                raise KeyError(f"A record with name {record.name.value} already exists.")
+            names.add(record.name.value)
+
+        self.__reserve(self.__size + len(records))
+        self.__write(self.__size, records)
+        for row, record in enumerate(records, self.__size):
+            self.__rows[record.name.value] = row
+            record.book = self
+            if self.__names is not None:
+                self.__names.add(record.name.value.lower(), record.name.value)
+            if self.__prefixes is not None:
+                self.__prefixes.add(record.name.value.lower(), record.name.value)
+        self.__size += len(records)
+
+    def find(self, name: str) -> Record:
+        """
+        Finds a record by name.
+        Parameters:
+            name (str): The name of the record to find.
+        Returns:
+            Record: The record with the given name, or None if not found.
+        """
+        if name not in self.__rows:
+            return None
+        return self.__restore(np.array([self.__rows[name]]))[0]
+
+    def delete(self, name: str):
+        """
+        Deletes a record by name.
+        Parameters:
+            name (str): The name of the record to delete.
+        Raises:
+            KeyError: If no record with the given name is found.
+        """
+        if name not in self.__rows:
+            raise KeyError(f"A record with name {name} not found.")
+        self.__erase(self.__rows.pop(name))
+        if self.__names is not None:
+            self.__names.remove(name.lower(), name)
+        if self.__prefixes is not None:
+            self.__prefixes.remove(name.lower(), name)
+        self.__compact_if_needed()
+
+    def find_similar(self, name: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        """
+        Finds the names closest to the given one, to suggest them when it's misspelled.
+        """
+        if self.__names is None:
+            self.__names = BKTree()
+            for record_name in self.__rows:
+                self.__names.add(record_name.lower(), record_name)
+        return [record_name for _distance, record_name in self.__names.search(name.lower(), max_distance)[:limit]]
+
+    def names_starting_with(self, prefix: str, limit: int | None = None) -> List[str]:
+        """
+        Finds the names starting with the prefix, to complete a name being typed.
+        """
+        if self.__prefixes is None:
+            with collection_paused():
+                self.__prefixes = PrefixTrie()
+                for record_name in self.__rows:
+                    self.__prefixes.add(record_name.lower(), record_name)
+        return self.__prefixes.items(prefix.lower(), limit)
+
+    def record_changing(self, record: Record):
+        pass
+
+    def record_changed(self, record: Record, old_name: str):
+        """
+        Writes a changed record back to the columns.
+        A renamed record is moved to a new row, so it's found after the others as in AddressBook.
+        Parameters:
+            record (Record): The changed record.
+            old_name (str): The name of the record before the change.
+        """
+        row = self.__rows.pop(old_name)
+        if record.name.value == old_name:
+            self.__erase_phones(row)
+            self.__write(row, [record])
+            self.__rows[old_name] = row
+            self.__compact_if_needed()
+            return
+
+        self.__erase(row)
+        self.add_record(record)
+        if self.__names is not None:
+            self.__names.remove(old_name.lower(), old_name)
+        if self.__prefixes is not None:
+            self.__prefixes.remove(old_name.lower(), old_name)
+        self.__compact_if_needed()
+
+    def __getstate__(self):
+        self.__compact()
+        return {
+            "columns": {name: column[:self.__size] for name, column in self.__columns.items()},
+            "phones": {name: column[:self.__phones_size] for name, column in self.__phones.items()},
+            "names": self.__names,
+        }
+
+    def __setstate__(self, state):
+        self.__columns = state["columns"]
+        self.__phones = state["phones"]
+        self.__size = len(self.__columns["alive"])
+        self.__phones_size = len(self.__phones["row"])
+        self.__deleted = 0
+        self.__deleted_phones = 0
+        self.__rows = {name: row for row, name in enumerate(self.__columns["name"].tolist())}
+        self.__names = state.get("names")
+        self.__prefixes = None
+
+    def __column(self, name: str) -> np.ndarray:
+        return self.__columns[name][:self.__size]
+
+    def __reserve(self, size: int):
+        capacity = len(self.__columns["alive"])
+        if size > capacity:
+            self.__columns = grown(self.__columns, self.__size, max(size, capacity * 2))
+
+    def __reserve_phones(self, size: int):
+        capacity = len(self.__phones["row"])
+        if size > capacity:
+            self.__phones = grown(self.__phones, self.__phones_size, max(size, capacity * 2))
+
+    def __write(self, start: int, records: List[Record]):
+        """
+        Writes the records to the rows from start on, and appends their phones.
+        """
+        end = start + len(records)
+        columns = self.__columns
+        columns["alive"][start:end] = True
+        names = [record.name.value for record in records]
+        columns["name"][start:end] = names
+        columns["lower_name"][start:end] = [name.lower() for name in names]
+        emails = [record.email.value if isinstance(record.email, Email) else "" for record in records]
+        columns["email"][start:end] = emails
+        columns["lower_email"][start:end] = [email.lower() for email in emails]
+        addresses = [record.address.value if isinstance(record.address, Address) else "" for record in records]
+        columns["address"][start:end] = addresses
+        columns["lower_address"][start:end] = [address.lower() for address in addresses]
+        columns["phones"][start:end] = ["".join(phone.value for phone in record.phones) for record in records]
+        birthdays = [record.birthday.value if isinstance(record.birthday, Birthday) else None for record in records]
+        columns["birthday"][start:end] = [birthday.toordinal() if birthday else 0 for birthday in birthdays]
+        columns["birthday_day"][start:end] = [birthday.month * 100 + birthday.day if birthday else 0 for birthday in birthdays]
+
+        counts = np.array([len(record.phones) for record in records], dtype=np.int64)
+        columns["phone_count"][start:end] = counts
+        columns["first_phone"][start:end] = self.__phones_size + np.cumsum(counts) - counts
+        numbers = [(row, phone.number) for row, record in enumerate(records, start) for phone in record.phones]
+        phones_end = self.__phones_size + len(numbers)
+        self.__reserve_phones(phones_end)
+        self.__phones["row"][self.__phones_size:phones_end] = [row for row, _number in numbers]
+        self.__phones["number"][self.__phones_size:phones_end] = [number for _row, number in numbers]
+        self.__phones_size = phones_end
+
+    def __erase(self, row: int):
+        self.__columns["alive"][row] = False
+        self.__deleted += 1
+        self.__erase_phones(row)
+
+    def __erase_phones(self, row: int):
+        first, count = int(self.__columns["first_phone"][row]), int(self.__columns["phone_count"][row])
+        self.__phones["row"][first:first + count] = -1
+        self.__columns["phone_count"][row] = 0
+        self.__deleted_phones += count
+
+    def __compact_if_needed(self):
+        if self.__deleted > self.__size // 2 or self.__deleted_phones > self.__phones_size // 2:
+            self.__compact()
+
+    def __compact(self):
+        """
+        Drops the rows of the deleted contacts and their phones, renumbering the rows.
+        """
+        kept = np.nonzero(self.__column("alive"))[0]
+        new_rows = np.full(self.__size, -1, dtype=np.int64)
+        new_rows[kept] = np.arange(len(kept))
+        self.__columns = {name: column[:self.__size][kept] for name, column in self.__columns.items()}
+
+        phone_rows = self.__phones["row"][:self.__phones_size]
+        kept_phones = np.nonzero(phone_rows >= 0)[0]
+        self.__phones = {
+            "number": self.__phones["number"][:self.__phones_size][kept_phones],
+            "row": new_rows[phone_rows[kept_phones]],
+        }
+        # the kept phones stay in their order, so the phones of a contact stay together
+        new_phones = np.cumsum(phone_rows >= 0) - 1
+        first, has_phones = self.__columns["first_phone"], self.__columns["phone_count"] > 0
+        first[has_phones] = new_phones[first[has_phones]]
+        first[~has_phones] = 0
+
+        self.__size, self.__phones_size = len(kept), len(kept_phones)
+        self.__deleted, self.__deleted_phones = 0, 0
+        self.__rows = {name: row for row, name in enumerate(self.__columns["name"].tolist())}
+
+    def __restore(self, rows: np.ndarray) -> List[Record]:
+        """
+        Creates the records of the rows, in the order of the rows.
+        """
+        if len(rows) == 0:
+            return []
+
+        numbers = self.__phones["number"]
+        firsts = self.__columns["first_phone"][rows].tolist()
+        counts = self.__columns["phone_count"][rows].tolist()
+        phones = {row: numbers[first:first + count].tolist()
+                  for row, first, count in zip(rows.tolist(), firsts, counts) if count > 0}
+        return self.__records(rows, phones)
+
+    def __iter_restore(self, rows: np.ndarray) -> Iterator[Record]:
+        """
+        Same as __restore, creating the records a chunk at a time.
+        """
+        for start in range(0, len(rows), RESTORE_CHUNK_SIZE):
+            yield from self.__restore(rows[start:start + RESTORE_CHUNK_SIZE])
+
+    def __records(self, rows: np.ndarray, phones: Dict[int, List[int]]) -> List[Record]:
+        columns = self.__columns
+        records = []
+        values = zip(rows.tolist(), *(columns[name][rows].tolist() for name in
+                                      ("name", "lower_name", "email", "lower_email", "address", "lower_address", "birthday")))
+        # the fields are restored from the columns as they are, including the lowercased values
+        with collection_paused():
+            for row, name, lower_name, email, lower_email, address, lower_address, birthday in values:
+                record = Record.__new__(Record)
+                record.name = Name.restore(name, lower_name)
+                record.phones = [Phone.restore(number) for number in phones.get(row, [])]
+                record.email = Email.restore(email, lower_email) if email else None
+                record.address = Address.restore(address, lower_address) if address else None
+                record.birthday = Birthday.restore(birthday) if birthday else None
+                record.book = self
+                records.append(record)
+        return records
+
+    def get_upcoming_birthdays(self, days_prior: int = 7) -> None:
+        """
+        Shows upcoming birthdays (celebration days).
+        Parameters:
+            days_prior (int, optional): The number of days in the future to look for birthdays.
+                Defaults to 7.
+        """
+        view = AddressBookView(self.iter_upcoming_birthdays(days_prior))
+        view.sort_column = Sort(column=ADDRESS_BOOK_FIELDS.BIRTHDAY, order="asc")
+        view.output()
+
+    def iter_upcoming_birthdays(self, days_prior: int = 7) -> Iterator[Record]:
+        """
+        Yields the records whose birthdays are celebrated in the coming days, in the order of the birthdays
+        starting from today.
+        Only the records whose birthday falls into the period are created.
+        """
+        current_date = date.today()
+        celebration_period = current_date + timedelta(days=days_prior)
+        ranges = get_birthday_ranges(current_date, days_prior)
+
+        days = self.__column("birthday_day")
+        mask = np.zeros(self.__size, dtype=np.bool_)
+        for (low_month, low_day), (high_month, high_day) in ranges:
+            mask |= (days >= low_month * 100 + low_day) & (days <= high_month * 100 + high_day)
+        rows = np.nonzero(mask & self.__column("alive"))[0]
+
+        # chronological order starting from today, the period may wrap around the New Year
+        start_month, start_day = ranges[0][0]
+        rows = rows[np.lexsort((days[rows], days[rows] < start_month * 100 + start_day))]
+        return (record for record in self.__iter_restore(rows)
+                if get_celebration_date(record.birthday.value.date(), current_date) <= celebration_period)
+
+    def search_by_date(self, from_date: Date, to_date: Date) -> None:
+        view = AddressBookView(self.iter_by_date(from_date, to_date))
+        view.sort_column = Sort(column=ADDRESS_BOOK_FIELDS.BIRTHDAY, order="asc")
+        view.output()
+
+    def iter_by_date(self, from_date: Date | None, to_date: Date | None) -> Iterator[Record]:
+        """
+        Yields the records born in the period, ordered by the birth date.
+        """
+        birthdays = self.__column("birthday")
+        mask = self.__column("alive") & (birthdays > 0)
+        if from_date is not None:
+            mask &= birthdays >= from_date.value.toordinal()
+        if to_date is not None:
+            mask &= birthdays <= to_date.value.toordinal()
+        rows = np.nonzero(mask)[0]
+        rows = rows[np.argsort(birthdays[rows], kind="stable")]
+        return self.__iter_restore(rows)
+
+    def find_by_phone(self, phone: str) -> List[Record]:
+        """
+        Finds the records by a phone number, e.g. of an incoming call, or its first digits.
+        The numbers starting with the digits are a single range of the integer phones column.
+        """
+        digits = phone_digits(phone)
+        if not digits:
+            return []
+        scale = 10 ** (PHONE_DIGITS - len(digits))
+        low = int(digits) * scale
+        numbers = self.__phones["number"][:self.__phones_size]
+        rows = self.__phones["row"][:self.__phones_size]
+        return self.__restore(np.unique(rows[(numbers >= low) & (numbers < low + scale) & (rows >= 0)]))
+
+    def search_by_phone(self, phone: str) -> None:
+        view = AddressBookView(self.find_by_phone(phone))
+        view.keyword = phone_digits(phone)
+        view.output()
+
+    def search(self, keyword: str, field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL, sort: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.EMPTY, direction_text: str = "asc",
+               limit: int | None = None, offset: int = 0) -> None:
+        if field not in ADDRESS_BOOK_FIELDS or sort not in ADDRESS_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+
+        rows = self.__sort(self.__filter(keyword, field), sort, direction_text)
+        # only the records of the page are created
+        page_rows = rows[offset:] if limit is None else rows[offset:offset + limit + 1]
+        page = paginate(self.__restore(page_rows), offset, limit, len(rows), skipped=True)
+
+        view = AddressBookView(page.items)
+        view.sort_column = Sort(column=sort, order=direction_text)
+        view.keyword = keyword
+        view.page = page
+        view.output()
+
+    def iter_search(self, keyword: str = "", field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL, sort: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.EMPTY, direction_text: str = "asc") -> Iterator[Record]:
+        """
+        Yields the records search shows, filtering and sorting the rows at once and creating the records
+        a chunk at a time as they are consumed.
+        """
+        if field not in ADDRESS_BOOK_FIELDS or sort not in ADDRESS_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+        return self.__iter_restore(self.__sort(self.__filter(keyword, field), sort, direction_text))
+
+    def filter(self, keyword: str, field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL) -> List[Record]:
+        """
+        Returns the records matching the keyword, in the order they were added.
+        Parameters:
+            keyword (str): The substring to look for.
+            field (ADDRESS_BOOK_FIELDS): The field to look in, all fields by default.
+        Returns:
+            List[Record]: The matching records.
+        """
+        return self.__restore(self.__filter(keyword, field))
+
+    def iter_filter(self, keyword: str = "", field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL) -> Iterator[Record]:
+        """
+        Same as filter, creating the records a chunk at a time as they are consumed.
+        """
+        return self.__iter_restore(self.__filter(keyword, field))
+
+    def __filter(self, keyword: str, field: ADDRESS_BOOK_FIELDS) -> np.ndarray:
+        keyword = keyword.lower()
+        match field:
+            case ADDRESS_BOOK_FIELDS.ALL:
+                mask = self.__phone_mask(keyword)
+                for text_field in self.text_columns:
+                    mask |= self.__text_mask(text_field, keyword)
+            case ADDRESS_BOOK_FIELDS.NAME | ADDRESS_BOOK_FIELDS.ADDRESS | ADDRESS_BOOK_FIELDS.EMAIL:
+                mask = self.__text_mask(field, keyword)
+            case ADDRESS_BOOK_FIELDS.PHONE:
+                mask = self.__phone_mask(keyword)
+            case _:
+                mask = np.ones(self.__size, dtype=np.bool_)
+        return np.nonzero(mask & self.__column("alive"))[0]
+
+    def __text_mask(self, field: ADDRESS_BOOK_FIELDS, lower_keyword: str) -> np.ndarray:
+        column = self.text_columns[field]
+        # an empty value is a missing field, which matches no keyword
+        return (np.strings.find(self.__column("lower_" + column), lower_keyword) >= 0) & (self.__column(column) != "")
+
+    def __phone_mask(self, keyword: str) -> np.ndarray:
+        """
+        Marks the rows having a phone containing the keyword.
+        The phones are matched as numbers: every PHONE_DIGITS - len(keyword) + 1 digit window of them
+        is compared with the keyword by integer division and remainder.
+        """
+        mask = np.zeros(self.__size, dtype=np.bool_)
+        if len(keyword) > PHONE_DIGITS or keyword and not (keyword.isascii() and keyword.isdigit()):
+            return mask
+
+        rows = self.__phones["row"][:self.__phones_size]
+        numbers = self.__phones["number"][:self.__phones_size]
+        hits = rows >= 0
+        if keyword:
+            target, modulus = int(keyword), 10 ** len(keyword)
+            matched = np.zeros(self.__phones_size, dtype=np.bool_)
+            for shift in range(PHONE_DIGITS - len(keyword) + 1):
+                matched |= numbers // 10 ** shift % modulus == target
+            hits &= matched
+        mask[rows[hits]] = True
+        return mask
+
+    def __sort(self, rows: np.ndarray, field: ADDRESS_BOOK_FIELDS, direction_text: str) -> np.ndarray:
+        if field not in self.sort_columns:
+            return rows
+
+        column = self.__columns[self.sort_columns[field]]
+        if direction_text == "asc":
+            return rows[np.argsort(column[rows], kind="stable")]
+        # descending, keeping the rows with equal keys in their order as sorted(reverse=True) does
+        rows = rows[::-1]
+        return rows[np.argsort(column[rows], kind="stable")[::-1]]
@@ -1,13 +1,37 @@
-import readline
+import os
 import shlex
+from contextlib import contextmanager
 from functools import wraps
-from typing import Callable, List
-from address_book import AddressBook, ADDRESS_BOOK_FIELDS
+from typing import Callable, List, Tuple
+from address_book import AddressBook
 from field import Birthday, Date
-from notes_book import Notebook, NOTES_BOOK_FIELDS
-from record import Record, Phone, Name
+from record import Record, Name
 from note import Note
+from paging import DEFAULT_PAGE_SIZE, page_offset
+from serialization import loaded
 from views.TextView import ErrorView, WarningView, InfoView
+from views.View import OUTPUT_FORMATS, TABLE_FORMAT, get_output_format, output_format
+# importer and exporter, with the process pool and the file formats, duplicates, the views of single commands
+# and readline are imported by the commands using them. The books are imported by serialization to be loaded anyway
+
+# the errors of the last command run, for its status in batch mode
+last_errors: List[str] = []
+
+# whether the commands ask for the values not given inline, there's no one to ask in batch mode
+prompts_enabled = True
+
+def report_error(message: str):
+    ErrorView(message).output()
+    last_errors.append(message)
+
+@contextmanager
+def prompts_disabled():
+    global prompts_enabled
+    previous, prompts_enabled = prompts_enabled, False
+    try:
+        yield
+    finally:
+        prompts_enabled = previous
 
 def input_error(func: Callable) -> Callable:
     @wraps(func)
@@ -15,20 +39,52 @@ def input_error(func: Callable) -> Callable:
         try:
             return func(*args, **kwargs)
         except (ValueError, IndexError, KeyError) as e:
-            ErrorView(f"[{func.__name__}] {str(e)}\n").output()
+            report_error(f"[{func.__name__}] {str(e)}\n")
     return wrapper
 
+# the parsed limit:all
+NO_LIMIT = 0
+PAGING_PARAMS = ["limit", "offset", "page"]
+# the values of the contacts and notes given inline instead of asked for, e.g. add-contact John email:john@gmail.com,
+# name: and title: are the new name and title of edit-contact and edit-note
+CONTACT_VALUES = ["phones", "email", "birthday", "address"]
+NOTE_VALUES = ["body", "tags"]
+INLINE_VALUES = ["name", "title", *CONTACT_VALUES, *NOTE_VALUES]
+# the commands run without waiting for the books being loaded in background
+NO_DATA_COMMANDS = ["help", "hello", "close", "exit", "quit", "stop"]
+# the values of field: and sort:
+CONTACT_FIELDS = ["Name", "Phone", "Email", "Address", "Birthday"]
+NOTE_FIELDS = ["Title", "Body", "Tags"]
+CONTACT_SORT_FIELDS = ["Name", "Email", "Address", "Birthday"]
+NOTE_SORT_FIELDS = ["Title", "Body"]
+SORT_DIRECTIONS = ["asc", "desc"]
+# the maximum number of the names or titles offered at once by the completion, typing more narrows them down
+COMPLETION_LIMIT = 100
+
+def page_range(limit=None, offset=None, page=None) -> Tuple[int | None, int]:
+    """
+    Returns the limit and the offset of the results to show, the first DEFAULT_PAGE_SIZE of them by default,
+    so a huge book is never printed whole unless it's asked for with limit:all.
+    The rows printed for other programs, as TSV or JSON lines, are not paged by default.
+    """
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE if get_output_format() == TABLE_FORMAT else NO_LIMIT
+    if limit == NO_LIMIT:
+        return None, offset or 0
+    if page is not None:
+        return limit, page_offset(page, limit)
+    return limit, offset or 0
+
 @input_error
-def show_all(books):
+def show_all(books, limit=None, offset=None, page=None):
+    limit, offset = page_range(limit, offset, page)
     for book in books:
-        book.search("")
+        book.search("", limit=limit, offset=offset)
 
 @input_error
-def search(book, query, field=None, sort=None):
-    fields_enum = ADDRESS_BOOK_FIELDS
+def search(book, query, field=None, sort=None, limit=None, offset=None, page=None):
+    fields_enum = book.fields
     direction = "asc"
-    if isinstance(book, Notebook):
-        fields_enum = NOTES_BOOK_FIELDS
     if field is None:
         field = fields_enum('all')
     else:
@@ -38,62 +94,78 @@ def search(book, query, field=None, sort=None):
     else:
         sort, direction = sort.values()
         sort = fields_enum(sort.lower())
-    book.search(query, field, sort, direction)
+    limit, offset = page_range(limit, offset, page)
+    book.search(query, field, sort, direction, limit, offset)
 
 @input_error
-def add_contact(address_book, name):
+def add_contact(address_book, name, phones=None, email=None, birthday=None, address=None):
+    if address_book.find(name):
+        raise KeyError(f"A record with name {name} already exists.")
+    # the contact is added once all its values are valid, so a wrong inline value adds nothing
     record = Record(name)
+    prompt = prompting(phones, email, birthday, address)
+    populate_field(record.phones, record.add_phone, "Enter phone numbers (separated by space): ", True, phones, prompt)
+    populate_field(record.email, record.add_email, "Enter email: ", True, email, prompt)
+    populate_field(record.birthday, record.add_birthday, "Enter birthday (DD.MM.YYYY): ", True, birthday, prompt)
+    populate_field(record.address, record.add_address, "Enter address: ", True, address, prompt)
     address_book.add_record(record)
-    populate_field(record.phones, record.add_phone, "Enter phone numbers (separated by space): ", allow_skip=True)
-    populate_field(record.email, record.add_email, "Enter email: ", allow_skip=True)
-    populate_field(record.birthday, record.add_birthday, "Enter birthday (DD.MM.YYYY): ", allow_skip=True)
-    populate_field(record.address, record.add_address, "Enter address: ", allow_skip=True)
     return f"Added {record}"
 
 @input_error
-def add_note(notes_book, title):
+def add_note(notes_book, title, body=None, tags=None):
     note = Note(title)
-    note.body = input("Enter body: ")
-    note.tags = input("Enter tags separated by comma: ").split(",")
+    prompt = prompting(body, tags)
+    note.body = ask("Enter body: ", body, prompt) or ""
+    note.tags = (ask("Enter tags separated by comma: ", tags, prompt) or "").split(",")
     notes_book.add_note(note)
     return f"Added {note}"
 
+def contact_not_found(address_book, name) -> ValueError:
+    similar_names = address_book.find_similar(name)
+    if similar_names:
+        return ValueError(f"Contact with name {name} does not exist. Did you mean: {', '.join(similar_names)}?")
+    return ValueError(f"Contact with name {name} does not exist.")
+
 @input_error
-def edit_contact(address_book, name, field=None):
+def edit_contact(address_book, name, field=None, new_name=None, phones=None, email=None, birthday=None, address=None):
     record = address_book.find(name)
     if not record:
-        raise ValueError(f"Contact with name {name} does not exist.")
+        raise contact_not_found(address_book, name)
 
-    InfoView(f"Editing contact: {record.name.value}").output()
+    prompt = prompting(new_name, phones, email, birthday, address)
+    if prompt:
+        InfoView(f"Editing contact: {record.name.value}").output()
     if field == None or field == "Name":
-        populate_field(record.name, record.edit_name, "Enter new name (or 'n' to skip): ", allow_skip=True)
+        populate_field(record.name, record.edit_name, "Enter new name (or 'n' to skip): ", True, new_name, prompt)
     if field == None or field == "Phone":
-        replace_phones_on_a_contact(record, allow_skip=True)
+        replace_phones_on_a_contact(record, True, phones, prompt)
     if field == None or field == "Email":
-        populate_field(record.email, record.add_email, "Enter new email (or 'n' to skip): ", allow_skip=True)
+        populate_field(record.email, record.add_email, "Enter new email (or 'n' to skip): ", True, email, prompt)
     if field == None or field == "Birthday":
-        populate_field(record.birthday, record.add_birthday, "Enter new birthday (DD.MM.YYYY) (or 'n' to skip): ", allow_skip=True)
+        populate_field(record.birthday, record.add_birthday, "Enter new birthday (DD.MM.YYYY) (or 'n' to skip): ", True, birthday, prompt)
     if field == None or field == "Address":
-        populate_field(record.address, record.add_address, "Enter new address (or 'n' to skip): ", allow_skip=True)
+        populate_field(record.address, record.add_address, "Enter new address (or 'n' to skip): ", True, address, prompt)
 
     return f"Contact {record.name.value} updated"
 
 @input_error
-def edit_note(notes_book, title, field=None):
+def edit_note(notes_book, title, field=None, new_title=None, body=None, tags=None):
     note = notes_book.get_note_by_title(title)
     if note is None:
-        current_notes_list = "\n".join([str(note) for note in notes_book.get_notes()])
-        return f"Can't find a note with title {title}. Current notes: \n{current_notes_list}"
+        raise ValueError(f"Note with title {title} does not exist.")
 
     # Populate a fresh Note with values to update the existing one
     new_note = Note()
+    prompt = prompting(new_title, body, tags)
     if field == None or field == "Title":
-        new_note.title = input(f"Enter new title (current: {note.title}): ")
+        new_note.title = ask(f"Enter new title (current: {note.title}): ", new_title, prompt) or ""
     if field == None or field == "Body":
-        new_note.body = input(f"Enter new body (current: {note.body}): ")
+        new_note.body = ask(f"Enter new body (current: {note.body}): ", body, prompt) or ""
     current_tags = ",".join(note.tags)
     if field == None or field == "Tags":
-        new_note.tags = input(f"Enter new tags (current: {current_tags}): ").split(",")
+        new_tags = ask(f"Enter new tags (current: {current_tags}): ", tags, prompt)
+        if new_tags is not None:
+            new_note.tags = new_tags.split(",")
 
     notes_book.update_note(note, new_note)
     return f"Edited note {note}"
@@ -101,7 +173,7 @@ def edit_note(notes_book, title, field=None):
 @input_error
 def delete_contact(address_book, name):
     if not address_book.find(name):
-        raise ValueError(f"Contact with name {name} does not exist.")
+        raise contact_not_found(address_book, name)
     address_book.delete(name)
     return f"Contact with name {name} deleted"
 
@@ -112,6 +184,82 @@ def delete_note(notes_book, title):
     notes_book.remove_note(title)
     return f"Removed note with title {title}"
 
+@input_error
+def show_tags(notes_book):
+    from views.TagsView import TagsView
+    TagsView(notes_book.get_tag_counts()).output()
+
+def import_file(import_func, book, path) -> str:
+    path = os.path.expanduser(path)
+    try:
+        result = import_func(book, path)
+    except OSError as e:
+        raise ValueError(f"Can't read {path}: {e.strerror}")
+
+    message = f"Imported {result.imported}, rejected {result.rejected}"
+    if result.rejected_path is not None:
+        message += f", see the rejected rows in {result.rejected_path}"
+    return message
+
+@input_error
+def import_contacts(address_book, path):
+    import importer
+    return import_file(importer.import_contacts, address_book, path)
+
+@input_error
+def import_notes(notes_book, path):
+    import importer
+    return import_file(importer.import_notes, notes_book, path)
+
+def export_file(export_func, book, path, field=None, keyword=None, sort=None) -> str:
+    path = os.path.expanduser(path)
+    if field is not None:
+        field = book.fields(field.lower())
+    direction = "asc"
+    if sort is not None:
+        sort, direction = sort.values()
+        sort = book.fields(sort.lower())
+    try:
+        count = export_func(book, path, keyword=keyword or "", field=field, sort=sort, direction_text=direction)
+    except OSError as e:
+        raise ValueError(f"Can't write {path}: {e.strerror}")
+    return f"Exported {count} to {path}"
+
+@input_error
+def export_contacts(address_book, path, field=None, keyword=None, sort=None):
+    import exporter
+    return export_file(exporter.export_contacts, address_book, path, field, keyword, sort)
+
+@input_error
+def export_notes(notes_book, path, field=None, keyword=None, sort=None):
+    import exporter
+    return export_file(exporter.export_notes, notes_book, path, field, keyword, sort)
+
+@input_error
+def show_cache_stats(address_book, notes_book):
+    from views.CacheStatsView import CacheStatsView
+    # the databases and the columnar storage answer the searches without a cache
+    books = [("contacts", address_book), ("notes", notes_book)]
+    CacheStatsView([(name, book.cache_stats()) for name, book in books if hasattr(book, "cache_stats")]).output()
+
+@input_error
+def find_duplicates(address_book):
+    import duplicates
+    from views.DuplicatesView import DuplicatesView
+    groups = duplicates.find_duplicates(address_book)
+    DuplicatesView([(group, [address_book.find(name) for name in group.names]) for group in groups]).output()
+
+@input_error
+def merge_duplicates(address_book):
+    import duplicates
+    groups = duplicates.find_duplicates(address_book)
+    merged = duplicates.merge_duplicates(address_book, groups)
+    return f"Merged {merged} duplicates into {len(groups)} contacts"
+
+@input_error
+def caller_id(address_book, phone):
+    address_book.search_by_phone(phone)
+
 def show_birthdays(address_book, days=7):
     try:
         days = int(days)
@@ -124,25 +272,71 @@ def stop_bot():
     exit(0)
 
 def print_help():
-    InfoView("""
-"all" - prints all Contacts and Notes
-"all-contacts" - prints all Contacts
-"all-notes" - prints all Notes
-"search-contacts <query string> [field:<FieldName>] [sort:<FieldName>[:direction]]" - performs search in Contacts
-"search-notes <query string> [field:FieldName] [sort:FieldName[:direction]]" - performs search in Notes
+    InfoView(f"""
+"all [limit:N] [page:N]" - prints all Contacts and Notes, a page at a time
+"all-contacts [limit:N] [page:N]" - prints all Contacts
+"all-notes [limit:N] [page:N]" - prints all Notes
+"search-contacts <query string> [field:<FieldName>] [sort:<FieldName>[:direction]] [limit:N] [page:N|offset:N]" - performs search in Contacts
+"search-notes <query string> [field:FieldName] [sort:FieldName[:direction]] [limit:N] [page:N|offset:N]" - performs search in Notes
+   The results are shown {DEFAULT_PAGE_SIZE} at a time, page:2 shows the next ones, limit:all shows all of them
+"search-notes tags:<tag>[+<tag>][|<tag>] [-<tag>]" - finds Notes by exact tags, e.g. "tags:work+urgent|home -archived"
+"search-notes rank:<words>" - shows the Notes best matching the words in their titles and bodies, most relevant first
+"show-tags" - lists all tags with the number of Notes having them
 "add-contact <Name>" - creates new Contact initialized with Name field
 "add-note <Title>" - creates new Note initialized with Title field
 "edit-contact <Name> [field:FieldName]" - searches for Contact by Name and starts fields edit procedure
 "edit-note <Title> [field:FieldName]" - searches for Note by Title and starts fields edit procedure
+   The values may be given inline instead of asked for: phones:"<phone> <phone>" email: birthday: address: of Contacts,
+   body: tags:<tag>,<tag> of Notes, name: and title: for the new Name and Title, e.g. add-contact John email:john@gmail.com
 "delete-contact <Name>" - deletes Contact found by Name
 "delete-note <Title>" - deletes Note found by Title
+"import-contacts <file>" - imports Contacts from a .csv, .jsonl or .vcf file, the invalid rows are written to <file>.rejected.jsonl
+"import-notes <file>" - imports Notes from a .csv or .jsonl file with title, body and tags columns
+"cache-stats" - shows the hits, misses and evictions of the cache of the search results
+"find-duplicates" - shows the groups of Contacts sharing a phone, an email or the name words in any order, which are likely the same person
+"merge-duplicates" - merges every group of duplicates into its first Contact, adding the phones, email, birthday and address of the others
+"caller-id <phone>" - shows Contacts having the phone number in any format, e.g. +38 (050) 123-45-67, or starting with its digits
+"export-contacts <file> [field:FieldName] [query:keyword] [sort:FieldName[:direction]]" - exports Contacts, or the ones matching the keyword, to a .csv or .jsonl file, gzipped if the file ends with .gz
+"export-notes <file> [field:FieldName] [query:keyword] [sort:FieldName[:direction]]" - exports Notes the same way
 "show-birthdays <days>" - shows Contacts whose Birthdays are happening in the closest "days" in the future
+   The commands showing a table take output:tsv or output:jsonl to print plain TSV or JSON lines instead, for other programs
 "close", "exit", "quit", "stop", "Ctrl+C", "Ctrl+D" - saves current Contacts/Notes and stops the Bot
 "hello" - prints greeting message
 "help" - prints this message
+   Tab completes the commands, the Names of edit-contact and delete-contact, the Titles of edit-note and delete-note,
+   the options of the commands and the fields of field: and sort:
 """).output()
 
-def populate_field(field, func, message, allow_skip=False):
+def prompting(*answers) -> bool:
+    """
+    Returns whether to ask for the values of a command: only if none of them are given inline, e.g. email:john@gmail.com,
+    and not in batch mode.
+    """
+    return prompts_enabled and all(answer is None for answer in answers)
+
+def ask(message, answer=None, prompt=True) -> str | None:
+    """
+    Returns the value given inline, or asks for it, or returns None if it's not given and not asked for.
+    """
+    if answer is not None or not prompt:
+        return answer
+    return input(message)
+
+def set_field(field, func, value):
+    if isinstance(field, list):
+        for substring in value.split():
+            func(substring)
+    else:
+        func(value)
+
+def populate_field(field, func, message, allow_skip=False, answer=None, prompt=True):
+    if answer is not None:
+        # a wrong inline value fails the command, there's no one to ask for another one
+        set_field(field, func, answer)
+        return
+    if not prompt:
+        return
+
     while True:
         input_raw = input(message)
         user_input = input_raw.strip()
@@ -150,44 +344,44 @@ def populate_field(field, func, message, allow_skip=False):
             return
 
         try:
-            if isinstance(field, list):
-                input_strings = input_raw.split()
-                for substring in input_strings:
-                    func(substring)
-                break
-            else:
-                func(input_raw)
-                break
+            set_field(field, func, input_raw)
+            break
         except ValueError as e:
             ErrorView(str(e)).output()
 
-def replace_phones_on_a_contact(record, allow_skip=False):
-    existing_phones = record.phones.copy()
+def replace_phones_on_a_contact(record, allow_skip=False, answer=None, prompt=True):
     new_phones = []
-    populate_field(record.phones, lambda phone: new_phones.append(phone), "Enter new phone numbers (separated by space) (or 'n' to skip): ", allow_skip)
+    populate_field(record.phones, lambda phone: new_phones.append(phone), "Enter new phone numbers (separated by space) (or 'n' to skip): ", allow_skip, answer, prompt)
 
     if new_phones:
-        record.phones = [Phone(phone) for phone in new_phones]
-    elif not new_phones and record.phones:
-        record.phones = existing_phones
+        record.replace_phones(new_phones)
 
 #
 # Parsing and running
 #
 
 command_signatures = {
-    "all": [[], []],
-    "all-contacts": [[], []],
-    "all-notes": [[], []],
-    "search-contacts": [["query"], ["field", "sort"]],
-    "search-notes": [["query"], ["field", "sort"]],
-    "add-contact": [["Name"], []],
-    "add-note": [["Title"], []],
-    "edit-contact": [["Name"], ["field"]],
-    "edit-note": [["Title"], ["field"]],
+    "all": [[], [*PAGING_PARAMS, "output"]],
+    "all-contacts": [[], [*PAGING_PARAMS, "output"]],
+    "all-notes": [[], [*PAGING_PARAMS, "output"]],
+    "search-contacts": [["query"], ["field", "sort", *PAGING_PARAMS, "output"]],
+    "search-notes": [["query"], ["field", "sort", *PAGING_PARAMS, "output"]],
+    "add-contact": [["Name"], CONTACT_VALUES],
+    "add-note": [["Title"], NOTE_VALUES],
+    "edit-contact": [["Name"], ["field", "name", *CONTACT_VALUES]],
+    "edit-note": [["Title"], ["field", "title", *NOTE_VALUES]],
     "delete-contact": [["Name"], []],
     "delete-note": [["Title"], []],
-    "show-birthdays": [["days"], []],
+    "import-contacts": [["path"], []],
+    "import-notes": [["path"], []],
+    "export-contacts": [["path"], ["field", "keyword", "sort"]],
+    "caller-id": [["phone"], ["output"]],
+    "find-duplicates": [[], ["output"]],
+    "cache-stats": [[], ["output"]],
+    "merge-duplicates": [[], []],
+    "export-notes": [["path"], ["field", "keyword", "sort"]],
+    "show-birthdays": [["days"], ["output"]],
+    "show-tags": [[], ["output"]],
     "close": [[], []],
     "exit": [[], []],
     "quit": [[], []],
@@ -197,42 +391,141 @@ command_signatures = {
 }
 
 class CommandsCompleter(object):
-    def __init__(self, options):
+    """
+    Completes the command names, and then the arguments of the commands: the contact names of edit-contact
+    and delete-contact, the note titles of edit-note and delete-note, the options of the commands,
+    and the fields of field: and sort:.
+    The names and titles are looked up by their prefix in the books, so it doesn't take longer with more of them.
+    """
+    # the commands whose first argument is a contact name or a note title
+    name_commands = ["edit-contact", "delete-contact"]
+    title_commands = ["edit-note", "delete-note"]
+    # the commands whose field: and sort: are the fields of the notes, the others are of the contacts
+    notes_commands = ["all-notes", "search-notes", "edit-note", "export-notes"]
+
+    def __init__(self, options, address_book=None, notes_book=None):
         self.options = sorted(options)
+        self.address_book = address_book
+        self.notes_book = notes_book
         return
 
     def complete(self, text, state):
-        response = None
+        import readline
         if state == 0:
-            if text:
-                self.matches = [s for s in self.options if s and s.startswith(text)]
-            else:
-                self.matches = self.options[:]
+            self.matches = self.get_matches(text, readline.get_line_buffer()[:readline.get_endidx()])
 
         try:
-            if readline.get_begidx() > 0:
-                response = None
-            else:
-                response = self.matches[state]
+            response = self.matches[state]
         except IndexError:
             response = None
 
         return response
 
-def init_autocomplete():
-    readline.set_completer(CommandsCompleter([f"{cmd} " for cmd in command_signatures.keys()]).complete)
+    def get_matches(self, text: str, line: str) -> List[str]:
+        """
+        Returns the completions of the text, the last word of the line typed so far.
+        Parameters:
+            text (str): The word being completed, the completions replace it.
+            line (str): The line up to the cursor.
+        Returns:
+            List[str]: The completions.
+        """
+        if not line[:len(line) - len(text)].strip():
+            return [s for s in self.options if s and s.startswith(text)]
+
+        parsed = split_typed(line)
+        if parsed is None:
+            return []
+        (command, *args), quote = parsed
+        command = command.lower()
+        if command not in command_signatures:
+            return []
+        argument = args[-1]
+
+        if len(args) == 1 and command in self.name_commands:
+            book = loaded(self.address_book, wait=False)
+            values = book.names_starting_with(argument, COMPLETION_LIMIT) if book is not None else []
+        elif len(args) == 1 and command in self.title_commands:
+            book = loaded(self.notes_book, wait=False)
+            values = book.titles_starting_with(argument, COMPLETION_LIMIT) if book is not None else []
+        elif argument.startswith("field:"):
+            fields = NOTE_FIELDS if command in self.notes_commands else CONTACT_FIELDS
+            values = [f"field:{field}" for field in fields]
+        elif argument.startswith("sort:"):
+            fields = NOTE_SORT_FIELDS if command in self.notes_commands else CONTACT_SORT_FIELDS
+            if argument.count(":") > 1:
+                values = [f"sort:{field}:{direction}" for field in fields for direction in SORT_DIRECTIONS]
+            else:
+                values = [f"sort:{field}" for field in fields]
+        else:
+            # keyword is given as query:
+            params = ["query" if param == "keyword" else param for param in command_signatures[command][1]]
+            return [completion(text, argument, f"{param}:", quote, end="") for param in params
+                    if param.startswith(argument.lower())]
+
+        values = [value for value in values if value and value.lower().startswith(argument.lower())]
+        if quote is None and any(shlex.quote(value) != value for value in values):
+            # all of them are quoted then, for readline to insert their common start
+            quote = "'" if any('"' in value for value in values) else '"'
+            return [f"{quote}{value}{quote} " for value in values]
+        return [completion(text, argument, value, quote) for value in values]
+
+def split_typed(line: str) -> Tuple[List[str], str | None] | None:
+    """
+    Splits the line typed so far to the words, the way parse_command does, the last word may be quoted but not closed yet.
+    Parameters:
+        line (str): The line up to the cursor.
+    Returns:
+        tuple | None: The words, with an empty last one if the line ends with a space,
+            and the quote of the last word if it isn't closed, or None if the line can't be split.
+    """
+    for closing_quote in ("", '"', "'"):
+        try:
+            words = shlex.split(line + closing_quote)
+        except ValueError:
+            continue
+        if not closing_quote and line[-1:].isspace():
+            words.append("")
+        return words, closing_quote or None
+    return None
+
+def completion(text: str, argument: str, value: str, quote: str | None, end: str = " ") -> str:
+    """
+    Returns the text completed to the value of the argument.
+    The text is the part of the argument after its last space, with the opening quote if the quote is in it.
+    Parameters:
+        text (str): The word being completed.
+        argument (str): The argument being completed, unquoted.
+        value (str): The value of the argument, starting with it (case-insensitive).
+        quote (str | None): The opening quote of the argument if it isn't closed, the value is closed with it.
+        end (str, optional): What follows a complete value.
+    """
+    # the characters of the argument in the text, the value starts with them in its own case
+    typed = len(text) - 1 if quote and text.startswith(quote) else len(text)
+    closing_quote = quote if quote and end else ""
+    return text[:len(text) - typed] + value[len(argument) - typed:] + closing_quote + end
+
+def init_autocomplete(address_book=None, notes_book=None):
+    import readline
+    readline.set_completer(CommandsCompleter([f"{cmd} " for cmd in command_signatures.keys()], address_book, notes_book).complete)
     readline.set_completer_delims(" ")
+    # the names and titles are completed whatever case they're typed in
+    readline.parse_and_bind('set completion-ignore-case on')
     readline.parse_and_bind('tab: complete')
 
 def parse_command(user_input: str) -> dict|None:
     try:
-        command, *args = shlex.split(user_input.strip())
-    except ValueError:
+        words = shlex.split(user_input.strip())
+    except ValueError as e:
+        report_error(f"Can't read the command: {e}")
+        return None
+    if not words:
         return None
+    command, *args = words
     command = command.lower()
 
     if not command in command_signatures.keys():
-        ErrorView(f"'{command}' is not a valid command.").output()
+        report_error(f"'{command}' is not a valid command.")
         return None
 
     args = list(filter(lambda a : a, [arg.strip() for arg in args]))
@@ -247,17 +540,17 @@ def parse_command(user_input: str) -> dict|None:
         if arg.startswith("sort:"):
             split_arg = list(filter(lambda a: a, arg.split(":")[1:3]))
             if len(split_arg) < 1:
-                ErrorView(f"'{arg}' is not valid sorting parameter. Correct format is sort:FieldName[:direction]").output()
+                report_error(f"'{arg}' is not valid sorting parameter. Correct format is sort:FieldName[:direction]")
                 return None
             elif len(split_arg) == 1:
                 field = split_arg[0]
                 sort_dir = "asc"
             else:
                 field, sort_dir = split_arg
-            if not field in ["Name", "Email", "Address", "Birthday", "Title", "Body"]:
-                ErrorView(f"Cannot sort by '{field}' field").output()
+            if not field in [*CONTACT_SORT_FIELDS, *NOTE_SORT_FIELDS]:
+                report_error(f"Cannot sort by '{field}' field")
                 return None
-            if not (sort_dir and sort_dir.lower() in ["asc", "desc"]):
+            if not (sort_dir and sort_dir.lower() in SORT_DIRECTIONS):
                 WarningView(f"'{sort_dir}' is not valid sorting direction. Using 'asc' instead").output()
                 sort_dir = "asc"
             optional_args["sort"] = { "field": field, "direction": sort_dir }
@@ -266,22 +559,46 @@ def parse_command(user_input: str) -> dict|None:
             try:
                 field = arg.split(":")[1]
             except:
-                ErrorView(f"'{arg}' is not valid field parameter. Correct format is field:FieldName").output()
+                report_error(f"'{arg}' is not valid field parameter. Correct format is field:FieldName")
                 return None
-            if not field in ["Name", "Phone", "Email", "Address", "Birthday", "Title", "Body", "Tags"]:
-                ErrorView(f"'{field}' is not valid field").output()
+            if not field in [*CONTACT_FIELDS, *NOTE_FIELDS]:
+                report_error(f"'{field}' is not valid field")
                 return None
             optional_args["field"] = field
             args_to_remove.append(arg)
+        elif arg.startswith("query:") and "keyword" in _optional_params:
+            optional_args["keyword"] = arg.split(":", 1)[1]
+            args_to_remove.append(arg)
+        elif arg.startswith("output:") and "output" in _optional_params:
+            value = arg.split(":", 1)[1]
+            if not value in OUTPUT_FORMATS:
+                report_error(f"'{value}' is not valid output format, use one of: {", ".join(OUTPUT_FORMATS)}")
+                return None
+            optional_args["output"] = value
+            args_to_remove.append(arg)
+        elif arg.split(":")[0] in INLINE_VALUES and arg.split(":")[0] in _optional_params:
+            param, _, value = arg.partition(":")
+            optional_args[param] = value
+            args_to_remove.append(arg)
+        elif arg.split(":")[0] in PAGING_PARAMS and arg.split(":")[0] in _optional_params:
+            param, _, value = arg.partition(":")
+            if param == "limit" and value == "all":
+                optional_args["limit"] = NO_LIMIT
+            elif value.isdecimal() and (int(value) > 0 or param == "offset"):
+                optional_args[param] = int(value)
+            else:
+                report_error(f"'{arg}' is not valid {param} parameter. Correct format is {param}:Number")
+                return None
+            args_to_remove.append(arg)
 
     for arg in args_to_remove:
         required_args.remove(arg)
 
-    if required_args and (set(required_params) & set(["Name", "Title", "query"])):
+    if required_args and (set(required_params) & set(["Name", "Title", "query", "path", "phone"])):
         required_args = [" ".join(required_args)]
 
     if len(required_args) != len(required_params):
-        ErrorView(f"Check required params are present: {", ".join(required_params)}.").output()
+        report_error(f"Check required params are present: {", ".join(required_params)}.")
         return None
 
     return {
@@ -290,19 +607,44 @@ def parse_command(user_input: str) -> dict|None:
     }
 
 def run_command(user_input: str, address_book, notes_book):
+    """
+    Runs a command entered by the user.
+    Parameters:
+        user_input (str): The command with its arguments.
+        address_book: The contacts, or their BackgroundLoad, waited for only by the commands needing them.
+        notes_book: The notes, or their BackgroundLoad.
+    Returns:
+        str | None: The result of the command to print, if any.
+    """
+    last_errors.clear()
+    parsed_command = parse_command(user_input)
+    if not parsed_command:
+        return None
+    if parsed_command["command"] not in NO_DATA_COMMANDS:
+        address_book, notes_book = loaded(address_book), loaded(notes_book)
+
     command_mappings = {
-        "all": { "func": show_all, "args": [[address_book, notes_book]] },
-        "all-contacts": { "func": show_all, "args": [[address_book]] },
-        "all-notes": { "func": show_all, "args": [[notes_book]] },
-        "search-contacts": { "func": search, "args": [address_book, "query", "field", "sort"] },
-        "search-notes": { "func": search, "args": [notes_book, "query", "field", "sort"] },
-        "add-contact": { "func": add_contact, "args": [address_book, "Name"] },
-        "add-note": { "func": add_note, "args": [notes_book, "Title"] },
-        "edit-contact": { "func": edit_contact, "args": [address_book, "Name", "field"] },
-        "edit-note": { "func": edit_note, "args": [notes_book, "Title", "field"] },
+        "all": { "func": show_all, "args": [[address_book, notes_book], *PAGING_PARAMS] },
+        "all-contacts": { "func": show_all, "args": [[address_book], *PAGING_PARAMS] },
+        "all-notes": { "func": show_all, "args": [[notes_book], *PAGING_PARAMS] },
+        "search-contacts": { "func": search, "args": [address_book, "query", "field", "sort", *PAGING_PARAMS] },
+        "search-notes": { "func": search, "args": [notes_book, "query", "field", "sort", *PAGING_PARAMS] },
+        "add-contact": { "func": add_contact, "args": [address_book, "Name", *CONTACT_VALUES] },
+        "add-note": { "func": add_note, "args": [notes_book, "Title", *NOTE_VALUES] },
+        "edit-contact": { "func": edit_contact, "args": [address_book, "Name", "field", "name", *CONTACT_VALUES] },
+        "edit-note": { "func": edit_note, "args": [notes_book, "Title", "field", "title", *NOTE_VALUES] },
         "delete-contact": { "func": delete_contact, "args": [address_book, "Name"] },
         "delete-note": { "func": delete_note, "args": [notes_book, "Title"] },
+        "import-contacts": { "func": import_contacts, "args": [address_book, "path"] },
+        "import-notes": { "func": import_notes, "args": [notes_book, "path"] },
+        "caller-id": { "func": caller_id, "args": [address_book, "phone"] },
+        "find-duplicates": { "func": find_duplicates, "args": [address_book] },
+        "cache-stats": { "func": show_cache_stats, "args": [address_book, notes_book] },
+        "merge-duplicates": { "func": merge_duplicates, "args": [address_book] },
+        "export-contacts": { "func": export_contacts, "args": [address_book, "path", "field", "keyword", "sort"] },
+        "export-notes": { "func": export_notes, "args": [notes_book, "path", "field", "keyword", "sort"] },
         "show-birthdays": { "func": show_birthdays, "args": [address_book, "days"] },
+        "show-tags": { "func": show_tags, "args": [notes_book] },
         "close": { "func": stop_bot, "args": [] },
         "exit": { "func": stop_bot, "args": [] },
         "quit": { "func": stop_bot, "args": [] },
@@ -311,13 +653,14 @@ def run_command(user_input: str, address_book, notes_book):
         "help": { "func": print_help, "args": []}
     }
 
-    parsed_command = parse_command(user_input)
-    if not parsed_command:
-        return None
     mapped_command = command_mappings[parsed_command["command"]]
     if not mapped_command:
         return None
-    func_args = [parsed_command["arguments"].get(str(item), item) for item in mapped_command["args"]]
-    func_args = [None if arg in ["field", "sort"] else arg for arg in func_args]
-
-    return mapped_command["func"](*func_args)
+    # the parameters not given are None, a given value is passed as is, even if it's a parameter name too
+    arguments = parsed_command["arguments"]
+    func_args = [arguments[item] if isinstance(item, str) and item in arguments
+                 else None if item in ["field", "sort", "keyword", *PAGING_PARAMS, *INLINE_VALUES] else item
+                 for item in mapped_command["args"]]
+
+    with output_format(parsed_command["arguments"].get("output")):
+        return mapped_command["func"](*func_args)
@@ -0,0 +1,188 @@
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from field import collection_paused
+from indexes import EditDistance, tokenize
+from record import Record
+
+# the evidence of two contacts being the same person, with its weight
+SAME_PHONE = "same phone"
+SAME_EMAIL = "same email"
+SAME_NAME = "same name"
+SIMILAR_NAME = "similar name"
+EVIDENCE_WEIGHTS = {
+    SAME_PHONE: 0.6,
+    SAME_EMAIL: 0.6,
+    SAME_NAME: 0.5,
+    SIMILAR_NAME: 0.3,
+}
+
+# the maximum edit distance of the lowercased names of similar names
+SIMILAR_NAME_DISTANCE = 2
+
+MIN_SCORE = 0.5
+
+# the contacts of a key shared by more contacts, e.g. the phone of an office, are not compared pairwise,
+# but with this many contacts next to them in the order of their names
+MAX_BLOCK_SIZE = 20
+
+
+class DuplicateGroup(NamedTuple):
+    # the names of the contacts, in the order they were added to the book
+    names: List[str]
+    # the best score of the pairs of the group
+    score: float
+    reasons: List[str]
+
+
+def blocking_keys(record: Record) -> List[Tuple[str, object]]:
+    """
+    Returns the keys the contacts that may be duplicates of each other share.
+    """
+    keys = [(SAME_PHONE, phone.number) for phone in record.phones]
+    if record.email is not None:
+        keys.append((SAME_EMAIL, record.email.lower_value))
+    # the name words in any order and case, e.g. "John Smith" and "smith john"
+    name = record.name.lower_value
+    # a name of letters, digits and spaces only, the usual one, is split without the words pattern
+    words = name.split() if name.replace(" ", "").isalnum() else tokenize(name)
+    name_key = " ".join(sorted(words))
+    if name_key:
+        keys.append((SAME_NAME, name_key))
+    return keys
+
+
+def score(reasons: Iterable[str]) -> float:
+    """
+    Combines the weights of the evidence, as the probability that at least one of them is right.
+    """
+    unlikely = 1.0
+    for reason in reasons:
+        unlikely *= 1 - EVIDENCE_WEIGHTS[reason]
+    return 1 - unlikely
+
+
+def candidate_pairs(records: Iterable[Record]) -> Tuple[List[str], Dict[Tuple[int, int], set]]:
+    """
+    Groups the contacts by their blocking keys in a hash, so only the contacts sharing a key are paired,
+    instead of comparing every contact with every other one.
+    The contacts of a key shared by more than MAX_BLOCK_SIZE contacts are compared within a window sorted by name.
+    Returns:
+        tuple: The names of the contacts, and the reasons of every (i, j) pair of their positions, i < j.
+    """
+    names = []
+    # kind -> key -> the first contact having it, most of the keys have no other
+    first = {kind: {} for kind in EVIDENCE_WEIGHTS}
+    # kind -> key -> all the contacts having it, for the keys shared by several contacts
+    blocks = {kind: {} for kind in EVIDENCE_WEIGHTS}
+    pairs = {}
+    for i, record in enumerate(records):
+        names.append(record.name.value)
+        for kind, key in blocking_keys(record):
+            j = first[kind].setdefault(key, i)
+            if j == i:
+                continue
+            block = blocks[kind].setdefault(key, [j])
+            # a contact may have the same phone twice
+            if block[-1] == i:
+                continue
+            if len(block) < MAX_BLOCK_SIZE:
+                for j in block:
+                    pairs.setdefault((j, i), set()).add(kind)
+            block.append(i)
+    for kind, kind_blocks in blocks.items():
+        for block in kind_blocks.values():
+            if len(block) > MAX_BLOCK_SIZE:
+                pair_sorted_window(names, block, kind, pairs)
+    return names, pairs
+
+
+def pair_sorted_window(names: List[str], block: List[int], kind: str, pairs: Dict[Tuple[int, int], set]):
+    """
+    Pairs every contact of a large block with the next MAX_BLOCK_SIZE - 1 contacts of the block sorted by name,
+    as the duplicates mostly have the same or similar names.
+    """
+    block = sorted(block, key=lambda i: names[i].lower())
+    for position, i in enumerate(block):
+        for j in block[position + 1:position + MAX_BLOCK_SIZE]:
+            pairs.setdefault((min(i, j), max(i, j)), set()).add(kind)
+
+
+def find_duplicates(address_book, min_score: float = MIN_SCORE) -> List[DuplicateGroup]:
+    """
+    Finds the groups of contacts that are likely the same person, sharing a phone, an email or the name words.
+    Costs a single pass over the contacts and the comparison of the contacts sharing a key only.
+    Parameters:
+        address_book (AddressBook | SqliteAddressBook | ColumnarAddressBook): The book to look in.
+        min_score (float, optional): The minimum score of a pair of duplicates, from 0 to 1.
+    Returns:
+        List[DuplicateGroup]: The groups, best scored first.
+    """
+    # nothing created here is collectable garbage, while every collection triggered
+    # by the allocations would walk all the contacts of the book again
+    with collection_paused():
+        return group_duplicates(*candidate_pairs(address_book.iter_filter()), min_score)
+
+
+def group_duplicates(names: List[str], pairs: Dict[Tuple[int, int], set], min_score: float) -> List[DuplicateGroup]:
+    """
+    Scores the candidate pairs and joins the duplicate ones into groups.
+    """
+    # the groups are joined from the duplicate pairs with union-find
+    parents = {}
+
+    def root(i: int) -> int:
+        path = []
+        while parents.get(i, i) != i:
+            path.append(i)
+            i = parents[i]
+        for j in path:
+            parents[j] = i
+        return i
+
+    pair_scores = []
+    for (i, j), reasons in pairs.items():
+        if SAME_NAME not in reasons:
+            distance = EditDistance(names[i].lower()).to(names[j].lower())
+            if distance <= SIMILAR_NAME_DISTANCE:
+                reasons.add(SIMILAR_NAME)
+        pair_score = score(reasons)
+        if pair_score < min_score:
+            continue
+        pair_scores.append((i, j, pair_score, reasons))
+        i_root, j_root = root(i), root(j)
+        if i_root != j_root:
+            parents[max(i_root, j_root)] = min(i_root, j_root)
+
+    groups: Dict[int, Tuple[set, float, set]] = {}
+    for i, j, pair_score, reasons in pair_scores:
+        members, best, group_reasons = groups.get(root(i), (set(), 0.0, set()))
+        groups[root(i)] = (members | {i, j}, max(best, pair_score), group_reasons | reasons)
+
+    result = [DuplicateGroup([names[i] for i in sorted(members)], best, sorted(reasons))
+              for members, best, reasons in groups.values()]
+    return sorted(result, key=lambda group: (-group.score, group.names[0]))
+
+
+def merge_duplicates(address_book, groups: Iterable[DuplicateGroup]) -> int:
+    """
+    Merges every group into its first contact, adding the phones of the others
+    and the email, birthday and address the first one misses, and deletes the others.
+    Parameters:
+        address_book (AddressBook | SqliteAddressBook | ColumnarAddressBook): The book of the groups.
+        groups (Iterable[DuplicateGroup]): The groups, as find_duplicates returns them.
+    Returns:
+        int: The number of the deleted contacts.
+    """
+    merged = 0
+    for group in groups:
+        kept = address_book.find(group.names[0])
+        if kept is None:
+            continue
+        for name in group.names[1:]:
+            other = address_book.find(name)
+            if other is None:
+                continue
+            address_book.delete(name)
+            kept.merge(other)
+            merged += 1
+    return merged
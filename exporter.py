@@ -0,0 +1,147 @@
+import csv
+import gzip
+import io
+import json
+import os
+from itertools import batched
+from typing import Iterator, List
+
+from note import Note
+from record import Record
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+GZIP_EXTENSION = ".gz"
+
+# the rows are formatted and written this many at a time, into a buffer of BUFFER_SIZE bytes
+CHUNK_SIZE = 1000
+BUFFER_SIZE = 1024 * 1024
+
+CONTACT_COLUMNS = ["name", "phones", "email", "birthday", "address"]
+NOTE_COLUMNS = ["title", "body", "tags"]
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path.removesuffix(GZIP_EXTENSION))[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown format of {path}, use one of: {', '.join(FORMATS)}, optionally with {GZIP_EXTENSION}.")
+    return FORMATS[extension]
+
+
+#
+# Rows, in the form the importer reads them back
+#
+
+def contact_row(record: Record) -> dict:
+    return {
+        "name": record.name.value,
+        "phones": [phone.value for phone in record.phones],
+        "email": record.email.value if record.email else "",
+        "birthday": record.birthday.value.strftime("%Y-%m-%d") if record.birthday else "",
+        "address": record.address.value if record.address else "",
+    }
+
+
+def note_row(note: Note) -> dict:
+    return {
+        "title": note.title,
+        "body": note.body,
+        "tags": list(note.tags),
+    }
+
+
+#
+# Writing
+#
+
+def open_output(path: str, compress: bool) -> io.TextIOWrapper:
+    """
+    Opens a text file for writing through a large buffer, gzip compressed if compress is set.
+    """
+    raw = gzip.open(path, "wb") if compress else io.FileIO(path, "w")
+    # newline="" keeps the csv line endings as they are written
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=BUFFER_SIZE), encoding="utf-8", newline="")
+
+
+def write_csv(f: io.TextIOBase, rows: Iterator[dict], columns: List[str]) -> int:
+    writer = csv.DictWriter(f, fieldnames=columns)
+    writer.writeheader()
+    count = 0
+    for chunk in batched(rows, CHUNK_SIZE):
+        # a list in a csv cell is joined with the separator the importer splits it by
+        writer.writerows({key: (" " if key == "phones" else ",").join(value) if isinstance(value, list) else value
+                          for key, value in row.items()} for row in chunk)
+        count += len(chunk)
+    return count
+
+
+def write_jsonl(f: io.TextIOBase, rows: Iterator[dict], _columns: List[str]) -> int:
+    count = 0
+    for chunk in batched(rows, CHUNK_SIZE):
+        f.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk))
+        count += len(chunk)
+    return count
+
+
+WRITERS = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+}
+
+
+def export_rows(rows: Iterator[dict], columns: List[str], path: str, file_format: str | None, compress: bool | None) -> int:
+    """
+    Writes the rows to a file as they come, so only a chunk of them is held in memory at a time.
+    Parameters:
+        rows (Iterator): The rows to write.
+        columns (list): The columns of the rows.
+        path (str): The file to write.
+        file_format (str, optional): One of "csv" or "jsonl", detected by the file extension by default.
+        compress (bool, optional): Whether to gzip the file, by default if the path ends with .gz.
+    Returns:
+        int: The number of the written rows.
+    """
+    write = WRITERS[file_format or detect_format(path)]
+    if compress is None:
+        compress = path.endswith(GZIP_EXTENSION)
+    with open_output(path, compress) as f:
+        return write(f, rows, columns)
+
+
+def export_contacts(address_book, path: str, file_format: str | None = None, keyword: str = "", field=None,
+                    compress: bool | None = None, sort=None, direction_text: str = "asc") -> int:
+    """
+    Exports contacts to a CSV or JSON lines file, the one import_contacts reads back.
+    The contacts are read from the book one by one, the book is not copied into memory.
+    Parameters:
+        address_book (AddressBook | SqliteAddressBook | ColumnarAddressBook): The book to export.
+        path (str): The file to write.
+        file_format (str, optional): One of "csv" or "jsonl", detected by the file extension by default.
+        keyword (str, optional): Exports only the contacts matching the keyword, the same way search does.
+        field (ADDRESS_BOOK_FIELDS, optional): The field to match the keyword in, all of them by default.
+        compress (bool, optional): Whether to gzip the file, by default if the path ends with .gz.
+        sort (ADDRESS_BOOK_FIELDS, optional): The field to sort by, the order the contacts were added in by default.
+        direction_text (str, optional): "asc" or "desc".
+    Returns:
+        int: The number of the exported contacts.
+    """
+    fields = address_book.fields
+    records = address_book.iter_search(keyword, field or fields.ALL, sort or fields.EMPTY, direction_text)
+    return export_rows(map(contact_row, records), CONTACT_COLUMNS, path, file_format, compress)
+
+
+def export_notes(notes_book, path: str, file_format: str | None = None, keyword: str = "", field=None,
+                 compress: bool | None = None, sort=None, direction_text: str = "asc") -> int:
+    """
+    Exports notes to a CSV or JSON lines file, the one import_notes reads back.
+    Parameters: the same as of export_contacts, the keyword may also be a tags: or rank: query.
+    Returns:
+        int: The number of the exported notes.
+    """
+    fields = notes_book.fields
+    notes = notes_book.iter_search(keyword, field or fields.ALL, sort or fields.EMPTY, direction_text)
+    return export_rows(map(note_row, notes), NOTE_COLUMNS, path, file_format, compress)
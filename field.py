@@ -1,72 +1,338 @@
+import gc
 import re
+import sys
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterable, List, Tuple
+
+# the pauses of the garbage collector entered and not left yet, by all the threads,
+# the collector is disabled for the whole process, so it's enabled again once the last of them is left
+_pauses_lock = threading.Lock()
+_pauses = 0
+_enabled_before_pauses = False
+
+
+@contextmanager
+def collection_paused():
+    """
+    Pauses the garbage collector while many objects are created at once.
+    The fields and records have no reference cycles to collect, while every collection triggered
+    by their allocations would walk all of the objects created so far again.
+    """
+    global _pauses, _enabled_before_pauses
+    with _pauses_lock:
+        if _pauses == 0:
+            _enabled_before_pauses = gc.isenabled()
+            gc.disable()
+        _pauses += 1
+    try:
+        yield
+    finally:
+        with _pauses_lock:
+            _pauses -= 1
+            if _pauses == 0 and _enabled_before_pauses:
+                gc.enable()
+
 
 class Field:
+    # a field is created for every value of every contact, slots keep it free of a per-instance __dict__
+    __slots__ = ("_value", "lower_value")
+
     def __init__(self, value):
         self.value = value
 
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        # keep the lowercased value for case-insensitive matching, a value that is
+        # lowercase already is not copied
+        lower_value = value.lower() if type(value) is str else None
+        self.lower_value = value if lower_value == value else lower_value
+
+    @classmethod
+    def restore(cls, value, lower_value: str | None = None):
+        """
+        Creates a field from a value in the form the field keeps it, skipping the validation
+        the value has passed when it was stored.
+        Parameters:
+            value: The value.
+            lower_value (str, optional): The lowercased value, if it's stored too.
+        Returns:
+            Field: The restored field.
+        """
+        field = cls.__new__(cls)
+        field._value = value
+        if lower_value is None and type(value) is str:
+            lower_value = value.lower()
+        field.lower_value = lower_value
+        return field
+
     def __str__(self):
         return str(self.value)
 
+    def __getstate__(self):
+        # only the value is pickled, in the same form the fields always had it
+        return {"value": self.value}
+
+    def __setstate__(self, state):
+        self.value = state["value"]
+
     def match(self, value, strict=False):
         if strict:
             return self.value == value
 
-        return type(self.value) is str and self.value.lower().find(value.lower()) >= 0
+        return self.match_lower(value.lower())
+
+    def match_lower(self, lower_value: str) -> bool:
+        """
+        Same as match, for a keyword that is lowercased already.
+        """
+        return self.lower_value is not None and lower_value in self.lower_value
 
 
 class Name(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value)
 
 
+PHONE_PATTERN = re.compile(r"^(\(?\d{3}\)?[-]?\d{2,3}[-]?\d{2}[-]?\d{2,4}|\d{10})$")
+NON_DIGITS = re.compile(r"\D")
+PHONE_DIGITS = 10
+
+
+def phone_number(value: str) -> int | None:
+    """
+    Returns the integer form of a phone number, or None if it's not a valid phone number.
+    """
+    try:
+        return int(Phone.validated_phone(value))
+    except ValueError:
+        return None
+
+
+def phone_digits(value: str) -> str:
+    """
+    Returns the digits of a phone number, as an incoming call shows it, or a part of it,
+    without the separators and the country code, e.g. "+38 (050) 123" -> "050123".
+    """
+    digits = NON_DIGITS.sub("", value)
+    if not digits.isascii():
+        return ""
+    return digits[-PHONE_DIGITS:] if len(digits) > PHONE_DIGITS else digits
+
+
 class Phone(Field):
+    # the 10 digits are stored as a single integer, the leading zeros are restored on read
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(self.validated_phone(value))
 
-    def validated_phone(self, phone: str) -> str:
-        pattern = r"^(\(?\d{3}\)?[-]?\d{2,3}[-]?\d{2}[-]?\d{2,4}|\d{10})$"
-        if not re.match(pattern, phone):
+    @property
+    def value(self) -> str:
+        return f"{self._value:010d}"
+
+    @value.setter
+    def value(self, value: str):
+        self._value = int(value)
+
+    @property
+    def lower_value(self) -> str:
+        return self.value
+
+    @property
+    def number(self) -> int:
+        return self._value
+
+    @classmethod
+    def restore(cls, value: int, lower_value: str | None = None):
+        phone = cls.__new__(cls)
+        phone._value = value
+        return phone
+
+    @staticmethod
+    def validated_phone(phone: str) -> str:
+        if not PHONE_PATTERN.match(phone):
             raise ValueError(f"Invalid phone number: {phone}.")
 
-        clean_phone = re.sub(r'\D', '', phone)
+        clean_phone = NON_DIGITS.sub('', phone)
 
-        if len(clean_phone) != 10:
+        if len(clean_phone) != PHONE_DIGITS:
             raise ValueError(f"Invalid phone number: {phone}. It should contain exactly 10 digits.")
 
         return clean_phone
 
+    @classmethod
+    def validate_phones(cls, values: Iterable[str]) -> List[Tuple["Phone | None", str | None]]:
+        """
+        Validates many phone numbers at once.
+        The numbers of exactly 10 ASCII digits, the usual bulk input, are checked and converted
+        with array operations, the others one by one as Phone does.
+        Parameters:
+            values (Iterable): The phone numbers.
+        Returns:
+            list: (phone, None) for every valid value and (None, error) for every invalid one.
+        """
+        # numpy is only needed by the bulk paths
+        import numpy as np
+
+        values = list(values)
+        if not values:
+            return []
+        array = np.array(values, dtype=np.dtypes.StringDType())
+        # a 10 characters decimal string not greater than 9999999999 has ASCII digits only
+        plain = (np.strings.str_len(array) == PHONE_DIGITS) & np.strings.isdecimal(array) & (array <= "9" * PHONE_DIGITS)
+        numbers = np.zeros(len(values), dtype=np.int64)
+        numbers[plain] = array[plain].astype(np.int64)
+
+        results = []
+        with collection_paused():
+            for value, is_plain, number in zip(values, plain.tolist(), numbers.tolist()):
+                if is_plain:
+                    results.append((cls.restore(number), None))
+                    continue
+                try:
+                    results.append((cls(value), None))
+                except ValueError as e:
+                    results.append((None, str(e)))
+        return results
+
+
+# the parts of the accepted date formats, the same strptime matches for %d, %m and %Y
+DAY = r"(3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])"
+MONTH = r"(1[0-2]|0[1-9]|[1-9])"
+YEAR = r"(\d\d\d\d)"
+
+# the accepted formats, "%d.%m.%Y", "%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y" and "%d %m %Y", by their separators,
+# with the order of the year, month and day groups
+DATE_SHAPES = {
+    ".": [(re.compile(fr"{DAY}\.{MONTH}\.{YEAR}"), (2, 1, 0))],
+    "/": [(re.compile(fr"{DAY}/{MONTH}/{YEAR}"), (2, 1, 0))],
+    "-": [(re.compile(fr"{YEAR}-{MONTH}-{DAY}"), (0, 1, 2)), (re.compile(fr"{DAY}-{MONTH}-{YEAR}"), (2, 1, 0))],
+    # like strptime, a space of the format matches any whitespace
+    " ": [(re.compile(fr"{DAY}\s+{MONTH}\s+{YEAR}"), (2, 1, 0))],
+}
+
+DATE_FORMAT_ERROR = "Invalid date format. Try DD.MM.YYYY"
+
+# the oldest birthday accepted, in years
+MAX_AGE = 115
+
+
+def parse_date(value: str) -> datetime | None:
+    """
+    Parses a date in one of the accepted formats, picking the format by the separator,
+    without trying the formats one by one.
+    Parameters:
+        value (str): The date.
+    Returns:
+        datetime | None: The date, or None if it's not in any of the formats or doesn't exist.
+    """
+    # a date of any format contains its separator only, so the first one found decides the format
+    separator = "." if "." in value else "/" if "/" in value else "-" if "-" in value else " "
+    for pattern, (year, month, day) in DATE_SHAPES[separator]:
+        match = pattern.fullmatch(value)
+        if match is not None:
+            parts = match.groups()
+            try:
+                return datetime(int(parts[year]), int(parts[month]), int(parts[day]))
+            except ValueError:
+                return None
+    return None
+
+
 class Date(Field):
+    __slots__ = ()
+
     def __init__(self, value: str):
         super().__init__(self.validate_date(value))
 
     def validate_date(self, value: str) -> datetime:
-        formats = ["%d.%m.%Y", "%d %m %Y","%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"]
-        birth_date = None
-        for date_format in formats:
-            try:
-                birth_date = datetime.strptime(value, date_format)
-                break
-            except ValueError:
-                continue
+        birth_date = parse_date(value)
         if not birth_date:
-            raise ValueError("Invalid date format. Try DD.MM.YYYY")
+            raise ValueError(DATE_FORMAT_ERROR)
 
         return birth_date
 
+    @staticmethod
+    def parse_dates(values: Iterable[str]) -> List[datetime | None]:
+        """
+        Parses many dates at once, each of the repeated values only once.
+        Parameters:
+            values (Iterable): The dates.
+        Returns:
+            list: The dates, None for the ones not in any of the accepted formats.
+        """
+        parsed = {}
+        return [parsed[value] if value in parsed else parsed.setdefault(value, parse_date(value)) for value in values]
+
 
 class Birthday(Date):
+    # a birthday has no time of the day, so only the day ordinal is stored
+    __slots__ = ()
+
     def __init__(self, value: str):
         self.value = self.validate_birthday(value)
 
-    def validate_birthday(self, value: str):
+    @property
+    def value(self) -> datetime:
+        return datetime.fromordinal(self._value)
+
+    @value.setter
+    def value(self, value: datetime):
+        self._value = value.toordinal()
+        self.lower_value = None
+
+    @property
+    def ordinal(self) -> int:
+        return self._value
+
+    def validate_birthday(self, value: str, now: datetime | None = None):
         birth_date = self.validate_date(value)
-        if (datetime.now() - birth_date).days / 365 > 115:
+        return self.checked_birthday(birth_date, now or datetime.now())
+
+    @staticmethod
+    def checked_birthday(birth_date: datetime, now: datetime) -> datetime:
+        if (now - birth_date).days / 365 > MAX_AGE:
             raise ValueError("Year of birth seems to be incorrect. Or you might be not alive already.")
-        if datetime.now() < birth_date:
+        if now < birth_date:
             raise ValueError("Year of birth seems to be incorrect. Or you are not born yet.")
         return birth_date
 
+    @classmethod
+    def validate_birthdays(cls, values: Iterable[str]) -> List[Tuple["Birthday | None", str | None]]:
+        """
+        Validates many birthdays at once, checking each of the repeated values only once.
+        Parameters:
+            values (Iterable): The birthdays, in any of the accepted date formats.
+        Returns:
+            list: (birthday, None) for every valid value and (None, error) for every invalid one.
+        """
+        now = datetime.now()
+        # the day ordinal or the error of every distinct value
+        checked = {}
+        results = []
+        with collection_paused():
+            for value in values:
+                if value not in checked:
+                    try:
+                        birth_date = parse_date(value)
+                        if birth_date is None:
+                            raise ValueError(DATE_FORMAT_ERROR)
+                        checked[value] = (cls.checked_birthday(birth_date, now).toordinal(), None)
+                    except ValueError as e:
+                        checked[value] = (None, str(e))
+                ordinal, error = checked[value]
+                results.append((None if error else cls.restore(ordinal), error))
+        return results
+
     def is_between(self, from_date: Date | None, to_date: Date | None) -> bool:
         res = from_date is None or self.value >= from_date.value
         res &= to_date is None or self.value <= to_date.value
@@ -76,17 +342,34 @@ class Birthday(Date):
         # TODO: let's discuss tomorrow if we're going to search by date
         return False
 
+    def match_lower(self, lower_value: str) -> bool:
+        return False
+
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
 class Email(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(self.validate_email(value))
 
-    def validate_email(self, email: str) -> str:
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_regex, email):
+    @staticmethod
+    def validate_email(email: str) -> str:
+        if not EMAIL_PATTERN.match(email):
             raise ValueError(f"Invalid format of email: {email}.")
         return email
 
 
 class Address(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value)
+
+    @Field.value.setter
+    def value(self, value: str):
+        # many contacts share an address, keep a single copy of it
+        Field.value.fset(self, sys.intern(value))
+        self.lower_value = sys.intern(self.lower_value)
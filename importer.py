@@ -0,0 +1,364 @@
+import csv
+import json
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from itertools import batched, chain, islice
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Tuple
+
+from field import Phone, phone_digits
+from note import Note
+from record import Record
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".vcf": "vcard",
+    ".vcard": "vcard",
+}
+
+BATCH_SIZE = 1000
+
+# key of a row that couldn't be read, with the reason
+ROW_ERROR = "_error"
+
+PHONES_SEPARATOR = re.compile(r"[\s,;]+")
+VCARD_BIRTHDAY = re.compile(r"^(\d{4})-?(\d{2})-?(\d{2})")
+
+
+class ImportResult(NamedTuple):
+    imported: int
+    rejected: int
+    # the file the rejected rows are written to, None if there are none
+    rejected_path: str | None
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown format of {path}, use one of: {', '.join(FORMATS)}.")
+    return FORMATS[extension]
+
+
+#
+# Reading
+#
+
+def read_csv(path: str) -> Iterator[Tuple[int, dict]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, {key.strip().lower(): value for key, value in row.items() if key is not None}
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[int, dict]]:
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = {"line": line.rstrip("\n"), ROW_ERROR: f"Invalid JSON: {e}"}
+            if not isinstance(row, dict):
+                row = {"line": line.rstrip("\n"), ROW_ERROR: "A row should be a JSON object."}
+            yield line_number, {key.lower(): value for key, value in row.items()}
+
+
+def read_vcard(path: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Reads the name, phones, email, birthday and address of the contacts of a vCard file.
+    """
+    row, start = None, 0
+    for line_number, line in unfolded_lines(path):
+        name, _, value = line.partition(":")
+        # the property parameters, like TEL;TYPE=cell, and the groups, like item1.EMAIL, are skipped
+        name = name.split(";")[0].split(".")[-1].upper()
+        match name:
+            case "BEGIN":
+                row, start = {"phones": []}, line_number
+            case "END" if row is not None:
+                yield start, row
+                row = None
+            case "FN" if row is not None:
+                row["name"] = value.strip()
+            case "N" if row is not None and "name" not in row:
+                last, first, *_ = value.split(";") + [""]
+                row["name"] = f"{first} {last}".strip()
+            case "TEL" if row is not None:
+                # the numbers are written in the international form, e.g. +380501112233 or +38 (050) 111-22-33,
+                # the last 10 digits are the number, the other values are kept for the rejection reason
+                phone = value.strip().removeprefix("tel:")
+                row["phones"].append(phone_digits(phone) or phone)
+            case "EMAIL" if row is not None and "email" not in row:
+                row["email"] = value.strip()
+            case "BDAY" if row is not None:
+                birthday = VCARD_BIRTHDAY.match(value.strip())
+                row["birthday"] = "-".join(birthday.groups()) if birthday else value.strip()
+            case "ADR" if row is not None and "address" not in row:
+                row["address"] = ", ".join(part.strip() for part in value.split(";") if part.strip())
+
+
+def unfolded_lines(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Yields the lines of a vCard file joining the folded ones, which continue on the lines starting with a space.
+    """
+    with open(path, encoding="utf-8") as f:
+        current, current_number = None, 0
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if line[:1] in (" ", "\t") and current is not None:
+                current += line[1:]
+                continue
+            if current is not None:
+                yield current_number, current
+            current, current_number = line, line_number
+        if current is not None:
+            yield current_number, current
+
+
+READERS = {
+    "csv": read_csv,
+    "jsonl": read_jsonl,
+    "vcard": read_vcard,
+}
+
+
+def read_rows(path: str, file_format: str | None = None) -> Iterator[Tuple[int, dict]]:
+    """
+    Reads the rows of a file one by one.
+    Parameters:
+        path (str): The file to read.
+        file_format (str, optional): One of "csv", "jsonl" or "vcard", detected by the file extension by default.
+    Returns:
+        Iterator: (line number, row) pairs, a row is a dictionary of lowercased column names to values.
+    """
+    return READERS[file_format or detect_format(path)](path)
+
+
+#
+# Validation, runs in the worker processes
+#
+
+def row_phones(row: dict) -> List[str]:
+    phones = row.get("phones", row.get("phone")) or []
+    if isinstance(phones, str):
+        phones = PHONES_SEPARATOR.split(phones.strip())
+    return [str(phone) for phone in phones if phone]
+
+
+def build_record(row: dict, phones: List[Tuple[Phone | None, str | None]] | None = None) -> Record:
+    """
+    Creates a record from a row.
+    Parameters:
+        row (dict): The row.
+        phones (list, optional): The phones of the row validated already, as Phone.validate_phones returns them.
+    """
+    if ROW_ERROR in row:
+        raise ValueError(row[ROW_ERROR])
+    name = str(row.get("name") or "").strip()
+    if not name:
+        raise ValueError("Name is required.")
+
+    record = Record(name)
+    for phone, error in phones if phones is not None else ((phone, None) for phone in row_phones(row)):
+        if error is not None:
+            raise ValueError(error)
+        record.add_phone(phone)
+    if row.get("email"):
+        record.add_email(str(row["email"]).strip())
+    if row.get("birthday"):
+        record.add_birthday(str(row["birthday"]).strip())
+    if row.get("address"):
+        record.add_address(str(row["address"]).strip())
+    return record
+
+
+def build_note(row: dict) -> Note:
+    if ROW_ERROR in row:
+        raise ValueError(row[ROW_ERROR])
+    note = Note(str(row.get("title") or ""), str(row.get("body") or ""))
+    if len(note.title) == 0 and len(note.body) == 0:
+        raise ValueError("Can't add entirely empty notes")
+    tags = row.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    note.tags = [str(tag) for tag in tags]
+    return note
+
+
+def validate_batch(build: Callable, batch: List[Tuple[int, dict]]) -> List[Tuple[int, dict, object, str | None]]:
+    """
+    Builds the records/notes of a batch of rows.
+    Returns:
+        list: (line number, row, record or note or None, error or None) for every row.
+    """
+    results = []
+    for line_number, row in batch:
+        try:
+            results.append((line_number, row, build(row), None))
+        except (ValueError, TypeError) as e:
+            results.append((line_number, row, None, str(e)))
+    return results
+
+
+def validate_contacts_batch(batch: List[Tuple[int, dict]]) -> List[Tuple[int, dict, object, str | None]]:
+    """
+    Same as validate_batch with build_record, validating the phones of all the rows at once.
+    """
+    rows_phones = []
+    for _line_number, row in batch:
+        try:
+            rows_phones.append(row_phones(row))
+        except TypeError:
+            # build_record reports the invalid phones of the row
+            rows_phones.append(None)
+    validated = iter(Phone.validate_phones(chain.from_iterable(phones for phones in rows_phones if phones)))
+
+    results = []
+    for (line_number, row), phones in zip(batch, rows_phones):
+        try:
+            record_phones = [next(validated) for _phone in phones] if phones is not None else None
+            results.append((line_number, row, build_record(row, record_phones), None))
+        except (ValueError, TypeError) as e:
+            results.append((line_number, row, None, str(e)))
+    return results
+
+
+#
+# The pipeline
+#
+
+def validated_batches(validate: Callable, batches: Iterable[list], executor: Executor | None, in_flight: int) -> Iterator[list]:
+    """
+    Validates the batches in the executor keeping at most in_flight of them queued,
+    so the rows are not read ahead of the insertion. Yields the results in the order of the batches.
+    """
+    if executor is None:
+        for batch in batches:
+            yield validate(batch)
+        return
+
+    pending = deque()
+    for batch in batches:
+        pending.append(executor.submit(validate, batch))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class RejectedRows:
+    """
+    Writes the rejected rows with the reasons to a JSON lines file, created on the first rejected row.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.file = None
+
+    def write(self, line_number: int, row: dict, error: str):
+        if self.file is None:
+            self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write(json.dumps({"line": line_number, "error": error, "row": row}, ensure_ascii=False, default=str) + "\n")
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def import_rows(rows: Iterable[Tuple[int, dict]], validate: Callable, exists: Callable[[str], bool], key: Callable,
+                add_many: Callable, rejected_path: str, batch_size: int = BATCH_SIZE, workers: int | None = None) -> ImportResult:
+    """
+    Validates the rows in batches across worker processes and adds the valid ones batch by batch.
+    Only a few batches are held in memory at a time, whatever the number of the rows.
+    Parameters:
+        rows (Iterable): (line number, row) pairs.
+        validate (Callable): Creates the records/notes of a batch of rows, as validate_batch does.
+            Runs in the worker processes, so it must be a module level function or a partial of one.
+        exists (Callable): Tells if a record/note with the key is in the book already.
+        key (Callable): Returns the key (name/title) of a record/note.
+        add_many (Callable): Adds a list of records/notes to the book.
+        rejected_path (str): The file to write the rejected rows to.
+        batch_size (int, optional): The number of rows validated and added at once.
+        workers (int, optional): The maximum number of worker processes, all the CPUs by default.
+            With 0 or 1, or rows fitting a single batch, the rows are validated in this process.
+    Returns:
+        ImportResult: The numbers of the imported and rejected rows.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    batches = map(list, batched(rows, batch_size))
+    # starting a worker costs more than validating a batch, so a single batch is validated in this process,
+    # and no more workers are started than there are batches
+    first_batches = list(islice(batches, max(workers, 2)))
+    workers = min(workers, len(first_batches))
+    batches = chain(first_batches, batches)
+    # the workers are spawned, forking copies the locks held by the journal and the background load threads
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) if workers > 1 else None
+    rejected = RejectedRows(rejected_path)
+    imported = 0
+    try:
+        for results in validated_batches(validate, batches, executor, in_flight=max(workers, 1) * 2):
+            items, keys = [], set()
+            for line_number, row, item, error in results:
+                if error is None and (key(item) in keys or exists(key(item))):
+                    error = f"{key(item)} already exists."
+                if error is not None:
+                    rejected.write(line_number, row, error)
+                    continue
+                keys.add(key(item))
+                items.append(item)
+            add_many(items)
+            imported += len(items)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        rejected.close()
+
+    return ImportResult(imported, rejected.count, rejected.path if rejected.count else None)
+
+
+def rejected_path_for(path: str) -> str:
+    return path + ".rejected.jsonl"
+
+
+def import_contacts(address_book, path: str, file_format: str | None = None, rejected_path: str | None = None,
+                    batch_size: int = BATCH_SIZE, workers: int | None = None) -> ImportResult:
+    """
+    Imports contacts from a CSV, JSON lines or vCard file.
+    CSV and JSON lines rows have the name, phones (a list, or separated by spaces, commas or semicolons),
+    email, birthday and address columns/keys.
+    Rows with invalid values or names that already exist are written to the rejected rows file.
+    Parameters:
+        address_book (AddressBook | SqliteAddressBook | ColumnarAddressBook): The book to add the contacts to.
+        path (str): The file to import.
+        file_format (str, optional): One of "csv", "jsonl" or "vcard", detected by the file extension by default.
+        rejected_path (str, optional): The file to write the rejected rows to, <path>.rejected.jsonl by default.
+        batch_size (int, optional): The number of rows validated and added at once.
+        workers (int, optional): The number of worker processes, all the CPUs by default.
+    Returns:
+        ImportResult: The numbers of the imported and rejected rows.
+    """
+    return import_rows(read_rows(path, file_format), validate_contacts_batch, address_book.__contains__, lambda record: record.name.value,
+                       address_book.add_records, rejected_path or rejected_path_for(path), batch_size, workers)
+
+
+def import_notes(notes_book, path: str, file_format: str | None = None, rejected_path: str | None = None,
+                 batch_size: int = BATCH_SIZE, workers: int | None = None) -> ImportResult:
+    """
+    Imports notes from a CSV or JSON lines file with the title, body and tags (a list, or separated by commas) columns/keys.
+    Rows without title and body or with titles that already exist are written to the rejected rows file.
+    Parameters: the same as of import_contacts.
+    Returns:
+        ImportResult: The numbers of the imported and rejected rows.
+    """
+    file_format = file_format or detect_format(path)
+    if file_format == "vcard":
+        raise ValueError("Notes can't be imported from vCard files.")
+    return import_rows(read_rows(path, file_format), partial(validate_batch, build_note), lambda title: notes_book.get_note_by_title(title) is not None,
+                       lambda note: note.title, notes_book.add_notes, rejected_path or rejected_path_for(path), batch_size, workers)
@@ -0,0 +1,594 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+from typing import Any, Callable, Collection, Dict, Hashable, Iterable, Iterator, List, Set, Tuple
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    An inverted index from lowercased trigrams to the items whose text contains them.
+    Used to narrow down the candidates of a substring search before the exact check.
+    """
+    def __init__(self):
+        self.postings: Dict[str, Set[Hashable]] = {}
+
+    def add(self, item: Hashable, texts: Iterable[str]):
+        """
+        Indexes an item by its texts.
+        Parameters:
+            item (Hashable): The item to index.
+            texts (Iterable[str]): The texts the item should be found by.
+        """
+        for trigram in self.__texts_trigrams(texts):
+            self.postings.setdefault(trigram, set()).add(item)
+
+    def remove(self, item: Hashable, texts: Iterable[str]):
+        """
+        Removes an item from the index.
+        The trigrams are not stored per item to save memory, so the texts the item
+        was indexed by must be passed again.
+        Parameters:
+            item (Hashable): The item to remove.
+            texts (Iterable[str]): The texts the item was indexed by.
+        """
+        for trigram in self.__texts_trigrams(texts):
+            posting = self.postings.get(trigram)
+            if posting is None:
+                continue
+            posting.discard(item)
+            if not posting:
+                del self.postings[trigram]
+
+    @staticmethod
+    def __texts_trigrams(texts: Iterable[str]) -> Set[str]:
+        result = set()
+        for text in texts:
+            result |= trigrams(text.lower())
+        return result
+
+    def candidates(self, keyword: str) -> Set[Hashable] | None:
+        """
+        Returns the items that may contain the keyword.
+        Parameters:
+            keyword (str): The substring to look for.
+        Returns:
+            set | None: The candidates, or None if the keyword is too short to use the index.
+        """
+        keyword_trigrams = trigrams(keyword.lower())
+        if not keyword_trigrams:
+            return None
+
+        # intersect starting from the shortest posting list
+        postings = sorted((self.postings.get(trigram, set()) for trigram in keyword_trigrams), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result &= posting
+        return result
+
+
+class TermIndex:
+    """
+    An inverted index from terms (e.g. tags) to the items having them.
+    """
+    def __init__(self):
+        self.postings: Dict[str, Set[Hashable]] = {}
+
+    def add(self, item: Hashable, terms: Iterable[str]):
+        for term in terms:
+            self.postings.setdefault(term, set()).add(item)
+
+    def remove(self, item: Hashable, terms: Iterable[str]):
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.discard(item)
+            if not posting:
+                del self.postings[term]
+
+    def get(self, term: str) -> Set[Hashable]:
+        return self.postings.get(term, set())
+
+    def terms(self) -> Iterable[str]:
+        return self.postings.keys()
+
+    def counts(self) -> List[Tuple[str, int]]:
+        """
+        Returns the terms with the number of items having them, most used first.
+        """
+        return sorted(((term, len(posting)) for term, posting in self.postings.items()), key=lambda count: (-count[1], count[0]))
+
+
+class SortedIndex:
+    """
+    Items kept sorted by a key, supporting inclusive range queries with binary search.
+    The items with equal keys are kept in the order of their positions.
+    """
+    def __init__(self, position: Callable[[Any], int] = id):
+        """
+        Parameters:
+            position (Callable, optional): Returns the position of an item, unique among the items
+                and unchanged while the item is in the index. The ids by default, for the items of no order.
+        """
+        self.position = position
+        # (key, position, item): the position keeps items with equal keys apart without comparing them
+        self.entries: List[Tuple[Any, int, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, key, item):
+        insort(self.entries, (key, self.position(item), item))
+
+    def add_many(self, items: Iterable[Tuple[Any, Any]]):
+        """
+        Adds many (key, item) pairs sorting the entries once, instead of inserting them one by one.
+        """
+        self.entries.extend((key, self.position(item), item) for key, item in items)
+        self.entries.sort()
+
+    def remove(self, key, item):
+        i = bisect_left(self.entries, (key, self.position(item)))
+        if i < len(self.entries) and self.entries[i][2] is item:
+            del self.entries[i]
+
+    def range(self, low=None, high=None) -> Iterator:
+        """
+        Yields the items with low <= key <= high, ordered by the key.
+        Parameters:
+            low: The lowest key, or None for no lower bound.
+            high: The highest key, or None for no upper bound.
+        """
+        start = 0 if low is None else bisect_left(self.entries, (low,))
+        end = len(self.entries) if high is None else bisect_right(self.entries, (high, float("inf")))
+        for i in range(start, end):
+            yield self.entries[i][2]
+
+
+class OrderedIndex:
+    """
+    Items kept ordered by a sort key, and by their positions among the items with equal keys,
+    the way a stable sort of the items taken in the order of their positions orders them.
+    Sorted results are then read from the index instead of sorting them on every query.
+    """
+    def __init__(self, key: Callable[[Any], Any]):
+        self.key = key
+        # (sort key, position, item): the positions are unique, so the items are never compared
+        self.entries: List[Tuple[Any, int, Any]] = []
+        # item -> (sort key, position) it's kept by, to find it on removal
+        self.keys: Dict[Hashable, Tuple[Any, int]] = {}
+        # the number of the neighbouring entries with equal keys
+        self.ties = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, item: Hashable, position: int):
+        key = self.key(item)
+        self.keys[item] = (key, position)
+        i = bisect_left(self.entries, (key, position))
+        self.ties -= self.__tie(i - 1, i)
+        self.entries.insert(i, (key, position, item))
+        self.ties += self.__tie(i - 1, i) + self.__tie(i, i + 1)
+
+    def add_many(self, items: Iterable[Tuple[Hashable, int]]):
+        """
+        Adds many (item, position) pairs sorting the entries once.
+        """
+        for item, position in items:
+            key = self.key(item)
+            self.keys[item] = (key, position)
+            self.entries.append((key, position, item))
+        # sorting by a single part of the entries at a time is much faster than comparing the tuples,
+        # the second sort is stable and keeps the positions in order
+        self.entries.sort(key=itemgetter(1))
+        self.entries.sort(key=itemgetter(0))
+        self.ties = len(self.entries) - len(set(key for key, _position in self.keys.values()))
+
+    def remove(self, item: Hashable):
+        key = self.keys.pop(item, None)
+        if key is None:
+            return
+        i = bisect_left(self.entries, key)
+        if i < len(self.entries) and self.entries[i][2] is item:
+            self.ties -= self.__tie(i - 1, i) + self.__tie(i, i + 1)
+            del self.entries[i]
+            self.ties += self.__tie(i - 1, i)
+
+    def __tie(self, i: int, j: int) -> int:
+        return 1 if 0 <= i and j < len(self.entries) and self.entries[i][0] == self.entries[j][0] else 0
+
+    def iterate(self, reverse: bool = False) -> Iterator:
+        """
+        Returns an iterator over all the items in sorted order, as sorted(items, key=key, reverse=reverse)
+        orders them, yielding the first item right away.
+        """
+        if not reverse:
+            return map(itemgetter(2), self.entries)
+        if not self.ties:
+            return map(itemgetter(2), reversed(self.entries))
+        return self.__reversed_runs()
+
+    def __reversed_runs(self) -> Iterator:
+        # the items with equal keys keep the order of their positions in the descending order too
+        run, run_key = [], None
+        for key, _position, item in reversed(self.entries):
+            if run and key != run_key:
+                yield from reversed(run)
+                run = []
+            run_key = key
+            run.append(item)
+        yield from reversed(run)
+
+    def select(self, items: Collection, reverse: bool = False, limit: int | None = None) -> Iterator:
+        """
+        Returns an iterator over the given items of the index in sorted order.
+        Parameters:
+            items (Collection): Distinct items of the index, in the order of their positions.
+            reverse (bool, optional): Whether to order them descending.
+            limit (int | None, optional): The number of the first items that will be read, if only they will.
+        """
+        if len(items) == len(self.keys):
+            return self.iterate(reverse)
+        # reading the entries scattered in memory costs about as much as sorting a third of them,
+        # so a smaller share is sorted by the kept keys, and a larger one is filtered from the index
+        if len(items) * 3 >= len(self.keys):
+            return filter(set(items).__contains__, self.iterate(reverse))
+        key = lambda item: self.keys[item][0]
+        if limit is not None and limit < len(items):
+            # the same first items as the sorted ones, keeping a heap of the limit items only
+            return iter(heapq.nlargest(limit, items, key=key) if reverse else heapq.nsmallest(limit, items, key=key))
+        return iter(sorted(items, key=key, reverse=reverse))
+
+
+class PhoneIndex:
+    """
+    Items by their phone numbers in the integer form.
+    The exact numbers are looked up in a hash. The numbers are also kept sorted, as all the numbers
+    of the same length starting with a digit prefix form a single range of integers, the way
+    a digit trie keeps them under a single node, so a prefix is looked up with binary search.
+    """
+    def __init__(self, digits: int):
+        self.digits = digits
+        # number -> tuple of the items having it, a tuple of one item is the usual case
+        self.numbers: Dict[int, Tuple[Hashable, ...]] = {}
+        self.sorted = SortedIndex()
+
+    def add(self, number: int, item: Hashable):
+        self.numbers[number] = self.numbers.get(number, ()) + (item,)
+        self.sorted.add(number, item)
+
+    def add_many(self, items: Iterable[Tuple[int, Hashable]]):
+        """
+        Adds many (number, item) pairs sorting the numbers once.
+        """
+        items = list(items)
+        for number, item in items:
+            self.numbers[number] = self.numbers.get(number, ()) + (item,)
+        self.sorted.add_many(items)
+
+    def remove(self, number: int, item: Hashable):
+        items = tuple(other for other in self.numbers.get(number, ()) if other is not item)
+        if items:
+            self.numbers[number] = items
+        else:
+            self.numbers.pop(number, None)
+        self.sorted.remove(number, item)
+
+    def get(self, number: int) -> Tuple[Hashable, ...]:
+        return self.numbers.get(number, ())
+
+    def prefix(self, digits: str) -> Iterator[Hashable]:
+        """
+        Yields the items having a number starting with the digits, ordered by the number.
+        Parameters:
+            digits (str): Up to self.digits ASCII digits.
+        """
+        if len(digits) == self.digits:
+            yield from self.get(int(digits))
+            return
+        scale = 10 ** (self.digits - len(digits))
+        low = int(digits) * scale if digits else 0
+        yield from self.sorted.range(low, low + scale - 1)
+
+
+class FullTextIndex:
+    """
+    An inverted index from words to the items containing them, with the word frequencies
+    and the lengths of the items kept up to date to rank the results with BM25.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[Hashable, int]] = {}
+        self.lengths: Dict[Hashable, int] = {}
+        self.total_length = 0
+
+    def add(self, item: Hashable, text: str):
+        words = tokenize(text)
+        self.lengths[item] = len(words)
+        self.total_length += len(words)
+        for word in words:
+            posting = self.postings.setdefault(word, {})
+            posting[item] = posting.get(item, 0) + 1
+
+    def remove(self, item: Hashable, text: str):
+        """
+        Removes an item from the index.
+        Parameters:
+            item (Hashable): The item to remove.
+            text (str): The text the item was indexed by.
+        """
+        if item not in self.lengths:
+            return
+        self.total_length -= self.lengths.pop(item)
+        for word in set(tokenize(text)):
+            posting = self.postings.get(word)
+            if posting is None:
+                continue
+            posting.pop(item, None)
+            if not posting:
+                del self.postings[word]
+
+    def search(self, query: str, limit: int) -> List[Tuple[float, Hashable]]:
+        """
+        Returns the items best matching the query by BM25 score.
+        Only the items containing at least one of the query words are scored.
+        Parameters:
+            query (str): The words to look for.
+            limit (int): The number of the best results to return.
+        Returns:
+            list: (score, item) pairs, best first.
+        """
+        count = len(self.lengths)
+        if count == 0:
+            return []
+        average_length = self.total_length / count
+
+        scores: Dict[Hashable, float] = {}
+        for word in set(tokenize(query)):
+            posting = self.postings.get(word)
+            if not posting:
+                continue
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for item, frequency in posting.items():
+                length_norm = self.k1 * (1 - self.b + self.b * self.lengths[item] / average_length)
+                scores[item] = scores.get(item, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+
+        return heapq.nlargest(limit, ((score, item) for item, score in scores.items()), key=lambda result: result[0])
+
+
+def levenshtein(a: str, b: str) -> int:
+    """
+    Returns the edit distance between two strings.
+    Uses the bit-parallel algorithm of Myers/Hyyrö, so it costs O(len(a)) integer operations.
+    """
+    return EditDistance(b).to(a)
+
+
+class EditDistance:
+    """
+    Edit distance from a fixed pattern, with the pattern bit masks prepared once
+    for comparing it with many strings.
+    """
+    def __init__(self, pattern: str):
+        self.length = len(pattern)
+        # bit masks of the positions of each character in the pattern
+        self.positions = {}
+        for i, char in enumerate(pattern):
+            self.positions[char] = self.positions.get(char, 0) | (1 << i)
+
+    def to(self, text: str) -> int:
+        if self.length == 0:
+            return len(text)
+
+        positions = self.positions
+        full = (1 << self.length) - 1
+        last = 1 << (self.length - 1)
+        plus, minus, distance = full, 0, self.length
+        for char in text:
+            equal = positions.get(char, 0)
+            vertical = equal | minus
+            horizontal = (((equal & plus) + plus) ^ plus) | equal
+            horizontal_plus = minus | ~(horizontal | plus)
+            horizontal_minus = plus & horizontal
+            if horizontal_plus & last:
+                distance += 1
+            elif horizontal_minus & last:
+                distance -= 1
+            horizontal_plus = (horizontal_plus << 1) | 1
+            horizontal_minus = horizontal_minus << 1
+            plus = (horizontal_minus | ~(vertical | horizontal_plus)) & full
+            minus = horizontal_plus & vertical & full
+        return distance
+
+
+class BKTree:
+    """
+    A metric tree over strings by edit distance, finding the keys close to a query
+    without comparing it to every key.
+    Removed keys are only marked as removed, the tree is rebuilt once most of its nodes are such.
+    """
+    def __init__(self):
+        # a node is [key, items, {distance: child node}]
+        self.root = None
+        self.nodes = 0
+        self.removed = 0
+
+    def add(self, key: str, item: Hashable):
+        if self.root is None:
+            self.root = [key, {item}, {}]
+            self.nodes = 1
+            return
+
+        node = self.root
+        distance_to = EditDistance(key).to
+        while True:
+            distance = distance_to(node[0])
+            if distance == 0:
+                if not node[1]:
+                    self.removed -= 1
+                node[1].add(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, {item}, {}]
+                self.nodes += 1
+                return
+            node = child
+
+    def remove(self, key: str, item: Hashable):
+        node = self.root
+        distance_to = EditDistance(key).to
+        while node is not None:
+            distance = distance_to(node[0])
+            if distance == 0:
+                if item in node[1]:
+                    node[1].discard(item)
+                    if not node[1]:
+                        self.removed += 1
+                break
+            node = node[2].get(distance)
+
+        if self.removed > self.nodes // 2:
+            self.__rebuild()
+
+    def search(self, key: str, max_distance: int) -> List[Tuple[int, Hashable]]:
+        """
+        Returns the items whose keys are within max_distance edits from the key, closest first.
+        """
+        results = []
+        distance_to = EditDistance(key).to
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = distance_to(node[0])
+            if distance <= max_distance:
+                results.extend((distance, item) for item in node[1])
+            # by the triangle inequality only these subtrees may contain close keys
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(results, key=lambda result: result[0])
+
+    def __rebuild(self):
+        entries = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            entries.extend((node[0], item) for item in node[1])
+            stack.extend(node[2].values())
+        self.root, self.nodes, self.removed = None, 0, 0
+        for key, item in entries:
+            self.add(key, item)
+
+
+class PrefixTrie:
+    """
+    A radix tree over strings, finding the keys starting with a prefix without comparing it to every key.
+    The chains of nodes with a single child are merged into one node labelled by all their characters,
+    so the tree has at most two nodes per key.
+    """
+    def __init__(self):
+        # a node is [label, items, {first character of a child's label: child node}, or None for a leaf],
+        # the key of a node is the labels from the root joined, the items are tuples as most keys have one
+        self.root = ["", (), None]
+
+    def add(self, key: str, item: Hashable):
+        node = self.root
+        while key:
+            child = node[2].get(key[0]) if node[2] else None
+            if child is None:
+                if node[2] is None:
+                    node[2] = {}
+                node[2][key[0]] = [key, (item,), None]
+                return
+            label = child[0]
+            common = 1
+            while common < len(label) and common < len(key) and label[common] == key[common]:
+                common += 1
+            if common < len(label):
+                # the key leaves the label in the middle, the node is split there
+                middle = [label[:common], (), {label[common]: child}]
+                child[0] = label[common:]
+                node[2][key[0]] = middle
+                child = middle
+            node = child
+            key = key[common:]
+        if item not in node[1]:
+            node[1] += (item,)
+
+    def remove(self, key: str, item: Hashable):
+        parents = []
+        node = self.root
+        while key:
+            child = node[2].get(key[0]) if node[2] else None
+            if child is None or not key.startswith(child[0]):
+                return
+            parents.append(node)
+            node = child
+            key = key[len(child[0]):]
+        if item not in node[1]:
+            return
+        node[1] = tuple(node_item for node_item in node[1] if node_item != item)
+
+        # a leaf left without items is removed, then its parent may be left with a single child
+        if parents and not node[1] and not node[2]:
+            parent = parents.pop()
+            del parent[2][node[0][0]]
+            if not parent[2]:
+                parent[2] = None
+            node = parent
+        if parents and not node[1] and node[2] and len(node[2]) == 1:
+            child, = node[2].values()
+            child[0] = node[0] + child[0]
+            parents[-1][2][node[0][0]] = child
+
+    def items(self, prefix: str, limit: int | None = None) -> List:
+        """
+        Returns the items whose keys start with the prefix, in the order of the keys.
+        Only the nodes of the items returned are visited, however many keys start with the prefix.
+        Parameters:
+            prefix (str): The start of the keys.
+            limit (int | None, optional): The maximum number of the items to return, None for all of them.
+        Returns:
+            List: The items.
+        """
+        node = self.root
+        while prefix:
+            node = node[2].get(prefix[0]) if node[2] else None
+            if node is None:
+                return []
+            label = node[0]
+            if prefix.startswith(label):
+                prefix = prefix[len(label):]
+            elif label.startswith(prefix):
+                prefix = ""
+            else:
+                return []
+
+        results = []
+        stack = [node]
+        while stack and (limit is None or len(results) < limit):
+            node = stack.pop()
+            results.extend(sorted(node[1]))
+            if node[2]:
+                # the children are popped in the order of their labels
+                stack.extend(child for _character, child in sorted(node[2].items(), reverse=True))
+        return results[:limit]
@@ -5,7 +5,7 @@ from typing import Callable, List
 from address_book import AddressBook, ADDRESS_BOOK_FIELDS
 from field import Birthday, Date
 from notes_book import Notebook, NOTES_BOOK_FIELDS
-from record import Record, Phone, Name
+from record import Record
 from note import Note
 from serialization import save_data, load_contacts, load_notes
 from views.TextView import ErrorView, WarningView, InfoView
@@ -72,14 +72,11 @@ def add_contact(args: list, address_book: AddressBook) -> str:
     return f"Added {record}"
 
 def replace_phones_on_a_contact(record, allow_skip=False):
-    existing_phones = record.phones.copy()
     new_phones = []
     populate_field(record.phones, lambda phone: new_phones.append(phone), "Enter new phone numbers (separated by space) (or 'n' to skip): ", allow_skip)
 
     if new_phones:
-        record.phones = [Phone(phone) for phone in new_phones]
-    elif not new_phones and record.phones:
-        record.phones = existing_phones
+        record.replace_phones(new_phones)
 
 @input_error
 def delete_contact(args: list, address_book: AddressBook) -> str:
@@ -147,10 +144,7 @@ def edit_name(args: list, address_book: AddressBook) -> str:
     if address_book.find(new_name):
         return f"A contact with name {new_name} already exists."
 
-    del address_book.data[old_name]
-
-    record.name = Name(new_name)
-    address_book.add_record(record)
+    record.edit_name(new_name)
 
     return f"Renamed contact {old_name} to {new_name}"
 
@@ -1,29 +1,66 @@
+import argparse
 import sys
-from serialization import save_data, load_contacts, load_notes
+from batch import STDIN_PATH, run_script
+from serialization import STORAGES, load_books, save_loaded
 from views.TextView import ErrorView, InfoView
+from views.View import OUTPUT_FORMATS, TABLE_FORMAT, set_output_format
 from commands import *
 
-def main():
-    if sys.version_info[0:2] != (3, 12):
-        ErrorView('Sorry, app requires Python 3.12, please consult with a Readme file about the setup instructions').output()
-        sys.exit(1)
+def parse_args():
+    parser = argparse.ArgumentParser(prog="mason_app", description="Contacts & notes storage app")
+    parser.add_argument("--storage", choices=STORAGES, default="pickle",
+                        help="'pickle' rewrites the books on exit, 'journal' appends every change to a log as it happens, "
+                             "'sqlite' keeps the books in a database and reads records on demand, "
+                             "'columnar' keeps the contacts in arrays searched with array operations")
+    parser.add_argument("--output", choices=OUTPUT_FORMATS, default=TABLE_FORMAT,
+                        help="'table' prints the results as tables, 'tsv' and 'jsonl' print plain tab separated "
+                             "or JSON lines to pipe into other programs, with the messages printed to stderr")
+    parser.add_argument("--batch", metavar="SCRIPT",
+                        help=f"runs the commands of the script file, or of stdin for '{STDIN_PATH}', a command per line, "
+                             "without asking for anything, prints the status of every command to stderr and exits")
+    return parser.parse_args()
 
-    address_book = load_contacts()
-    notes_book = load_notes()
+def run_interactive(address_book, notes_book, output):
     InfoView("Welcome to the assistant bot!").output()
-    init_autocomplete()
+    init_autocomplete(address_book, notes_book)
 
+    # the prompt would get mixed with the printed rows
+    prompt = "Enter command: " if output == TABLE_FORMAT else ""
     try:
         while True:
-            run_result = run_command(input("Enter command: "), address_book, notes_book)
+            run_result = run_command(input(prompt), address_book, notes_book)
             if run_result != None:
-                print(run_result)
+                print(run_result, file=sys.stdout if output == TABLE_FORMAT else sys.stderr)
     except (EOFError, KeyboardInterrupt):
         pass
+
+def main():
+    if sys.version_info[0:2] != (3, 12):
+        ErrorView('Sorry, app requires Python 3.12, please consult with a Readme file about the setup instructions').output()
+        sys.exit(1)
+
+    args = parse_args()
+    set_output_format(args.output)
+    # the books are loaded in background while the prompt is up, the commands needing them wait for them
+    address_book, notes_book = load_books(storage=args.storage)
+
+    failed = 0
+    try:
+        if args.batch is not None:
+            # the books are loaded and saved once for all the commands of the script
+            failed = run_script(args.batch, address_book, notes_book).failed
+        else:
+            run_interactive(address_book, notes_book, args.output)
+    except ValueError as e:
+        ErrorView(str(e)).output()
+        failed = 1
     finally:
-        save_data(address_book)
-        save_data(notes_book, filename="notes.pkl")
-        InfoView("Good bye!").output()
+        save_loaded(address_book)
+        save_loaded(notes_book, filename="notes.pkl")
+        if args.batch is None:
+            InfoView("Good bye!").output()
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -1,3 +1,5 @@
+import sys
+from contextlib import contextmanager
 from enum import Enum
 
 
@@ -9,22 +11,66 @@ class NOTES_BOOK_FIELDS(str, Enum):
     TAGS = "tags",
 
 
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lower()
+
+
 class Note:
+    # a book keeps a lot of notes, slots keep them free of a per-instance __dict__
+    __slots__ = ("__title", "__body", "__tags", "__lower_title", "__lower_body", "__lower_tags", "book")
+
     def __init__(self, title: str = "", body: str = ""):
         self.__title = title
         self.__body = body
-        self.__tags = []
+        self.__tags = ()
+        # lowercased title, body and tags for case-insensitive matching
+        self.__lower_title = title.lower()
+        self.__lower_body = body.lower()
+        self.__lower_tags = ()
+        # Notebook the note belongs to, notified about every change of the note
+        self.book = None
 
     def __str__(self):
         return f"Title: {self.__title}, Body: {self.__body}, Tags: {','.join(self.__tags)}"
 
+    def __getstate__(self):
+        # the owning book is restored by Notebook itself, never pickle it with the note
+        # the lowercased values are computed again on load
+        return {"_Note__title": self.__title, "_Note__body": self.__body, "_Note__tags": self.__tags}
+
+    def __setstate__(self, state):
+        self.book = None
+        self.__title = state["_Note__title"]
+        self.__body = state["_Note__body"]
+        self.__set_tags(state["_Note__tags"])
+        self.__lower_title = self.__title.lower()
+        self.__lower_body = self.__body.lower()
+
+    @contextmanager
+    def _changing(self, new_title: str | None = None):
+        """
+        Wraps a mutation of the note so the owning book can keep its data in sync.
+        Parameters:
+            new_title (str | None): The title the note gets, for the book to check it's not taken.
+        """
+        old_title = self.__title
+        if self.book is not None:
+            self.book.note_changing(self, new_title)
+        try:
+            yield
+        finally:
+            if self.book is not None:
+                self.book.note_changed(self, old_title)
+
     @property
     def title(self) -> str:
         return self.__title
 
     @title.setter
     def title(self, new_title: str):
-        self.__title = new_title
+        with self._changing(new_title):
+            self.__title = new_title
+            self.__lower_title = new_title.lower()
 
     @property
     def body(self) -> str:
@@ -32,17 +78,50 @@ class Note:
 
     @body.setter
     def body(self, new_body: str):
-        self.__body = new_body
+        with self._changing():
+            self.__body = new_body
+            self.__lower_body = new_body.lower()
 
     @property
-    def tags(self) -> list:
+    def tags(self) -> tuple:
+        # a tuple, the tags change only through the setter, which the book follows
         return self.__tags
 
     @tags.setter
     def tags(self, new_tags: list):
-        self.__tags = new_tags
+        with self._changing():
+            self.__set_tags(new_tags)
+
+    def __set_tags(self, tags: list):
+        # the same few tags repeat over many notes, keep a single copy of each
+        self.__tags = tuple(sys.intern(tag) for tag in tags)
+        self.__lower_tags = tuple(sys.intern(tag.lower()) for tag in tags)
+
+    def normalized_tags(self) -> set:
+        return {normalize_tag(tag) for tag in self.__tags if normalize_tag(tag)}
+
+    @property
+    def lower_title(self) -> str:
+        return self.__lower_title
+
+    @property
+    def lower_body(self) -> str:
+        return self.__lower_body
+
+    @property
+    def lower_tags(self) -> tuple:
+        return self.__lower_tags
 
     def match(self, keyword: str) -> bool:
-        return (self.__title.lower().find(keyword.lower()) >= 0
-                or self.__body.lower().find(keyword.lower()) >= 0
-                or any([tag.lower().find(keyword.lower()) >= 0 for tag in self.tags]))
+        return self.match_lower(keyword.lower())
+
+    def match_lower(self, lower_keyword: str) -> bool:
+        """
+        Same as match, for a keyword that is lowercased already.
+        """
+        if lower_keyword in self.__lower_title or lower_keyword in self.__lower_body:
+            return True
+        for tag in self.__lower_tags:
+            if lower_keyword in tag:
+                return True
+        return False
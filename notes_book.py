@@ -1,11 +1,114 @@
 from collections import UserList
-from typing import List
+from typing import Callable, Iterable, Iterator, List, Set, Tuple
 
-from note import Note, NOTES_BOOK_FIELDS
+from field import collection_paused
+from indexes import FullTextIndex, OrderedIndex, PrefixTrie, TermIndex
+from note import Note, NOTES_BOOK_FIELDS, normalize_tag
+from paging import Page, paginate
+from search_cache import SearchCache, SearchCacheStats
 from views.TableView import TableView, Sort
 from views.NotesBookView import NotesBookView
 
+TAGS_QUERY_PREFIX = "tags:"
+RANKED_QUERY_PREFIX = "rank:"
+# the number of the best notes a ranked search shows
+RANKED_SEARCH_LIMIT = 20
+
+
+def parse_tags_query(query: str) -> Tuple[List[List[List[str]]], Set[str]]:
+    """
+    Parses a boolean tags query like "work+urgent|home -archived".
+    Space separated terms must all match, "-tag" excludes the tag, "+" requires all the tags
+    of a group and "|" separates alternative groups.
+    Parameters:
+        query (str): The query, with or without the "tags:" prefix.
+    Returns:
+        tuple: The required terms, each a list of alternative groups of tags, and the excluded tags.
+    """
+    if query.startswith(TAGS_QUERY_PREFIX):
+        query = query[len(TAGS_QUERY_PREFIX):]
+
+    required, excluded = [], set()
+    for term in query.split():
+        if term.startswith("-"):
+            excluded.update(normalize_tag(tag) for tag in term[1:].split("+") if normalize_tag(tag))
+            continue
+        groups = [[normalize_tag(tag) for tag in group.split("+") if normalize_tag(tag)] for group in term.split("|")]
+        groups = [group for group in groups if group]
+        if groups:
+            required.append(groups)
+    return required, excluded
+
+
 class Notebook(UserList):
+    fields = NOTES_BOOK_FIELDS
+    # serialization.Journal the mutations are appended to, if journaled storage is used
+    journal = None
+    # the sequence of the last journal log replayed into the book, see serialization.replay
+    journal_sequence = 0
+
+    def __init__(self, notes: List[Note] = None):
+        # insertion ordered notes with their positions, the notes by title and by normalized tag
+        self.data = notes or []
+
+    @property
+    def data(self) -> List[Note]:
+        # the list is built only when it's read after a change
+        if self.__data is None:
+            self.__data = list(self.__notes)
+        return self.__data
+
+    @data.setter
+    def data(self, notes: List[Note]):
+        self.__set_notes(notes, FullTextIndex())
+
+    def __set_notes(self, notes: List[Note], full_text: FullTextIndex):
+        """
+        Replaces all the notes, reusing the full-text index if it's already built for them.
+        """
+        self.__notes = {}
+        self.__titles = {}
+        self.__tags = TermIndex()
+        # the notes by their lowercased tags as they are written, for the substring search in the tags
+        self.__lower_tags = TermIndex()
+        is_full_text_built = len(full_text.lengths) > 0
+        self.__full_text = full_text
+        self.__position = 0
+        self.__data = None
+        # results of the recent searches, dropped on every change
+        self.__cache = SearchCache()
+        # notes by the sort key of a field, built on the first search sorted by the field
+        self.__orders = {}
+        # titles by their lowercase prefixes for completing them, built on the first completion
+        self.__prefixes = None
+        for note in notes:
+            self.__insert(note, index_full_text=not is_full_text_built)
+
+    def __insert(self, note: Note, index_full_text: bool = True):
+        self.__position += 1
+        self.__notes[note] = self.__position
+        self.__titles[note.title] = note
+        self.__tags.add(note, note.normalized_tags())
+        self.__lower_tags.add(note, note.lower_tags)
+        if index_full_text:
+            self.__full_text.add(note, self.__text(note))
+        for order in self.__orders.values():
+            order.add(note, self.__position)
+        if self.__prefixes is not None:
+            self.__prefixes.add(note.title.lower(), note.title)
+        self.__data = None
+        self.__cache.invalidate()
+        note.book = self
+
+    @staticmethod
+    def __text(note: Note) -> str:
+        return f"{note.title} {note.body}"
+
+    def __len__(self) -> int:
+        return len(self.__notes)
+
+    def __iter__(self):
+        return iter(self.data)
 
     def __str__(self) -> str:
         return "\n".join([str(note) for note in self.data])
@@ -13,74 +116,392 @@ class Notebook(UserList):
     def add_note(self, note: Note):
         if len(note.title) == 0 and len(note.body) == 0:
             raise ValueError("Can't add entirely empty notes")
-        if self.get_note_by_title(note.title) is not None:
+        if note.title in self.__titles:
             raise ValueError("Note with this title already exists")
-        self.data.append(note)
+        self.__insert(note)
+        if self.journal is not None:
+            self.journal.append("put", note.title, note)
+
+    def add_notes(self, notes: Iterable[Note]):
+        """
+        Adds many notes, appending them to the journal at once.
+        Parameters:
+            notes (Iterable[Note]): The notes to add.
+        Raises:
+            ValueError: If a note is empty or its title is taken, the notes before it are added.
+        """
+        added = []
+        try:
+            for note in notes:
+                if len(note.title) == 0 and len(note.body) == 0:
+                    raise ValueError("Can't add entirely empty notes")
+                if note.title in self.__titles:
+                    raise ValueError("Note with this title already exists")
+                self.__insert(note)
+                added.append(note)
+        finally:
+            if self.journal is not None:
+                self.journal.append_many(("put", note.title, note) for note in added)
 
     def remove_note(self, title: str):
-        note = self.get_note_by_title(title)
+        note = self.__titles.pop(title, None)
         if note is None:
             raise ValueError("Note with this title doesn't exist")
-        self.data.remove(note)
+        del self.__notes[note]
+        self.__tags.remove(note, note.normalized_tags())
+        self.__lower_tags.remove(note, note.lower_tags)
+        self.__full_text.remove(note, self.__text(note))
+        for order in self.__orders.values():
+            order.remove(note)
+        if self.__prefixes is not None:
+            self.__prefixes.remove(title.lower(), title)
+        self.__data = None
+        self.__cache.invalidate()
+        note.book = None
+        if self.journal is not None:
+            self.journal.append("del", title)
+
+    # the list methods go through add_note and remove_note, so the indexes, the cache and the journal follow them
+
+    def append(self, note: Note):
+        self.add_note(note)
+
+    def extend(self, notes: Iterable[Note]):
+        self.add_notes(notes)
+
+    def __iadd__(self, notes: Iterable[Note]):
+        self.add_notes(notes)
+        return self
+
+    def remove(self, note: Note):
+        if self.__titles.get(note.title) is not note:
+            raise ValueError("Note is not in the notes book")
+        self.remove_note(note.title)
+
+    def pop(self, i: int = -1) -> Note:
+        note = self.data[i]
+        self.remove_note(note.title)
+        return note
+
+    def __delitem__(self, i: int | slice):
+        notes = self.data[i] if isinstance(i, slice) else [self.data[i]]
+        for note in notes:
+            self.remove_note(note.title)
+
+    def clear(self):
+        for note in self.data:
+            self.remove_note(note.title)
+
+    # the new lists are plain lists, a Notebook made of them would take the notes away from this book
+
+    def __getitem__(self, i: int | slice) -> Note | List[Note]:
+        return self.data[i]
+
+    def copy(self) -> List[Note]:
+        return list(self.data)
+
+    def __add__(self, notes: Iterable[Note]) -> List[Note]:
+        return self.data + list(notes)
+
+    def __radd__(self, notes: Iterable[Note]) -> List[Note]:
+        return list(notes) + self.data
+
+    def __mul__(self, n: int) -> List[Note]:
+        return self.data * n
+
+    __rmul__ = __mul__
+
+    def __unordered(self, *args, **kwargs):
+        raise TypeError("The notes are kept in the order they were added, use add_note and remove_note")
+
+    # the notes can't be put at a position or reordered, the indexes and the journal keep the order they were added in
+    insert = __setitem__ = __imul__ = sort = reverse = __unordered
 
     def get_notes(self) -> list:
         return self.data
 
     def get_note_by_title(self, title: str) -> Note:
-        return next((note for note in self.data if note.title == title), None)
+        return self.__titles.get(title)
 
-    @staticmethod
-    def update_note(note_base: Note, new_note: Note):
+    def titles_starting_with(self, prefix: str, limit: int | None = None) -> List[str]:
+        """
+        Finds the titles starting with the prefix, to complete a title being typed.
+        Parameters:
+            prefix (str): The start of the titles (case-insensitive).
+            limit (int | None, optional): The maximum number of titles to return, None for all of them.
+        Returns:
+            List[str]: The titles in alphabetical order.
+        """
+        if self.__prefixes is None:
+            with collection_paused():
+                self.__prefixes = PrefixTrie()
+                for title in self.__titles:
+                    self.__prefixes.add(title.lower(), title)
+        return self.__prefixes.items(prefix.lower(), limit)
+
+    def update_note(self, note_base: Note, new_note: Note):
         """
         Updates a left note with non-empty fields of a right note.
         Parameters:
             note_base (Note): A Note to update
             new_note (Note): A Note with fields to update
         """
-        if len(new_note.title) > 0:
+        if len(new_note.title) > 0 and new_note.title != note_base.title:
             note_base.title = new_note.title
         if len(new_note.body) > 0:
             note_base.body = new_note.body
         if len(new_note.tags) > 0:
             note_base.tags = new_note.tags
 
-    def search(self, keyword: str, field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL, sort: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.EMPTY, direction_text: str = "asc") -> None:
+    def note_changing(self, note: Note, new_title: str | None = None):
+        """
+        Called by a note of this book right before it gets changed.
+        Parameters:
+            note (Note): The note about to change.
+            new_title (str | None): The title the note gets, if it's renamed.
+        Raises:
+            ValueError: If another note of the book has the new title, nothing is changed then.
+        """
+        if new_title is not None and self.__titles.get(new_title, note) is not note:
+            raise ValueError("Note with this title already exists")
+        self.__tags.remove(note, note.normalized_tags())
+        self.__lower_tags.remove(note, note.lower_tags)
+        self.__full_text.remove(note, self.__text(note))
+        for order in self.__orders.values():
+            order.remove(note)
+
+    def note_changed(self, note: Note, old_title: str):
+        """
+        Called by a note of this book right after it has been changed.
+        Parameters:
+            note (Note): The changed note.
+            old_title (str): The title of the note before the change.
+        """
+        self.__tags.add(note, note.normalized_tags())
+        self.__lower_tags.add(note, note.lower_tags)
+        self.__full_text.add(note, self.__text(note))
+        for order in self.__orders.values():
+            order.add(note, self.__notes[note])
+        self.__cache.invalidate()
+        if note.title != old_title:
+            self.__titles[note.title] = self.__titles.pop(old_title)
+            if self.__prefixes is not None:
+                self.__prefixes.remove(old_title.lower(), old_title)
+                self.__prefixes.add(note.title.lower(), note.title)
+        if self.journal is None:
+            return
+        if note.title != old_title:
+            self.journal.append("rename", old_title, note.title)
+        self.journal.append("put", note.title, note)
+
+    def apply_change(self, operation: str, title: str, value=None):
+        """
+        Applies a single change previously recorded in a journal.
+        The logs already merged into the snapshot are skipped by their sequence, see serialization.replay.
+        Parameters:
+            operation (str): One of "put", "del" or "rename".
+            title (str): The title of the affected note.
+            value: The note for "put", or the new title for "rename".
+        """
+        match operation:
+            case "put":
+                note = self.get_note_by_title(title)
+                if note is None:
+                    self.add_note(value)
+                else:
+                    # update in place to keep the position of the note
+                    note.body = value.body
+                    note.tags = value.tags
+            case "del":
+                if self.get_note_by_title(title) is not None:
+                    self.remove_note(title)
+            case "rename":
+                note = self.get_note_by_title(title)
+                if note is not None and self.get_note_by_title(value) is None:
+                    note.title = value
+
+    def __getstate__(self):
+        # the full-text index is saved with the notes, the cheaper indexes are rebuilt on load
+        return {"data": self.data, "full_text": self.__full_text, "journal_sequence": self.journal_sequence}
+
+    def __setstate__(self, state):
+        self.__set_notes(state["data"], state.get("full_text", FullTextIndex()))
+        self.journal_sequence = state.get("journal_sequence", 0)
+
+    def search(self, keyword: str, field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL, sort: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.EMPTY, direction_text: str = "asc",
+               limit: int | None = None, offset: int = 0) -> None:
         if field not in NOTES_BOOK_FIELDS or sort not in NOTES_BOOK_FIELDS:
             raise KeyError(f"Field {field} not found.")
 
-        notes = self.__filter(keyword, field)
-        notes = self.__sort(notes, sort, direction_text)
+        key = (keyword, field, sort, direction_text, limit, offset)
+        page = self.__cache.get(key)
+        if page is None:
+            page = self.__page(keyword, field, sort, direction_text, limit, offset)
+            self.__cache.put(key, page, len(page.items))
+        if keyword.startswith(TAGS_QUERY_PREFIX) or keyword.startswith(RANKED_QUERY_PREFIX):
+            # a query is not highlighted in the notes
+            keyword = ""
 
-        view = NotesBookView(notes)
+        view = NotesBookView(page.items)
         view.sort_column = Sort(column=sort, order=direction_text)
         view.keyword = keyword
+        view.page = page
         view.output()
 
-    def __filter(self, keyword: str, field: NOTES_BOOK_FIELDS) -> List[Note]:
-        notes = self.data
+    def iter_search(self, keyword: str = "", field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL, sort: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.EMPTY, direction_text: str = "asc") -> Iterator[Note]:
+        """
+        Yields the notes search shows, as they are consumed.
+        The book should not be changed until the notes are read.
+        Parameters:
+            keyword (str, optional): The substring to look for, or a "tags:" or "rank:" query, all the notes by default.
+            field (NOTES_BOOK_FIELDS, optional): The field to look in, all fields by default.
+            sort (NOTES_BOOK_FIELDS, optional): The field to sort by, the order of the notes or of their ranks by default.
+            direction_text (str, optional): "asc" or "desc".
+        Returns:
+            Iterator[Note]: The matching notes.
+        Raises:
+            KeyError: If the field or the sort field is not found.
+        """
+        if field not in NOTES_BOOK_FIELDS or sort not in NOTES_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+        notes, _total = self.__results(keyword, field, sort, direction_text)
+        return iter(notes)
+
+    def cache_stats(self) -> SearchCacheStats:
+        """
+        Returns the statistics of the cache of the search results.
+        """
+        return self.__cache.stats()
+
+    def iter_filter(self, keyword: str = "", field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL) -> Iterator[Note]:
+        """
+        Yields the notes search would show for the keyword one by one, unsorted.
+        Parameters:
+            keyword (str): The substring to look for, or a "tags:" or "rank:" query.
+            field (NOTES_BOOK_FIELDS): The field to look in, all fields by default.
+        """
+        if keyword.startswith(TAGS_QUERY_PREFIX):
+            yield from self.query_tags(keyword)
+        elif keyword.startswith(RANKED_QUERY_PREFIX):
+            yield from (note for note, _score in self.search_ranked(keyword[len(RANKED_QUERY_PREFIX):]))
+        else:
+            yield from self.__filter(keyword, field)
+
+    def query_tags(self, query: str) -> List[Note]:
+        """
+        Finds the notes by a boolean query over their exact (case-insensitive) tags.
+        See parse_tags_query for the query syntax.
+        Parameters:
+            query (str): The query, e.g. "tags:work+urgent -archived".
+        Returns:
+            List[Note]: The matching notes, in the order they were added.
+        """
+        required, excluded = parse_tags_query(query)
+        if required:
+            notes = None
+            # start from the most selective terms
+            for term_notes in sorted((self.__term_notes(groups) for groups in required), key=len):
+                notes = term_notes if notes is None else notes & term_notes
+                if not notes:
+                    break
+        else:
+            notes = set(self.__notes)
+        for tag in excluded:
+            notes = notes - self.__tags.get(tag)
+        return sorted(notes, key=self.__notes.__getitem__)
+
+    def __term_notes(self, groups: List[List[str]]) -> set:
+        notes = set()
+        for group in groups:
+            postings = sorted((self.__tags.get(tag) for tag in group), key=len)
+            group_notes = set(postings[0])
+            for posting in postings[1:]:
+                group_notes &= posting
+            notes |= group_notes
+        return notes
+
+    def search_ranked(self, query: str, limit: int = RANKED_SEARCH_LIMIT) -> List[Tuple[Note, float]]:
+        """
+        Finds the notes best matching the words of the query in their titles and bodies, ranked by BM25.
+        Parameters:
+            query (str): The words to look for.
+            limit (int): The number of the best notes to return.
+        Returns:
+            List[Tuple[Note, float]]: The notes with their scores, best first.
+        """
+        return [(note, score) for score, note in self.__full_text.search(query, limit)]
+
+    def get_tag_counts(self) -> List[Tuple[str, int]]:
+        """
+        Returns the normalized tags with the number of notes having them, most used first.
+        """
+        return self.__tags.counts()
+
+    def __filter(self, keyword: str, field: NOTES_BOOK_FIELDS) -> Iterable[Note]:
+        notes = self.__notes
+        # lowercase the keyword once, the notes keep their lowercased values
+        keyword = keyword.lower()
         match field:
             case NOTES_BOOK_FIELDS.ALL:
-                notes = [note for note in notes if note.match(keyword)]
+                notes = (note for note in notes if note.match_lower(keyword))
             case NOTES_BOOK_FIELDS.TAGS:
-                notes = [note for note in notes if any([tag.lower().find(keyword.lower()) >= 0 for tag in note.tags])]
+                # check the distinct tags instead of the tags of every note, as they are written, not normalized
+                tags = [tag for tag in self.__lower_tags.terms() if tag.find(keyword) >= 0]
+                candidates = set().union(*(self.__lower_tags.get(tag) for tag in tags))
+                notes = sorted(candidates, key=self.__notes.__getitem__)
             case NOTES_BOOK_FIELDS.BODY:
-                notes = [note for note in notes if note.body.lower().find(keyword.lower()) >= 0]
+                notes = (note for note in notes if keyword in note.lower_body)
             case NOTES_BOOK_FIELDS.TITLE:
-                notes = [note for note in notes if note.title.lower().find(keyword.lower()) >= 0]
+                notes = (note for note in notes if keyword in note.lower_title)
 
         return notes
 
-    def __sort(self, notes: List[Note], field: NOTES_BOOK_FIELDS, direction_text: str) -> List[Note]:
-        direction = False if direction_text == "asc" else True
+    def __page(self, keyword: str, field: NOTES_BOOK_FIELDS, sort: NOTES_BOOK_FIELDS, direction_text: str,
+               limit: int | None, offset: int) -> Page:
+        """
+        Takes a page of the matching notes sorted by the field, reading only the notes the page needs where it can,
+        as AddressBook does.
+        """
+        top = None if limit is None else offset + limit + 1
+        notes, total = self.__results(keyword, field, sort, direction_text, top)
+        return paginate(notes, offset, limit, total)
 
+    def __results(self, keyword: str, field: NOTES_BOOK_FIELDS, sort: NOTES_BOOK_FIELDS, direction_text: str,
+                  top: int | None = None) -> Tuple[Iterable[Note], int | None]:
+        """
+        Returns the matching notes sorted by the field, read lazily where they can be, with their number if it's known.
+        """
+        order = self.__order(sort)
+        reverse = direction_text != "asc"
+        if not keyword and field == NOTES_BOOK_FIELDS.ALL:
+            return (self.__notes.keys() if order is None else order.iterate(reverse)), len(self.__notes)
+        if order is None:
+            return self.iter_filter(keyword, field), None
+        notes = list(self.iter_filter(keyword, field))
+        if keyword.startswith(RANKED_QUERY_PREFIX):
+            # the ranked notes are not in the order they were added, the few of them are sorted keeping their rank on ties
+            return sorted(notes, key=order.key, reverse=reverse), len(notes)
+        return order.select(notes, reverse, top), len(notes)
+
+    def __order(self, sort: NOTES_BOOK_FIELDS) -> OrderedIndex | None:
+        order = self.__orders.get(sort)
+        if order is None:
+            sort_key = self.__sort_key(sort)
+            if sort_key is None:
+                return None
+            order = self.__orders[sort] = OrderedIndex(sort_key)
+            # nothing built here is garbage
+            with collection_paused():
+                order.add_many(self.__notes.items())
+        return order
+
+    @staticmethod
+    def __sort_key(field: NOTES_BOOK_FIELDS) -> Callable[[Note], str] | None:
         match field:
             case NOTES_BOOK_FIELDS.TAGS:
-                notes = sorted(notes, key=lambda note: "".join(tag for tag in note.tags), reverse=direction)
+                return lambda note: "".join(tag for tag in note.tags)
             case NOTES_BOOK_FIELDS.BODY:
-                notes = sorted(notes, key=lambda note: note.body, reverse=direction)
+                return lambda note: note.body
             case NOTES_BOOK_FIELDS.TITLE:
-                notes = sorted(notes, key=lambda note: note.title, reverse=direction)
-            case _:
-                pass
-
-        return notes
+                return lambda note: note.title
+        return None
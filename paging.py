@@ -0,0 +1,56 @@
+from itertools import islice
+from typing import Iterable, List, NamedTuple, Sized
+
+# the number of the results the commands show at a time, unless a limit is given
+DEFAULT_PAGE_SIZE = 50
+
+
+class Page(NamedTuple):
+    items: List
+    # the number of the results before the page
+    offset: int
+    # the maximum number of the results of the page, None for all the results
+    limit: int | None
+    # the number of all the results, None if counting them would cost reading all of them
+    total: int | None
+    # whether there are results after the page
+    more: bool
+
+    def next_page(self) -> int:
+        """
+        Returns the number of the next page, counting from 1, for the pages of the same size.
+        """
+        return self.offset // self.limit + 2 if self.limit else 1
+
+
+def page_offset(page: int, limit: int) -> int:
+    """
+    Returns the offset of the page, counting from 1.
+    """
+    return (page - 1) * limit
+
+
+def paginate(items: Iterable, offset: int = 0, limit: int | None = None, total: int | None = None, skipped: bool = False) -> Page:
+    """
+    Takes a page of the results, reading only as many of them as the page needs and one more,
+    to tell if there are more.
+    Parameters:
+        items (Iterable): The results, in the order they are shown.
+        offset (int, optional): The number of the results to skip.
+        limit (int | None, optional): The maximum number of the results to take, None for all of them.
+        total (int | None, optional): The number of all the results, if it's known without reading them.
+        skipped (bool, optional): Whether the items start after the offset already, e.g. skipped by a database query.
+    Returns:
+        Page: The page of the results.
+    """
+    if total is None and isinstance(items, Sized) and not skipped:
+        total = len(items)
+    start = 0 if skipped else offset
+    items = list(islice(items, start, None if limit is None else start + limit + 1))
+    more = limit is not None and len(items) > limit
+    if more:
+        items.pop()
+    elif total is None and (items or offset == 0):
+        # all the results have been read
+        total = offset + len(items)
+    return Page(items, offset, limit, total, more)
@@ -1,6 +1,7 @@
+from contextlib import contextmanager
 from enum import Enum
 from typing import List
-from field import Name, Phone, Birthday, Email, Address
+from field import Name, Phone, Birthday, Email, Address, phone_number
 
 class ADDRESS_BOOK_FIELDS(str, Enum):
     EMPTY = "",
@@ -13,12 +14,17 @@ class ADDRESS_BOOK_FIELDS(str, Enum):
 
 
 class Record:
+    # a book keeps a lot of records, slots keep them free of a per-instance __dict__
+    __slots__ = ("name", "phones", "email", "birthday", "address", "book")
+
     def __init__(self, name):
         self.name = Name(name)
         self.phones = []
         self.email = None
         self.birthday = None
         self.address = None
+        # AddressBook the record belongs to, notified about every change of the record
+        self.book = None
 
     def __str__(self):
         phones = ', '.join(p.value for p in self.phones)
@@ -28,34 +34,117 @@ class Record:
         return (f"Contact name: {self.name.value}, phones: {phones}, "
                 f"email: {email}, birthday: {birthday}, address: {address}")
 
-    def add_phone(self, phone: str):
-        if not any(p.value == phone for p in self.phones):
-            self.phones.append(Phone(phone))
+    def __getstate__(self):
+        # the owning book is restored by AddressBook itself, never pickle it with the record
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot != "book"}
+
+    def __setstate__(self, state):
+        self.book = None
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    @contextmanager
+    def _changing(self):
+        """
+        Wraps a mutation of the record so the owning book can keep its data in sync.
+        """
+        old_name = self.name.value
+        if self.book is not None:
+            self.book.record_changing(self)
+        try:
+            yield
+        finally:
+            if self.book is not None:
+                self.book.record_changed(self, old_name)
+
+    def add_phone(self, phone: str | Phone):
+        """
+        Adds a phone number, unless the record has it already in any format.
+        Parameters:
+            phone (str | Phone): The phone number, or a phone validated already, e.g. by Phone.validate_phones.
+        """
+        if not isinstance(phone, Phone):
+            phone = Phone(phone)
+        # the numbers are compared in their integer form
+        if all(p.number != phone.number for p in self.phones):
+            with self._changing():
+                self.phones.append(phone)
 
     def edit_phone(self, old_phone: str, new_phone: str):
+        old_number = phone_number(old_phone)
         for p in self.phones:
-            if p.value == old_phone:
-                p.value = new_phone
+            if p.number == old_number:
+                new_phone = Phone(new_phone)
+                with self._changing():
+                    p.value = new_phone.value
                 break
 
+    def replace_phones(self, phones: List[str]):
+        new_phones = [Phone(phone) for phone in phones]
+        with self._changing():
+            self.phones = new_phones
+
     def add_email(self, email: str):
-        self.email = Email(email)
+        email = Email(email)
+        with self._changing():
+            self.email = email
 
     def add_birthday(self, birthday: str):
-        self.birthday = Birthday(birthday)
+        birthday = Birthday(birthday)
+        with self._changing():
+            self.birthday = birthday
 
     def match_phone(self, phone: str) -> bool:
-        return any([record.match(phone) for record in self.phones])
+        return self.match_phone_lower(phone.lower())
+
+    def match_phone_lower(self, lower_phone: str) -> bool:
+        for phone in self.phones:
+            if lower_phone in phone.lower_value:
+                return True
+        return False
 
     def match(self, keyword: str) -> bool:
-        return (self.name.match(keyword)
-                or self.match_phone(keyword)
-                or self.birthday.match(keyword)
-                or self.email.match(keyword)
-                or self.address.match(keyword))
+        return self.match_lower(keyword.lower())
+
+    def match_lower(self, lower_keyword: str) -> bool:
+        """
+        Same as match, for a keyword that is lowercased already.
+        Reads the lowercased values of the fields directly, as it runs for every record of a scan.
+        """
+        if lower_keyword in self.name.lower_value or self.match_phone_lower(lower_keyword):
+            return True
+        # birthdays are not matched by keywords
+        return (self.email is not None and lower_keyword in self.email.lower_value
+                or self.address is not None and lower_keyword in self.address.lower_value)
+
+    def merge(self, other: "Record"):
+        """
+        Combines the fields of a duplicate of this record into it: adds the phones it lacks
+        and the email, birthday and address this record misses.
+        Parameters:
+            other (Record): The duplicate, not kept in a book anymore, as its fields are moved over.
+        """
+        with self._changing():
+            numbers = {phone.number for phone in self.phones}
+            for phone in other.phones:
+                if phone.number not in numbers:
+                    numbers.add(phone.number)
+                    self.phones.append(phone)
+            if self.email is None:
+                self.email = other.email
+            if self.birthday is None:
+                self.birthday = other.birthday
+            if self.address is None:
+                self.address = other.address
 
     def add_address(self, address: str):
-        self.address = Address(address)
+        address = Address(address)
+        with self._changing():
+            self.address = address
 
     def edit_name(self, new_name: str):
-        self.name = Name(new_name)
+        if self.book is not None and new_name != self.name.value and self.book.find(new_name) is not None:
+            raise ValueError(f"A record with name {new_name} already exists.")
+        name = Name(new_name)
+        with self._changing():
+            self.name = name
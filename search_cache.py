@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Tuple
+
+# the number of the searches kept, and the number of the found items kept for all of them
+SEARCH_CACHE_ENTRIES = 64
+SEARCH_CACHE_ITEMS = 1_000_000
+
+
+class SearchCacheStats(NamedTuple):
+    entries: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    # the number of the changes of the book seen so far
+    generation: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SearchCache:
+    """
+    A bounded LRU cache of search results, by the search parameters.
+    The book bumps the generation on every change, which drops all the results at once,
+    so a result is never served after a change of the book.
+    """
+    def __init__(self, max_entries: int = SEARCH_CACHE_ENTRIES, max_items: int = SEARCH_CACHE_ITEMS):
+        self.max_entries = max_entries
+        self.max_items = max_items
+        # key -> (result, the number of the found items in it)
+        self.entries: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self.items = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Returns the cached result of the search, or None if it's not cached.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, result: Any, size: int | None = None):
+        """
+        Caches the result of the search, evicting the least recently used results over the limits.
+        A result larger than all the items the cache may keep is not cached.
+        Parameters:
+            key (Hashable): The search parameters.
+            result (Any): The result, e.g. a list of the found items or a page of them.
+            size (int | None, optional): The number of the found items in the result, len(result) by default.
+        """
+        size = len(result) if size is None else size
+        if size > self.max_items:
+            return
+        if key in self.entries:
+            self.items -= self.entries.pop(key)[1]
+        self.entries[key] = (result, size)
+        self.items += size
+        while len(self.entries) > self.max_entries or self.items > self.max_items:
+            _key, (_result, evicted) = self.entries.popitem(last=False)
+            self.items -= evicted
+            self.evictions += 1
+
+    def invalidate(self):
+        """
+        Called on every change of the book, drops all the results.
+        """
+        self.generation += 1
+        if self.entries:
+            self.entries.clear()
+            self.items = 0
+            self.invalidations += 1
+
+    def stats(self) -> SearchCacheStats:
+        return SearchCacheStats(len(self.entries), self.hits, self.misses, self.evictions, self.invalidations, self.generation)
@@ -1,52 +1,373 @@
 import pickle
+import sys
+import threading
+from typing import Callable
 from address_book import AddressBook
+from field import collection_paused
 from notes_book import Notebook
 import os
 
+# sqlite_storage and columnar_storage, with sqlite3 and numpy, are imported when a book of their storage is opened,
+# the app starts without them otherwise
+
 user_folder = os.path.expanduser("~")
 app_folder = os.path.join(user_folder, '.mason_app')
 
 if not os.path.exists(app_folder):
     os.makedirs(app_folder)
 
+STORAGES = ["pickle", "journal", "sqlite", "columnar"]
+
+# Journal size after which it gets merged into the snapshot in background
+COMPACT_THRESHOLD = 4 * 1024 * 1024
+
+
+class Journal:
+    """
+    An append-only log of book changes kept next to the pickle snapshot of the book.
+
+    Every change is appended as a small pickled (operation, key, value) entry, so saving
+    a single edit doesn't rewrite the whole book. Once the log grows over the threshold it is
+    rotated and merged into the snapshot by a background thread.
+
+    Every log starts with a ("log", sequence, None) entry. The snapshot keeps the sequence
+    of the last log merged into it, so a log merged before a crash isn't replayed again.
+    """
+    def __init__(self, snapshot_path: str, book_factory, sequence: int = 0, compact_threshold: int = COMPACT_THRESHOLD):
+        """
+        Parameters:
+            snapshot_path (str): The pickle snapshot of the book.
+            book_factory: Creates an empty book if there is no snapshot.
+            sequence (int): The highest sequence of the snapshot and the logs replayed into the book.
+            compact_threshold (int): The log size after which it gets merged into the snapshot.
+        """
+        self.snapshot_path = snapshot_path
+        self.log_path = snapshot_path + ".log"
+        self.old_log_path = snapshot_path + ".log.old"
+        self.book_factory = book_factory
+        self.compact_threshold = compact_threshold
+        self.compaction = None
+        self.sequence = sequence
+        self.file = open(self.log_path, "ab")
+        if self.file.tell() == 0:
+            self.__start_log()
+        if os.path.exists(self.old_log_path):
+            # finish the compaction interrupted by the previous run
+            self.__start_merge()
+
+    def append(self, operation: str, key: str, value=None):
+        """
+        Appends a single change to the log.
+        Parameters:
+            operation (str): One of "put", "del" or "rename".
+            key (str): The name/title of the affected record/note.
+            value: The record/note for "put", or the new name/title for "rename".
+        """
+        self.append_many([(operation, key, value)])
+
+    def append_many(self, changes):
+        """
+        Appends many changes to the log flushing it once.
+        Parameters:
+            changes: (operation, key, value) tuples as the arguments of append.
+        """
+        for change in changes:
+            pickle.dump(change, self.file)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        if self.file.tell() >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """
+        Rotates the log and merges the rotated part into the snapshot in background.
+        """
+        if self.compaction is not None and self.compaction.is_alive():
+            return
+        if os.path.exists(self.old_log_path):
+            # a previous compaction was interrupted, let this one finish it first
+            return
+        self.file.close()
+        os.replace(self.log_path, self.old_log_path)
+        self.file = open(self.log_path, "ab")
+        self.__start_log()
+        self.__start_merge()
+
+    def __start_log(self):
+        self.sequence += 1
+        pickle.dump(("log", self.sequence, None), self.file)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def __start_merge(self):
+        self.compaction = threading.Thread(target=self.__merge_old_log, daemon=True)
+        self.compaction.start()
+
+    def __merge_old_log(self):
+        book = read_snapshot(self.snapshot_path, self.book_factory)
+        # the log sequence replayed goes into the snapshot, so the log is skipped
+        # if the app stops before it is removed
+        replay(book, self.old_log_path)
+        write_snapshot(book, self.snapshot_path)
+        os.remove(self.old_log_path)
+
+    def close(self):
+        """
+        Closes the log waiting for a running compaction to finish.
+        """
+        self.file.close()
+        if self.compaction is not None:
+            self.compaction.join()
+
+
+def read_snapshot(filepath: str, book_factory):
+    try:
+        # unpickling creates all the fields and records of the book at once
+        with open(filepath, "rb") as f, collection_paused():
+            return pickle.load(f)
+    except FileNotFoundError:
+        return book_factory()
+
+
+def write_snapshot(book, filepath: str):
+    # write next to the target first so a crash never leaves a half-written snapshot
+    tmp_filepath = filepath + ".tmp"
+    with open(tmp_filepath, "wb") as f:
+        pickle.dump(book, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filepath, filepath)
+
+
+def replay(book, log_path: str) -> int:
+    """
+    Applies all changes recorded in a journal file to a book.
+    A log whose sequence is not above the journal_sequence of the book is already in the book and is skipped,
+    otherwise the book takes the sequence of the log.
+    Parameters:
+        book (AddressBook | Notebook): The book to apply changes to.
+        log_path (str): The journal file.
+    Returns:
+        int: The size of the complete entries of the log, 0 if there is no log.
+    """
+    try:
+        f = open(log_path, "rb")
+    except FileNotFoundError:
+        return 0
+    with f:
+        end = 0
+        while True:
+            try:
+                operation, key, value = pickle.load(f)
+            except Exception:
+                # end of the log, or an entry torn by a crash, which may fail to unpickle in any way
+                return end
+            if operation == "log":
+                if key <= book.journal_sequence:
+                    return os.fstat(f.fileno()).st_size
+                book.journal_sequence = key
+            else:
+                book.apply_change(operation, key, value)
+            end = f.tell()
+
+
 def save_data(book, filename="addressbook.pkl"):
     """
     Saves an address book to a pickle file.
+    If the book is journaled or stored in SQLite, all the changes are already on disk,
+    so the storage is just closed.
     Parameters:
         book (AddressBook): The address book to save.
         filename (str): The name of the pickle file to save to.
     """
+    # a book can't be of a storage whose module was never imported
+    sqlite_storage = sys.modules.get("sqlite_storage")
+    if sqlite_storage is not None and isinstance(book, sqlite_storage.SqliteBook):
+        book.close()
+        return
+
+    columnar_storage = sys.modules.get("columnar_storage")
+    if columnar_storage is not None and isinstance(book, columnar_storage.ColumnarAddressBook):
+        write_snapshot(book, columnar_filepath(filename))
+        return
+
+    if book.journal is not None:
+        book.journal.close()
+        book.journal = None
+        return
+
     filepath = os.path.join(app_folder, filename)
-    with open(filepath, "wb") as f:
-        pickle.dump(book, f)
+    write_snapshot(book, filepath)
+    # the snapshot now contains everything the journal had
+    for log_path in (filepath + ".log.old", filepath + ".log"):
+        if os.path.exists(log_path):
+            os.remove(log_path)
 
 
-def load_contacts(filename="addressbook.pkl"):
+def load_book(filename, book_factory, journaled=False):
     """
-    Loads an address book from a pickle file, or creates a new one if the file does not exist.
+    Loads a book from a pickle snapshot and the journal next to it.
     Parameters:
         filename (str): The name of the pickle file to load.
+        book_factory: Creates an empty book if the file does not exist.
+        journaled (bool): Whether to record further changes of the book to a journal.
     Returns:
-        AddressBook: The loaded or newly created address book.
+        AddressBook | Notebook: The loaded or newly created book.
     """
     filepath = os.path.join(app_folder, filename)
-    try:
-        with open(filepath, "rb") as f:
-            return pickle.load(f)
-    except FileNotFoundError:
-        return AddressBook()  # Повернення нової адресної книги, якщо файл не знайдено
+    book = read_snapshot(filepath, book_factory)
+    replay(book, filepath + ".log.old")
+    end = replay(book, filepath + ".log")
+    if journaled:
+        if os.path.exists(filepath + ".log"):
+            # drop an entry torn by a crash, the changes appended after it would never be replayed
+            os.truncate(filepath + ".log", end)
+        book.journal = Journal(filepath, book_factory, book.journal_sequence)
+    return book
+
 
-def load_notes(filename="notes.pkl"):
+def open_sqlite_book(filename, book_factory, sqlite_book_factory):
+    """
+    Opens a book stored in SQLite database next to the pickle file.
+    The database is filled from the pickle file the first time it's opened.
+    Parameters:
+        filename (str): The name of the pickle file.
+        book_factory: Creates an empty in-memory book.
+        sqlite_book_factory: Opens the SQLite book by a database file path.
+    Returns:
+        SqliteAddressBook | SqliteNotebook: The opened book.
+    """
+    db_filepath = os.path.join(app_folder, os.path.splitext(filename)[0] + ".db")
+    is_new = not os.path.exists(db_filepath)
+    book = sqlite_book_factory(db_filepath)
+    if is_new and os.path.exists(os.path.join(app_folder, filename)):
+        pickled_book = load_book(filename, book_factory)
+        if isinstance(pickled_book, AddressBook):
+            book.add_records(pickled_book.values())
+        else:
+            book.add_notes(pickled_book)
+    return book
+
+
+def columnar_filepath(filename):
+    return os.path.join(app_folder, os.path.splitext(filename)[0] + ".columns.pkl")
+
+
+def open_columnar_book(filename):
+    """
+    Loads a columnar address book from its own pickle file next to the pickle file of AddressBook.
+    The columns are filled from the AddressBook pickle file the first time.
+    Parameters:
+        filename (str): The name of the AddressBook pickle file.
+    Returns:
+        ColumnarAddressBook: The loaded or newly created address book.
+    """
+    from columnar_storage import ColumnarAddressBook
+
+    filepath = columnar_filepath(filename)
+    if os.path.exists(filepath):
+        return read_snapshot(filepath, ColumnarAddressBook)
+    if os.path.exists(os.path.join(app_folder, filename)):
+        return ColumnarAddressBook(load_book(filename, AddressBook).values())
+    return ColumnarAddressBook()
+
+
+def load_contacts(filename="addressbook.pkl", storage="pickle"):
+    """
+    Loads an address book from a pickle file, or creates a new one if the file does not exist.
+    Parameters:
+        filename (str): The name of the pickle file to load.
+        storage (str): One of STORAGES.
+    Returns:
+        AddressBook | SqliteAddressBook | ColumnarAddressBook: The loaded or newly created address book.
+    """
+    if storage == "sqlite":
+        from sqlite_storage import SqliteAddressBook
+        return open_sqlite_book(filename, AddressBook, SqliteAddressBook)
+    if storage == "columnar":
+        return open_columnar_book(filename)
+    return load_book(filename, AddressBook, journaled=storage == "journal")
+
+def load_notes(filename="notes.pkl", storage="pickle"):
     """
     Loads an notes book from a pickle file, or creates a new one if the file does not exist.
     Parameters:
         filename (str): The name of the pickle file to load.
+        storage (str): One of STORAGES, the notes have no columnar storage and are pickled then.
     Returns:
-        AddressBook: The loaded or newly created address book.
+        Notebook | SqliteNotebook: The loaded or newly created notes book.
     """
-    filepath = os.path.join(app_folder, filename)
-    try:
-        with open(filepath, "rb") as f:
-            return pickle.load(f)
-    except FileNotFoundError:
-        return Notebook()  # Повернення нової адресної книги, якщо файл не знайдено
+    if storage == "sqlite":
+        from sqlite_storage import SqliteNotebook
+        return open_sqlite_book(filename, Notebook, SqliteNotebook)
+    return load_book(filename, Notebook, journaled=storage == "journal")
+
+
+class BackgroundLoad:
+    """
+    A book being loaded in a background thread, e.g. while the prompt is already shown.
+    """
+    def __init__(self, load: Callable, *args, **kwargs):
+        self.__book = None
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__load, args=(load, args, kwargs), daemon=True)
+        self.__thread.start()
+
+    def __load(self, load: Callable, args: tuple, kwargs: dict):
+        try:
+            self.__book = load(*args, **kwargs)
+        except Exception as e:
+            self.__error = e
+
+    def done(self) -> bool:
+        return not self.__thread.is_alive()
+
+    def result(self):
+        """
+        Returns the book, waiting for it to be loaded.
+        Raises:
+            Exception: The error the loading failed with.
+        """
+        self.__thread.join()
+        if self.__error is not None:
+            raise self.__error
+        return self.__book
+
+
+def load_books(storage="pickle") -> tuple:
+    """
+    Starts loading the contacts and the notes in background.
+    The SQLite books are opened right away, they read nothing until asked,
+    and their connections can't be used by another thread.
+    Parameters:
+        storage (str): One of STORAGES.
+    Returns:
+        tuple: The address book and the notes book, or their BackgroundLoad, see loaded.
+    """
+    if storage == "sqlite":
+        return load_contacts(storage=storage), load_notes(storage=storage)
+    return BackgroundLoad(load_contacts, storage=storage), BackgroundLoad(load_notes, storage=storage)
+
+
+def save_loaded(book, filename="addressbook.pkl"):
+    """
+    Saves a book as save_data does, waiting for it if it's still being loaded in background.
+    A book that failed to load is not saved, it has no changes then, and its error is not raised again,
+    so the error the app is stopping with, if any, is not masked by it.
+    """
+    if isinstance(book, BackgroundLoad):
+        try:
+            book = book.result()
+        except Exception:
+            return
+    save_data(book, filename)
+
+
+def loaded(book, wait=True):
+    """
+    Returns the book, waiting for it if it's still being loaded in background,
+    or None then if wait is False.
+    """
+    if isinstance(book, BackgroundLoad):
+        return book.result() if wait or book.done() else None
+    return book
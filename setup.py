@@ -11,7 +11,7 @@ setup(
     author='Serhii Kozachenko',
     author_email='serhii.kozachenko.92@gmail.com',
     packages=find_packages(),
-    py_modules=['main', 'new_main', 'commands', 'address_book', 'notes_book', 'record', 'note', 'serialization', 'field', 'views.View', 'views.TableView', 'views.TextView', 'views.NotesBookView', 'views.AddressBookView'],
+    py_modules=['main', 'new_main', 'batch', 'commands', 'address_book', 'notes_book', 'record', 'note', 'serialization', 'sqlite_storage', 'columnar_storage', 'indexes', 'importer', 'exporter', 'duplicates', 'search_cache', 'paging', 'field', 'views.View', 'views.TableView', 'views.TextView', 'views.NotesBookView', 'views.AddressBookView', 'views.TagsView', 'views.DuplicatesView', 'views.CacheStatsView'],
     install_requires=parse_requirements('requirements.txt'),
     entry_points={
         'console_scripts': [
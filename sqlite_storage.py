@@ -0,0 +1,735 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List
+
+from address_book import get_birthday_ranges, get_celebration_date
+from field import Date, Phone, Email, Birthday, Address, phone_digits
+from note import Note, NOTES_BOOK_FIELDS, normalize_tag
+from indexes import BKTree, PrefixTrie, tokenize
+from paging import paginate
+from notes_book import RANKED_QUERY_PREFIX, RANKED_SEARCH_LIMIT, TAGS_QUERY_PREFIX, parse_tags_query
+from record import Record, ADDRESS_BOOK_FIELDS
+from views.TableView import Sort
+from views.AddressBookView import AddressBookView
+from views.NotesBookView import NotesBookView
+
+
+# the number of rows read from the database at a time
+SELECT_CHUNK_SIZE = 500
+
+
+def restore_field(field_class, value):
+    """
+    Creates a field from a value read from the database, skipping the validation
+    that the value has already passed when it was stored.
+    """
+    field = field_class.__new__(field_class)
+    field.value = value
+    return field
+
+
+def page_clause(limit: int | None, offset: int):
+    """
+    Returns the LIMIT clause selecting a page of the rows and one row more, to tell if there are more, with its parameters.
+    """
+    if limit is None and not offset:
+        return "", []
+    # a negative limit is no limit for SQLite
+    return " LIMIT ? OFFSET ?", [-1 if limit is None else limit + 1, offset]
+
+
+class SqliteBook:
+    """
+    Base class of the books stored in an SQLite database instead of being loaded into memory.
+    Every change is written to the database right away.
+    """
+    schema = ""
+
+    def __init__(self, filepath: str):
+        self.connection = sqlite3.connect(filepath)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(self.schema)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class SqliteAddressBook(SqliteBook):
+    """
+    An address book stored in an SQLite database. Records are fetched on demand.
+    """
+    fields = ADDRESS_BOOK_FIELDS
+    schema = """
+        CREATE TABLE IF NOT EXISTS contacts (
+            name TEXT PRIMARY KEY,
+            lower_name TEXT NOT NULL,
+            email TEXT,
+            lower_email TEXT,
+            address TEXT,
+            lower_address TEXT,
+            birthday TEXT,
+            birthday_md TEXT
+        );
+        CREATE TABLE IF NOT EXISTS phones (
+            name TEXT NOT NULL REFERENCES contacts(name) ON DELETE CASCADE ON UPDATE CASCADE,
+            position INTEGER NOT NULL,
+            phone TEXT NOT NULL,
+            PRIMARY KEY (name, position)
+        );
+        -- the email and address keywords are substrings of the lowercased columns, which no index serves
+        DROP INDEX IF EXISTS contacts_email;
+        DROP INDEX IF EXISTS contacts_address;
+        CREATE INDEX IF NOT EXISTS contacts_birthday ON contacts(birthday);
+        CREATE INDEX IF NOT EXISTS contacts_birthday_md ON contacts(birthday_md);
+        CREATE INDEX IF NOT EXISTS phones_phone ON phones(phone);
+    """
+
+    # the keywords are matched against the values lowercased by Python, as in AddressBook,
+    # SQLite lowercases only the ASCII letters
+    text_columns = {
+        ADDRESS_BOOK_FIELDS.NAME: "lower_name",
+        ADDRESS_BOOK_FIELDS.EMAIL: "lower_email",
+        ADDRESS_BOOK_FIELDS.ADDRESS: "lower_address",
+    }
+    # columns to sort by, the phones are aggregated per contact in their order, group_concat keeps no order by itself
+    columns = {
+        ADDRESS_BOOK_FIELDS.NAME: "name",
+        ADDRESS_BOOK_FIELDS.EMAIL: "email",
+        ADDRESS_BOOK_FIELDS.ADDRESS: "address",
+        ADDRESS_BOOK_FIELDS.BIRTHDAY: "birthday",
+        ADDRESS_BOOK_FIELDS.PHONE: "(SELECT group_concat(phone, '') FROM (SELECT phone FROM phones WHERE phones.name = contacts.name ORDER BY position))",
+    }
+
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+        # names by edit distance, built on the first fuzzy lookup
+        self.names = None
+        # names by their lowercase prefixes for completing them, built on the first completion
+        self.prefixes = None
+
+    def __str__(self) -> str:
+        return "\n".join([str(record) for record in self.__select()])
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    def __contains__(self, name: str) -> bool:
+        return self.connection.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        return (row[0] for row in self.connection.execute("SELECT name FROM contacts"))
+
+    def add_record(self, record: Record):
+        """
+        Adds a record to the address book.
+        Parameters:
+            record (Record): The record to add.
+        Raises:
+            KeyError: If a record with the same name already exists.
+        """
+        try:
+            with self.connection:
+                self.__insert(record)
+        except sqlite3.IntegrityError:
+            raise KeyError(f"A record with name {record.name.value} already exists.")
+        record.book = self
+        if self.names is not None:
+            self.names.add(record.name.value.lower(), record.name.value)
+        if self.prefixes is not None:
+            self.prefixes.add(record.name.value.lower(), record.name.value)
+
+    def add_records(self, records: Iterable[Record]):
+        """
+        Adds many records in a single transaction.
+        Parameters:
+            records (Iterable[Record]): The records to add.
+        """
+        records = list(records)
+        with self.connection:
+            for record in records:
+                self.__insert(record)
+        self.names = None
+        if self.prefixes is not None:
+            for record in records:
+                self.prefixes.add(record.name.value.lower(), record.name.value)
+
+    def find(self, name: str) -> Record:
+        """
+        Finds a record by name.
+        Parameters:
+            name (str): The name of the record to find.
+        Returns:
+            Record: The record with the given name, or None if not found.
+        """
+        records = self.__select("WHERE name = ?", [name])
+        return records[0] if records else None
+
+    def delete(self, name: str):
+        """
+        Deletes a record by name.
+        Parameters:
+            name (str): The name of the record to delete.
+        Raises:
+            KeyError: If no record with the given name is found.
+        """
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM contacts WHERE name = ?", (name,))
+        if cursor.rowcount == 0:
+            raise KeyError(f"A record with name {name} not found.")
+        if self.names is not None:
+            self.names.remove(name.lower(), name)
+        if self.prefixes is not None:
+            self.prefixes.remove(name.lower(), name)
+
+    def find_by_phone(self, phone: str) -> List[Record]:
+        """
+        Finds the records by a phone number, e.g. of an incoming call, or its first digits.
+        The numbers starting with the digits are a range of the phones index.
+        """
+        digits = phone_digits(phone)
+        if not digits:
+            return []
+        # ":" follows the digits in the character order, so it bounds all the numbers starting with the digits
+        return self.__select("WHERE name IN (SELECT name FROM phones WHERE phone >= ? AND phone < ?) ORDER BY rowid",
+                             [digits, digits + ":"])
+
+    def find_similar(self, name: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        """
+        Finds the names closest to the given one, to suggest them when it's misspelled.
+        Only the names are read from the database to build the search tree.
+        """
+        if self.names is None:
+            self.names = BKTree()
+            for (record_name,) in self.connection.execute("SELECT name FROM contacts"):
+                self.names.add(record_name.lower(), record_name)
+        return [record_name for _distance, record_name in self.names.search(name.lower(), max_distance)[:limit]]
+
+    def names_starting_with(self, prefix: str, limit: int | None = None) -> List[str]:
+        """
+        Finds the names starting with the prefix, to complete a name being typed.
+        Only the names are read from the database to build the tree, the lookups don't query the database,
+        which can't use its index for a case-insensitive prefix.
+        """
+        if self.prefixes is None:
+            self.prefixes = PrefixTrie()
+            for (record_name,) in self.connection.execute("SELECT name FROM contacts"):
+                self.prefixes.add(record_name.lower(), record_name)
+        return self.prefixes.items(prefix.lower(), limit)
+
+    def record_changing(self, record: Record):
+        pass
+
+    def record_changed(self, record: Record, old_name: str):
+        """
+        Writes a changed record back to the database.
+        A renamed record is inserted again, so it's found after the others as in AddressBook.
+        Parameters:
+            record (Record): The changed record.
+            old_name (str): The name of the record before the change.
+        """
+        with self.connection:
+            if record.name.value != old_name:
+                # the phones of the old row are deleted with it
+                self.connection.execute("DELETE FROM contacts WHERE name = ?", (old_name,))
+                self.__insert(record)
+            else:
+                self.connection.execute(
+                    "UPDATE contacts SET email = ?, lower_email = ?, address = ?, lower_address = ?, birthday = ?, birthday_md = ? "
+                    "WHERE name = ?", [*self.__contact_row(record)[2:], old_name])
+                self.connection.execute("DELETE FROM phones WHERE name = ?", (old_name,))
+                self.connection.executemany("INSERT INTO phones (name, position, phone) VALUES (?, ?, ?)",
+                                            self.__phone_rows(record))
+        if self.names is not None and record.name.value != old_name:
+            self.names.remove(old_name.lower(), old_name)
+            self.names.add(record.name.value.lower(), record.name.value)
+        if self.prefixes is not None and record.name.value != old_name:
+            self.prefixes.remove(old_name.lower(), old_name)
+            self.prefixes.add(record.name.value.lower(), record.name.value)
+
+    def get_upcoming_birthdays(self, days_prior: int = 7) -> None:
+        """
+        Shows upcoming birthdays (celebration days).
+        Parameters:
+            days_prior (int, optional): The number of days in the future to look for birthdays.
+                Defaults to 7.
+        """
+        view = AddressBookView(self.iter_upcoming_birthdays(days_prior))
+        view.sort_column = Sort(column=ADDRESS_BOOK_FIELDS.BIRTHDAY, order="asc")
+        view.output()
+
+    def iter_upcoming_birthdays(self, days_prior: int = 7) -> Iterator[Record]:
+        """
+        Yields the records whose birthdays are celebrated in the coming days, in the order of the birthdays
+        starting from today.
+        Only contacts whose birthday falls into the period are read from the database.
+        """
+        current_date = date.today()
+        celebration_period = current_date + timedelta(days=days_prior)
+        ranges = get_birthday_ranges(current_date, days_prior)
+        condition = "WHERE " + " OR ".join(["birthday_md BETWEEN ? AND ?"] * len(ranges))
+        params = [f"{month:02}-{day:02}" for bounds in ranges for month, day in bounds]
+
+        # chronological order starting from today, the period may wrap around the New Year
+        condition += " ORDER BY birthday_md < ?, birthday_md"
+        params.append(params[0])
+        return (record for record in self.__iter_select(condition, params)
+                if get_celebration_date(record.birthday.value.date(), current_date) <= celebration_period)
+
+    def search_by_date(self, from_date: Date, to_date: Date) -> None:
+        view = AddressBookView(self.iter_by_date(from_date, to_date))
+        view.sort_column = Sort(column=ADDRESS_BOOK_FIELDS.BIRTHDAY, order="asc")
+        view.output()
+
+    def iter_by_date(self, from_date: Date | None, to_date: Date | None) -> Iterator[Record]:
+        """
+        Yields the records born in the period, ordered by the birth date.
+        """
+        conditions, params = ["birthday IS NOT NULL"], []
+        if from_date is not None:
+            conditions.append("birthday >= ?")
+            params.append(from_date.value.date().isoformat())
+        if to_date is not None:
+            conditions.append("birthday <= ?")
+            params.append(to_date.value.date().isoformat())
+        return self.__iter_select(f"WHERE {' AND '.join(conditions)} ORDER BY birthday", params)
+
+    def search_by_phone(self, phone: str) -> None:
+        view = AddressBookView(self.find_by_phone(phone))
+        view.keyword = phone_digits(phone)
+        view.output()
+
+    def search(self, keyword: str, field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL, sort: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.EMPTY, direction_text: str = "asc",
+               limit: int | None = None, offset: int = 0) -> None:
+        if field not in ADDRESS_BOOK_FIELDS or sort not in ADDRESS_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+
+        condition, params = self.__filter(keyword, field)
+        # the whole table is counted from its index, the matches would be counted by a second scan
+        total = len(self) if not condition else None
+        clause, page_params = page_clause(limit, offset)
+        page = paginate(self.__iter_select(condition + self.__order_by(sort, direction_text) + clause, params + page_params),
+                        offset, limit, total, skipped=True)
+
+        view = AddressBookView(page.items)
+        view.sort_column = Sort(column=sort, order=direction_text)
+        view.keyword = keyword
+        view.page = page
+        view.output()
+
+    def iter_search(self, keyword: str = "", field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL, sort: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.EMPTY, direction_text: str = "asc") -> Iterator[Record]:
+        """
+        Yields the records search shows, reading them from the database a chunk at a time as they are consumed.
+        """
+        if field not in ADDRESS_BOOK_FIELDS or sort not in ADDRESS_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+        condition, params = self.__filter(keyword, field)
+        return self.__iter_select(condition + self.__order_by(sort, direction_text), params)
+
+    def __order_by(self, sort: ADDRESS_BOOK_FIELDS, direction_text: str) -> str:
+        if sort in self.columns:
+            # the contacts with equal values keep the order they were added in, both ways, as in AddressBook
+            return f" ORDER BY {self.columns[sort]} {'ASC' if direction_text == 'asc' else 'DESC'}, rowid"
+        return " ORDER BY rowid"
+
+    def iter_filter(self, keyword: str = "", field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL) -> Iterator[Record]:
+        """
+        Yields the records matching the keyword one by one, in the order they were added.
+        """
+        condition, params = self.__filter(keyword, field)
+        return self.__iter_select(condition + " ORDER BY rowid", params)
+
+    def __filter(self, keyword: str, field: ADDRESS_BOOK_FIELDS):
+        if not keyword and field == ADDRESS_BOOK_FIELDS.ALL:
+            return "", []
+        # an empty keyword still matches only the contacts having the field, instr doesn't match NULL
+
+        keyword = keyword.lower()
+        phone_condition = "EXISTS (SELECT 1 FROM phones WHERE phones.name = contacts.name AND instr(phone, ?))"
+        match field:
+            case ADDRESS_BOOK_FIELDS.ALL:
+                conditions = [f"instr({column}, ?)" for column in self.text_columns.values()] + [phone_condition]
+                return f"WHERE {' OR '.join(conditions)}", [keyword] * len(conditions)
+            case ADDRESS_BOOK_FIELDS.NAME | ADDRESS_BOOK_FIELDS.ADDRESS | ADDRESS_BOOK_FIELDS.EMAIL:
+                return f"WHERE instr({self.text_columns[field]}, ?)", [keyword]
+            case ADDRESS_BOOK_FIELDS.PHONE:
+                return f"WHERE {phone_condition}", [keyword]
+
+        return "", []
+
+    def __select(self, condition: str = "", params: list = None) -> List[Record]:
+        return list(self.__iter_select(condition, params))
+
+    def __iter_select(self, condition: str = "", params: list = None) -> Iterator[Record]:
+        """
+        Yields the selected records, reading them from the database a chunk at a time.
+        """
+        cursor = self.connection.execute(f"SELECT name, email, address, birthday FROM contacts {condition}", params or [])
+        # SQLite limits the number of query parameters, so the phones are fetched for a chunk of contacts at a time
+        while rows := cursor.fetchmany(SELECT_CHUNK_SIZE):
+            phones = {}
+            names = [row[0] for row in rows]
+            for name, phone in self.connection.execute(
+                    f"SELECT name, phone FROM phones WHERE name IN ({','.join('?' * len(names))}) ORDER BY name, position", names):
+                phones.setdefault(name, []).append(phone)
+            for row in rows:
+                yield self.__restore(row, phones.get(row[0], []))
+
+    def __restore(self, row, phones: List[str]) -> Record:
+        name, email, address, birthday = row
+        record = Record(name)
+        record.phones = [restore_field(Phone, phone) for phone in phones]
+        record.email = restore_field(Email, email) if email is not None else None
+        record.address = restore_field(Address, address) if address is not None else None
+        record.birthday = restore_field(Birthday, datetime.fromisoformat(birthday)) if birthday is not None else None
+        record.book = self
+        return record
+
+    def __insert(self, record: Record):
+        self.connection.execute("INSERT INTO contacts (name, lower_name, email, lower_email, address, lower_address, birthday, birthday_md) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self.__contact_row(record))
+        self.connection.executemany("INSERT INTO phones (name, position, phone) VALUES (?, ?, ?)",
+                                    self.__phone_rows(record))
+
+    @staticmethod
+    def __contact_row(record: Record) -> list:
+        birthday = record.birthday.value.date() if isinstance(record.birthday, Birthday) else None
+        email = record.email if isinstance(record.email, Email) else None
+        address = record.address if isinstance(record.address, Address) else None
+        return [
+            record.name.value,
+            record.name.lower_value,
+            email.value if email else None,
+            email.lower_value if email else None,
+            address.value if address else None,
+            address.lower_value if address else None,
+            birthday.isoformat() if birthday else None,
+            birthday.strftime("%m-%d") if birthday else None,
+        ]
+
+    @staticmethod
+    def __phone_rows(record: Record) -> list:
+        return [(record.name.value, position, phone.value) for position, phone in enumerate(record.phones)]
+
+
+class SqliteNotebook(SqliteBook):
+    """
+    A notes book stored in an SQLite database. Notes are fetched on demand.
+    """
+    fields = NOTES_BOOK_FIELDS
+    schema = """
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL UNIQUE,
+            lower_title TEXT NOT NULL,
+            body TEXT NOT NULL,
+            lower_body TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS note_tags (
+            note_id INTEGER NOT NULL REFERENCES notes(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            lower_tag TEXT NOT NULL,
+            -- note.normalize_tag of the tag, SQLite's lower and trim handle only the ASCII letters and spaces
+            normalized_tag TEXT NOT NULL,
+            PRIMARY KEY (note_id, position)
+        );
+        -- the body keywords are substrings of the lowercased bodies, which no index serves
+        DROP INDEX IF EXISTS notes_body;
+        CREATE INDEX IF NOT EXISTS note_tags_tag ON note_tags(tag);
+        CREATE INDEX IF NOT EXISTS note_tags_normalized_tag ON note_tags(normalized_tag, note_id);
+    """
+    # full-text index over the titles and bodies, kept in sync with the notes table by triggers
+    full_text_schema = """
+        CREATE VIRTUAL TABLE notes_fts USING fts5(title, body, content='notes', content_rowid='id');
+        CREATE TRIGGER notes_fts_insert AFTER INSERT ON notes BEGIN
+            INSERT INTO notes_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END;
+        CREATE TRIGGER notes_fts_delete AFTER DELETE ON notes BEGIN
+            INSERT INTO notes_fts(notes_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        END;
+        CREATE TRIGGER notes_fts_update AFTER UPDATE ON notes BEGIN
+            INSERT INTO notes_fts(notes_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO notes_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END;
+        INSERT INTO notes_fts(notes_fts) VALUES ('rebuild');
+    """
+
+    # the keywords are matched against the values lowercased by Python, as in Notebook
+    text_columns = {
+        NOTES_BOOK_FIELDS.TITLE: "lower_title",
+        NOTES_BOOK_FIELDS.BODY: "lower_body",
+    }
+    # columns to sort by, the tags are aggregated per note in their order
+    columns = {
+        NOTES_BOOK_FIELDS.TITLE: "title",
+        NOTES_BOOK_FIELDS.BODY: "body",
+        NOTES_BOOK_FIELDS.TAGS: "(SELECT group_concat(tag, '') FROM (SELECT tag FROM note_tags WHERE note_id = notes.id ORDER BY position))",
+    }
+
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+        # titles by their lowercase prefixes for completing them, built on the first completion
+        self.prefixes = None
+        if self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").fetchone() is None:
+            with self.connection:
+                self.connection.executescript(self.full_text_schema)
+
+    def __str__(self) -> str:
+        return "\n".join([str(note) for note in self.get_notes()])
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM notes").fetchone()[0]
+
+    def __iter__(self):
+        return iter(self.get_notes())
+
+    def add_note(self, note: Note):
+        if len(note.title) == 0 and len(note.body) == 0:
+            raise ValueError("Can't add entirely empty notes")
+        try:
+            with self.connection:
+                self.__insert(note)
+        except sqlite3.IntegrityError:
+            raise ValueError("Note with this title already exists")
+        note.book = self
+        if self.prefixes is not None:
+            self.prefixes.add(note.title.lower(), note.title)
+
+    def add_notes(self, notes: Iterable[Note]):
+        """
+        Adds many notes in a single transaction.
+        Parameters:
+            notes (Iterable[Note]): The notes to add.
+        """
+        notes = list(notes)
+        with self.connection:
+            for note in notes:
+                self.__insert(note)
+        if self.prefixes is not None:
+            for note in notes:
+                self.prefixes.add(note.title.lower(), note.title)
+
+    def remove_note(self, title: str):
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM notes WHERE title = ?", (title,))
+        if cursor.rowcount == 0:
+            raise ValueError("Note with this title doesn't exist")
+        if self.prefixes is not None:
+            self.prefixes.remove(title.lower(), title)
+
+    def get_notes(self) -> list:
+        return self.__select("ORDER BY id")
+
+    def titles_starting_with(self, prefix: str, limit: int | None = None) -> List[str]:
+        """
+        Finds the titles starting with the prefix, to complete a title being typed.
+        Only the titles are read from the database to build the tree.
+        """
+        if self.prefixes is None:
+            self.prefixes = PrefixTrie()
+            for (title,) in self.connection.execute("SELECT title FROM notes"):
+                self.prefixes.add(title.lower(), title)
+        return self.prefixes.items(prefix.lower(), limit)
+
+    def get_note_by_title(self, title: str) -> Note:
+        notes = self.__select("WHERE title = ?", [title])
+        return notes[0] if notes else None
+
+    def update_note(self, note_base: Note, new_note: Note):
+        """
+        Updates a left note with non-empty fields of a right note.
+        Parameters:
+            note_base (Note): A Note to update
+            new_note (Note): A Note with fields to update
+        """
+        if len(new_note.title) > 0 and new_note.title != note_base.title:
+            note_base.title = new_note.title
+        if len(new_note.body) > 0:
+            note_base.body = new_note.body
+        if len(new_note.tags) > 0:
+            note_base.tags = new_note.tags
+
+    def note_changing(self, note: Note, new_title: str | None = None):
+        """
+        Checks that a note of this book can be changed, right before it gets changed.
+        Parameters:
+            note (Note): The note about to change.
+            new_title (str | None): The title the note gets, if it's renamed.
+        Raises:
+            ValueError: If another note of the book has the new title.
+        """
+        if new_title is None or new_title == note.title:
+            return
+        if self.connection.execute("SELECT 1 FROM notes WHERE title = ?", (new_title,)).fetchone() is not None:
+            raise ValueError("Note with this title already exists")
+
+    def note_changed(self, note: Note, old_title: str):
+        """
+        Writes a changed note back to the database.
+        Parameters:
+            note (Note): The changed note.
+            old_title (str): The title of the note before the change.
+        """
+        try:
+            with self.connection:
+                note_id = self.connection.execute("SELECT id FROM notes WHERE title = ?", (old_title,)).fetchone()[0]
+                self.connection.execute("UPDATE notes SET title = ?, lower_title = ?, body = ?, lower_body = ? WHERE id = ?",
+                                        (note.title, note.lower_title, note.body, note.lower_body, note_id))
+                self.connection.execute("DELETE FROM note_tags WHERE note_id = ?", (note_id,))
+                self.__insert_tags(note_id, note)
+        except sqlite3.IntegrityError:
+            raise ValueError("Note with this title already exists")
+        if self.prefixes is not None and note.title != old_title:
+            self.prefixes.remove(old_title.lower(), old_title)
+            self.prefixes.add(note.title.lower(), note.title)
+
+    def search(self, keyword: str, field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL, sort: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.EMPTY, direction_text: str = "asc",
+               limit: int | None = None, offset: int = 0) -> None:
+        if field not in NOTES_BOOK_FIELDS or sort not in NOTES_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+
+        condition, params = self.__query_filter(keyword, field)
+        if keyword.startswith(TAGS_QUERY_PREFIX) or keyword.startswith(RANKED_QUERY_PREFIX):
+            # a query is not highlighted in the notes
+            keyword = ""
+        total = len(self) if not condition else None
+        clause, page_params = page_clause(limit, offset)
+        page = paginate(self.__iter_select(condition + self.__order_by(condition, sort, direction_text) + clause, params + page_params),
+                        offset, limit, total, skipped=True)
+
+        view = NotesBookView(page.items)
+        view.sort_column = Sort(column=sort, order=direction_text)
+        view.keyword = keyword
+        view.page = page
+        view.output()
+
+    def iter_search(self, keyword: str = "", field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL, sort: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.EMPTY, direction_text: str = "asc") -> Iterator[Note]:
+        """
+        Yields the notes search shows, reading them from the database a chunk at a time as they are consumed.
+        """
+        if field not in NOTES_BOOK_FIELDS or sort not in NOTES_BOOK_FIELDS:
+            raise KeyError(f"Field {field} not found.")
+        condition, params = self.__query_filter(keyword, field)
+        return self.__iter_select(condition + self.__order_by(condition, sort, direction_text), params)
+
+    def __order_by(self, condition: str, sort: NOTES_BOOK_FIELDS, direction_text: str) -> str:
+        if sort in self.columns:
+            # the notes with equal values keep the order they were added in, both ways, as in Notebook
+            return f" ORDER BY {self.columns[sort]} {'ASC' if direction_text == 'asc' else 'DESC'}, id"
+        # the ranked notes are joined with their ranks
+        return " ORDER BY rank" if condition.startswith("JOIN") else " ORDER BY id"
+
+    def iter_filter(self, keyword: str = "", field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL) -> Iterator[Note]:
+        """
+        Yields the notes search would show for the keyword one by one, unsorted.
+        """
+        condition, params = self.__query_filter(keyword, field)
+        condition += " ORDER BY rank" if condition.startswith("JOIN") else " ORDER BY id"
+        return self.__iter_select(condition, params)
+
+    def __query_filter(self, keyword: str, field: NOTES_BOOK_FIELDS):
+        if keyword.startswith(TAGS_QUERY_PREFIX):
+            return self.__tags_query_filter(keyword)
+        if keyword.startswith(RANKED_QUERY_PREFIX):
+            return self.__ranked_filter(keyword[len(RANKED_QUERY_PREFIX):], RANKED_SEARCH_LIMIT)
+        return self.__filter(keyword, field)
+
+    def search_ranked(self, query: str, limit: int = RANKED_SEARCH_LIMIT) -> List[tuple]:
+        """
+        Finds the notes best matching the words of the query in their titles and bodies, ranked by BM25.
+        Returns the notes with their scores, best first.
+        """
+        condition, params = self.__ranked_filter(query, limit)
+        return list(self.__iter_select(condition + " ORDER BY rank", params, scored=True))
+
+    @staticmethod
+    def __ranked_filter(query: str, limit: int):
+        words = tokenize(query)
+        if not words:
+            return "WHERE 0", []
+        match = " OR ".join(f'"{word}"' for word in words)
+        return ("JOIN (SELECT rowid AS fts_id, rank FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rank LIMIT ?) "
+                "ON fts_id = notes.id"), [match, limit]
+
+    def query_tags(self, query: str) -> List[Note]:
+        """
+        Finds the notes by a boolean query over their exact (case-insensitive) tags.
+        See notes_book.parse_tags_query for the query syntax.
+        """
+        condition, params = self.__tags_query_filter(query)
+        return self.__select(condition + " ORDER BY id", params)
+
+    def get_tag_counts(self) -> List[tuple]:
+        """
+        Returns the normalized tags with the number of notes having them, most used first.
+        """
+        return self.connection.execute(
+            "SELECT normalized_tag, count(DISTINCT note_id) AS notes FROM note_tags "
+            "WHERE normalized_tag != '' GROUP BY normalized_tag ORDER BY notes DESC, normalized_tag").fetchall()
+
+    @staticmethod
+    def __tags_query_filter(query: str):
+        required, excluded = parse_tags_query(query)
+        has_tag = "SELECT note_id FROM note_tags WHERE normalized_tag = ?"
+        conditions, params = [], []
+        for groups in required:
+            alternatives = [" INTERSECT ".join([has_tag] * len(group)) for group in groups]
+            conditions.append(f"id IN ({' UNION '.join(alternatives)})")
+            params += [tag for group in groups for tag in group]
+        for tag in excluded:
+            conditions.append(f"id NOT IN ({has_tag})")
+            params.append(tag)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+    def __filter(self, keyword: str, field: NOTES_BOOK_FIELDS):
+        if not keyword and field == NOTES_BOOK_FIELDS.ALL:
+            return "", []
+        # an empty keyword still matches only the notes having a tag in the tags, as in Notebook
+
+        keyword = keyword.lower()
+        tags_condition = "EXISTS (SELECT 1 FROM note_tags WHERE note_id = notes.id AND instr(lower_tag, ?))"
+        match field:
+            case NOTES_BOOK_FIELDS.ALL:
+                conditions = [f"instr({column}, ?)" for column in self.text_columns.values()] + [tags_condition]
+                return f"WHERE {' OR '.join(conditions)}", [keyword] * len(conditions)
+            case NOTES_BOOK_FIELDS.TITLE | NOTES_BOOK_FIELDS.BODY:
+                return f"WHERE instr({self.text_columns[field]}, ?)", [keyword]
+            case NOTES_BOOK_FIELDS.TAGS:
+                return f"WHERE {tags_condition}", [keyword]
+
+        return "", []
+
+    def __select(self, condition: str = "", params: list = None) -> List[Note]:
+        return list(self.__iter_select(condition, params))
+
+    def __iter_select(self, condition: str = "", params: list = None, scored: bool = False) -> Iterator[Note]:
+        """
+        Yields the selected notes, reading them from the database a chunk at a time.
+        If scored, the condition joins the ranks and the notes are yielded with their scores.
+        """
+        columns = "id, title, body, -rank" if scored else "id, title, body"
+        cursor = self.connection.execute(f"SELECT {columns} FROM notes {condition}", params or [])
+        while rows := cursor.fetchmany(SELECT_CHUNK_SIZE):
+            tags = {}
+            ids = [row[0] for row in rows]
+            for note_id, tag in self.connection.execute(
+                    f"SELECT note_id, tag FROM note_tags WHERE note_id IN ({','.join('?' * len(ids))}) ORDER BY note_id, position", ids):
+                tags.setdefault(note_id, []).append(tag)
+            for note_id, title, body, *score in rows:
+                note = Note(title, body)
+                note.tags = tags.get(note_id, [])
+                note.book = self
+                yield (note, *score) if scored else note
+
+    def __insert(self, note: Note):
+        cursor = self.connection.execute("INSERT INTO notes (title, lower_title, body, lower_body) VALUES (?, ?, ?, ?)",
+                                         (note.title, note.lower_title, note.body, note.lower_body))
+        self.__insert_tags(cursor.lastrowid, note)
+
+    def __insert_tags(self, note_id: int, note: Note):
+        self.connection.executemany(
+            "INSERT INTO note_tags (note_id, position, tag, lower_tag, normalized_tag) VALUES (?, ?, ?, ?, ?)",
+            [(note_id, position, tag, lower_tag, normalize_tag(tag)) for position, (tag, lower_tag) in enumerate(zip(note.tags, note.lower_tags))])
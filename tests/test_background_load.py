@@ -0,0 +1,134 @@
+"""
+Checks that the books loaded in background are the books loaded right away,
+that a book failed to load is not saved over the file it failed to load from,
+that the garbage collector is paused until the pauses of all the threads end,
+and that the app starts without the modules of the storages and commands not used.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import serialization
+from address_book import AddressBook
+from benchmarks.data import make_notes, make_records
+from field import collection_paused
+from notes_book import Notebook
+from serialization import BackgroundLoad, load_books, load_contacts, load_notes, loaded, save_data, save_loaded
+
+CONTACTS_FILE = "addressbook.pkl"
+NOTES_FILE = "notes.pkl"
+# the modules imported by the storages and the commands using them only
+LAZY_MODULES = ["sqlite3", "sqlite_storage", "columnar_storage", "numpy", "readline", "importer", "exporter",
+                "duplicates", "multiprocessing"]
+
+
+def fail_to_load(**_kwargs):
+    raise ValueError("Unreadable book")
+
+
+class BackgroundLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        patcher = mock.patch.object(serialization, "app_folder", self.folder.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        contacts = AddressBook()
+        contacts.add_records(make_records(20))
+        save_data(contacts, CONTACTS_FILE)
+        notes = Notebook()
+        notes.add_notes(make_notes(20))
+        save_data(notes, NOTES_FILE)
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.folder.name, filename)
+
+    def test_loaded_books(self):
+        address_book, notes_book = load_books()
+        self.assertIsInstance(address_book, BackgroundLoad)
+        self.assertEqual([str(record) for record in load_contacts().values()],
+                         [str(record) for record in loaded(address_book).values()])
+        self.assertEqual([str(note) for note in load_notes()], [str(note) for note in loaded(notes_book)])
+        self.assertIs(loaded(address_book), loaded(address_book, wait=False))
+
+    def test_load_error_raised(self):
+        book = BackgroundLoad(fail_to_load)
+        with self.assertRaisesRegex(ValueError, "Unreadable book"):
+            loaded(book)
+
+    def test_failed_book_not_saved(self):
+        with open(self.path(CONTACTS_FILE), "rb") as f:
+            saved = f.read()
+        address_book, notes_book = BackgroundLoad(fail_to_load), BackgroundLoad(load_notes, NOTES_FILE)
+        loaded(notes_book).add_note(next(make_notes(1, seed=1)))
+        expected = [str(note) for note in loaded(notes_book)]
+
+        save_loaded(address_book)
+        save_loaded(notes_book, filename=NOTES_FILE)
+
+        with open(self.path(CONTACTS_FILE), "rb") as f:
+            self.assertEqual(saved, f.read())
+        self.assertEqual(expected, [str(note) for note in load_notes()])
+
+
+class CollectionPausedTest(unittest.TestCase):
+    def test_paused_until_all_threads_resume(self):
+        self.assertTrue(gc.isenabled())
+        entered, leave = threading.Event(), threading.Event()
+
+        def pause():
+            with collection_paused():
+                entered.set()
+                leave.wait()
+
+        thread = threading.Thread(target=pause, daemon=True)
+        try:
+            with collection_paused():
+                thread.start()
+                entered.wait()
+            # the pause of this thread has ended while the other thread is still in its own
+            self.assertFalse(gc.isenabled())
+        finally:
+            leave.set()
+            thread.join()
+        self.assertTrue(gc.isenabled())
+
+    def test_disabled_collector_kept_disabled(self):
+        gc.disable()
+        self.addCleanup(gc.enable)
+        with collection_paused():
+            pass
+        self.assertFalse(gc.isenabled())
+
+
+class LazyImportTest(unittest.TestCase):
+    def imported(self, code: str) -> list:
+        """
+        Runs the code in a new interpreter and returns which of LAZY_MODULES it has imported.
+        """
+        project_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with tempfile.TemporaryDirectory() as home:
+            result = subprocess.run(
+                [sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"],
+                cwd=project_folder, env=os.environ | {"HOME": home}, capture_output=True, text=True, check=True)
+        return result.stdout.split()
+
+    def test_app_started_without_lazy_modules(self):
+        self.assertEqual([], self.imported("import new_main"))
+
+    def test_storage_imported_when_opened(self):
+        imported = self.imported("import serialization\nserialization.load_contacts(storage='sqlite').close()")
+        self.assertIn("sqlite_storage", imported)
+        self.assertNotIn("columnar_storage", imported)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Checks that a script of commands is run on the books without asking for anything,
+with the status of every command written as a tab separated line.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import contextlib
+import io
+import unittest
+
+from address_book import AddressBook
+from batch import run_batch
+from notes_book import Notebook
+
+SCRIPT = """# a comment and an empty line are skipped
+
+add-contact John email:john@gmail.com
+add-contact John
+add-note plan body:release tags:work,urgent
+edit-note plan body:released
+edit-note missing body:anything
+edit-contact missing email:missing@gmail.com
+delete-note missing
+show-birthdays abc
+exit
+add-contact Never
+"""
+
+
+class BatchTest(unittest.TestCase):
+    def run_script(self, script: str):
+        self.address_book, self.notes_book = AddressBook(), Notebook()
+        status = io.StringIO()
+        # the views and the errors are printed, only the status is checked
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            summary = run_batch(io.StringIO(script), self.address_book, self.notes_book, status)
+        return summary, [line.split("\t") for line in status.getvalue().splitlines()]
+
+    def test_status(self):
+        summary, status = self.run_script(SCRIPT)
+
+        self.assertEqual([(3, "ok"), (4, "error"), (5, "ok"), (6, "ok"), (7, "error"), (8, "error"), (9, "error"),
+                          (10, "error"), (11, "ok")],
+                         [(int(number), result) for number, result, _message in status])
+        self.assertTrue(all("\n" not in message for _number, _result, message in status))
+        self.assertIn("missing", status[4][2])
+        self.assertEqual((9, 5, True), (summary.commands, summary.failed, summary.stopped))
+
+    def test_books_changed(self):
+        self.run_script(SCRIPT)
+
+        self.assertEqual(["John"], list(self.address_book))
+        self.assertEqual("john@gmail.com", self.address_book.find("John").email.value)
+        note = self.notes_book.get_note_by_title("plan")
+        self.assertEqual(("released", ("work", "urgent")), (note.body, note.tags))
+        self.assertEqual(1, len(self.notes_book))
+
+
+if __name__ == "__main__":
+    unittest.main()
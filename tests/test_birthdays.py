@@ -0,0 +1,59 @@
+"""
+Checks that the contacts are found by their birthdays in the order of the birthdays,
+and the contacts with the same birthday in the order they were added in.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import unittest
+from datetime import date, timedelta
+
+from address_book import AddressBook
+from field import Date
+from record import Record
+
+# the birthdays are this many days from today, in the year 2000 to have February 29
+OFFSETS = [2, 1, 3, 1, 2, 1, 3, 2]
+
+
+def birthday(offset: int) -> str:
+    day = date.today() + timedelta(days=offset)
+    return day.replace(year=2000).strftime("%d.%m.%Y")
+
+
+class BirthdaysTest(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        self.offsets = {}
+        records = []
+        for number, offset in enumerate(OFFSETS):
+            record = Record(f"Contact {number}")
+            record.add_birthday(birthday(offset))
+            records.append(record)
+            self.offsets[record.name.value] = offset
+        self.book.add_record(records[0])
+        self.book.add_records(records[1:])
+
+    def expected(self) -> list:
+        # a stable sort of the contacts in the order they were added in
+        return sorted(self.book, key=self.offsets.__getitem__)
+
+    def test_upcoming_birthdays(self):
+        self.assertEqual(self.expected(), [record.name.value for record in self.book.iter_upcoming_birthdays(7)])
+
+    def test_by_date(self):
+        names = [record.name.value for record in self.book.iter_by_date(None, None)]
+        self.assertEqual(sorted(self.book, key=lambda name: self.book.find(name).birthday.value), names)
+        low = Date(birthday(1))
+        self.assertEqual([name for name in names if self.offsets[name] == 1],
+                         [record.name.value for record in self.book.iter_by_date(low, low)])
+
+    def test_renamed_contact_moved_to_end(self):
+        self.book.find("Contact 1").edit_name("Renamed")
+        self.offsets["Renamed"] = self.offsets.pop("Contact 1")
+        self.assertEqual("Renamed", list(self.book)[-1])
+        self.assertEqual(self.expected(), [record.name.value for record in self.book.iter_upcoming_birthdays(7)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Checks that Tab completes the commands, the contact names, the note titles and the options,
+in every storage, and that the completions follow the changes of the books.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+from address_book import AddressBook
+from benchmarks.data import make_notes, make_records
+from columnar_storage import ColumnarAddressBook
+from commands import COMPLETION_LIMIT, CommandsCompleter, command_signatures
+from note import Note
+from notes_book import Notebook
+from record import Record
+from serialization import BackgroundLoad
+from sqlite_storage import SqliteAddressBook, SqliteNotebook
+
+NAMES = ["John Smith", "john doe", "Jane", "Johnny"]
+TITLES = ["plan", "Plans", "idea"]
+PREFIXES = ["", "a", "Ol", "оле", "ірин", "zz"]
+
+
+def completer(address_book, notes_book) -> CommandsCompleter:
+    return CommandsCompleter([f"{command} " for command in command_signatures], address_book, notes_book)
+
+
+class CompletionTest(unittest.TestCase):
+    def setUp(self):
+        self.address_book = AddressBook()
+        for name in NAMES:
+            self.address_book.add_record(Record(name))
+        self.notes_book = Notebook()
+        for title in TITLES:
+            self.notes_book.add_note(Note(title, "body"))
+        self.completer = completer(self.address_book, self.notes_book)
+
+    def matches(self, line: str) -> list:
+        # readline completes the last word of the line, the words are delimited by spaces
+        return self.completer.get_matches(line.split(" ")[-1], line)
+
+    def test_commands(self):
+        self.assertEqual(["edit-contact ", "edit-note "], self.matches("edit-"))
+        self.assertEqual([], self.matches("frob x"))
+
+    def test_names(self):
+        # the names with spaces are quoted, for readline to insert their common start
+        self.assertEqual(['"john doe" ', '"John Smith" ', '"Johnny" '], self.matches("edit-contact jo"))
+        self.assertEqual(["Johnny "], self.matches("delete-contact johnn"))
+        self.assertEqual(['Smith" '], self.matches('edit-contact "John S'))
+
+    def test_titles(self):
+        self.assertEqual(["plan ", "Plans "], self.matches("delete-note pl"))
+        self.assertEqual(["idea "], self.matches("edit-note i"))
+
+    def test_options(self):
+        self.assertEqual(["field:Title ", "field:Body ", "field:Tags "], self.matches("search-notes field:"))
+        self.assertEqual(["sort:Title:asc ", "sort:Title:desc "], self.matches("search-notes sort:Title:"))
+        self.assertEqual(["field:Name ", "field:Phone ", "field:Email ", "field:Address ", "field:Birthday "],
+                         self.matches("search-contacts field:"))
+
+    def test_changes_followed(self):
+        self.matches("edit-contact jo")
+        self.address_book.find("Johnny").edit_name("Jack")
+        self.address_book.delete("john doe")
+        self.address_book.add_record(Record("Joan"))
+        # all of the names are quoted if one of them has to be
+        self.assertEqual(['"Joan" ', '"John Smith" '], self.matches("edit-contact jo"))
+
+        self.matches("edit-note pl")
+        self.notes_book.get_note_by_title("plan").title = "idea 2"
+        self.assertEqual(["Plans "], self.matches("edit-note pl"))
+
+    def test_books_being_loaded(self):
+        loading = threading.Event()
+
+        def load():
+            loading.wait()
+            return self.address_book
+
+        address_book = BackgroundLoad(load)
+        try:
+            # the completion doesn't wait for the books
+            self.assertEqual([], completer(address_book, self.notes_book).get_matches("jo", "edit-contact jo"))
+        finally:
+            loading.set()
+        address_book.result()
+        self.assertEqual(["Johnny "], completer(address_book, self.notes_book).get_matches("johnn", "edit-contact johnn"))
+
+
+class StoragesCompletionTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.address_books = {
+            "objects": AddressBook(),
+            "columnar": ColumnarAddressBook(),
+            "sqlite": SqliteAddressBook(os.path.join(folder.name, "contacts.db")),
+        }
+        self.notes_books = {"objects": Notebook(), "sqlite": SqliteNotebook(os.path.join(folder.name, "notes.db"))}
+        for book in (self.address_books["sqlite"], self.notes_books["sqlite"]):
+            self.addCleanup(book.close)
+        for book in self.address_books.values():
+            book.add_records(make_records(200))
+        for book in self.notes_books.values():
+            book.add_notes(make_notes(200))
+        self.names = [record.name.value for record in make_records(200)]
+        self.titles = [note.title for note in make_notes(200)]
+
+    def test_names(self):
+        for storage, book in self.address_books.items():
+            for prefix in PREFIXES:
+                with self.subTest(storage=storage, prefix=prefix):
+                    expected = sorted((name for name in self.names if name.lower().startswith(prefix.lower())), key=str.lower)
+                    self.assertEqual(expected, book.names_starting_with(prefix))
+                    self.assertEqual(expected[:COMPLETION_LIMIT], book.names_starting_with(prefix, COMPLETION_LIMIT))
+
+    def test_titles(self):
+        for storage, book in self.notes_books.items():
+            for prefix in PREFIXES:
+                with self.subTest(storage=storage, prefix=prefix):
+                    expected = sorted((title for title in self.titles if title.lower().startswith(prefix.lower())), key=str.lower)
+                    self.assertEqual(expected, book.titles_starting_with(prefix))
+
+
+if __name__ == "__main__":
+    unittest.main()
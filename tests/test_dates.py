@@ -0,0 +1,65 @@
+"""
+Checks that parse_date accepts and rejects the same dates as trying every accepted format with strptime,
+the way the dates were parsed before.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import itertools
+import unittest
+from datetime import datetime
+
+from field import parse_date
+
+FORMATS = ["%d.%m.%Y", "%d %m %Y", "%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y"]
+
+
+def strptime_date(value: str) -> datetime | None:
+    for date_format in FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def numbers(values) -> list:
+    """
+    Returns the numbers written zero-padded, space-padded and unpadded, and the numbers themselves.
+    """
+    return sorted({text for value in values for text in (f"{value:02}", f"{value:2}", str(value))})
+
+
+DAYS = numbers([0, 1, 5, 9, 10, 19, 28, 29, 30, 31, 32])
+MONTHS = numbers([0, 1, 2, 9, 12, 13])
+YEARS = ["1990", "2000", "2024", "0999", "199", "19900"]
+OTHER_VALUES = [
+    "", " ", ".", "1.2", "1990", "01.02.1990 ", " 01.02.1990", "01.02-1990", "01/02.1990", "1990-02-01-01",
+    "01 02\t1990", "01  02   1990", "01\n02\n1990", "1990 02 01", "1990/02/01", "+1.02.1990", "-1-02-1990",
+    "01.02.199O", "٠١.٠٢.١٩٩٠", "１.02.1990", "1990-٠٢-01",
+]
+
+
+class ParseDateTest(unittest.TestCase):
+    def assert_same(self, values):
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(strptime_date(value), parse_date(value))
+
+    def test_day_month_year(self):
+        self.assert_same(f"{day}{separator}{month}{separator}{year}"
+                         for day, month, year in itertools.product(DAYS, MONTHS, YEARS)
+                         for separator in (".", "/", "-", " "))
+
+    def test_year_month_day(self):
+        self.assert_same(f"{year}-{month}-{day}" for day, month, year in itertools.product(DAYS, MONTHS, YEARS))
+
+    def test_other_values(self):
+        self.assert_same(OTHER_VALUES)
+
+    def test_leap_days(self):
+        self.assert_same(["29.02.2024", "29.02.2023", "29.02.2000", "29.02.1900", "2024-02-29", "2023-2-29"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Checks that the duplicate contacts are found and merged the same in every storage.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import os
+import tempfile
+import unittest
+
+from address_book import AddressBook
+from benchmarks.data import make_records
+from columnar_storage import ColumnarAddressBook
+from duplicates import MAX_BLOCK_SIZE, SAME_EMAIL, SAME_NAME, SAME_PHONE, find_duplicates, merge_duplicates
+from record import Record
+from sqlite_storage import SqliteAddressBook
+
+
+def add_duplicates(book):
+    first = Record("John Smith")
+    first.add_phone("0501112233")
+    book.add_record(first)
+    reversed_name = Record("smith john")
+    reversed_name.add_email("js@example.com")
+    reversed_name.add_birthday("01.02.1990")
+    reversed_name.add_phone("0671112233")
+    book.add_record(reversed_name)
+    same_phone = Record("Jon Smyth")
+    same_phone.add_phone("0671112233")
+    same_phone.add_address("Kyiv")
+    book.add_record(same_phone)
+    same_email = Record("Other")
+    same_email.add_email("JS@example.com")
+    book.add_record(same_email)
+
+
+class DuplicatesTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.books = {
+            "objects": AddressBook(),
+            "columnar": ColumnarAddressBook(),
+            "sqlite": SqliteAddressBook(os.path.join(folder.name, "contacts.db")),
+        }
+        self.addCleanup(self.books["sqlite"].close)
+        for book in self.books.values():
+            book.add_records(make_records(100))
+            add_duplicates(book)
+
+    def test_found(self):
+        for storage, book in self.books.items():
+            with self.subTest(storage=storage):
+                groups = [group for group in find_duplicates(book) if "John Smith" in group.names]
+                self.assertEqual(1, len(groups))
+                self.assertEqual(["John Smith", "smith john", "Jon Smyth", "Other"], groups[0].names)
+                self.assertEqual(sorted([SAME_EMAIL, SAME_NAME, SAME_PHONE]), sorted(groups[0].reasons))
+
+    def test_large_block_found(self):
+        # the contacts sharing the phone of an office, more than are compared pairwise
+        names = [f"Office {number:02}" for number in range(MAX_BLOCK_SIZE + 5)]
+        for book in self.books.values():
+            for name in names:
+                record = Record(name)
+                record.add_phone("0441234567")
+                book.add_record(record)
+        for storage, book in self.books.items():
+            with self.subTest(storage=storage):
+                groups = [group for group in find_duplicates(book) if names[0] in group.names]
+                self.assertEqual([names], [group.names for group in groups])
+
+    def test_same_groups(self):
+        expected = find_duplicates(self.books["objects"])
+        for storage, book in self.books.items():
+            with self.subTest(storage=storage):
+                self.assertEqual(expected, find_duplicates(book))
+
+    def test_merged(self):
+        for storage, book in self.books.items():
+            with self.subTest(storage=storage):
+                groups = find_duplicates(book)
+                count = len(list(book.iter_filter()))
+
+                merged = merge_duplicates(book, groups)
+
+                self.assertEqual(sum(len(group.names) - 1 for group in groups), merged)
+                self.assertEqual(count - merged, len(list(book.iter_filter())))
+                self.assertEqual("Contact name: John Smith, phones: 0501112233, 0671112233, email: js@example.com, "
+                                 "birthday: 01.02.1990, address: Kyiv", str(book.find("John Smith")))
+                for name in ("smith john", "Jon Smyth", "Other"):
+                    self.assertIsNone(book.find(name))
+                self.assertEqual([], find_duplicates(book))
+
+
+if __name__ == "__main__":
+    unittest.main()
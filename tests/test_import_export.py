@@ -0,0 +1,239 @@
+"""
+Checks that the exported contacts and notes are imported back the same, from every storage,
+and that the invalid rows of an import are rejected with their reasons.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from address_book import AddressBook
+from benchmarks.data import make_notes, make_records
+from columnar_storage import ColumnarAddressBook
+from exporter import export_contacts, export_notes
+import importer
+from importer import import_contacts, import_notes
+from notes_book import Notebook
+from record import ADDRESS_BOOK_FIELDS
+from sqlite_storage import SqliteAddressBook, SqliteNotebook
+
+COUNT = 200
+
+
+def contacts(book) -> list:
+    return [str(record) for record in book.iter_filter()]
+
+
+def notes(book) -> list:
+    return [(note.title, note.body, list(note.tags)) for note in book.iter_filter()]
+
+
+class ImportExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.folder.name, filename)
+
+    def write(self, filename: str, text: str) -> str:
+        path = self.path(filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def rejected(self, path: str) -> list:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+
+class RoundTripTest(ImportExportTestCase):
+    def contact_books(self) -> dict:
+        books = {
+            "objects": AddressBook(),
+            "columnar": ColumnarAddressBook(),
+            "sqlite": SqliteAddressBook(self.path("contacts.db")),
+        }
+        self.addCleanup(books["sqlite"].close)
+        for book in books.values():
+            book.add_records(make_records(COUNT))
+        return books
+
+    def test_contacts(self):
+        for storage, book in self.contact_books().items():
+            for extension in ("csv", "jsonl"):
+                with self.subTest(storage=storage, format=extension):
+                    path = self.path(f"{storage}.{extension}")
+                    self.assertEqual(COUNT, export_contacts(book, path))
+                    imported = AddressBook()
+                    result = import_contacts(imported, path, workers=0)
+                    self.assertEqual((COUNT, 0, None), result)
+                    self.assertEqual(contacts(book), contacts(imported))
+
+    def test_contacts_in_worker_processes(self):
+        book = self.contact_books()["objects"]
+        path = self.path("contacts.jsonl")
+        export_contacts(book, path)
+        imported = AddressBook()
+        self.assertEqual((COUNT, 0, None), import_contacts(imported, path, batch_size=30, workers=2))
+        self.assertEqual(contacts(book), contacts(imported))
+
+    def test_workers_only_for_many_batches(self):
+        book = self.contact_books()["objects"]
+        path = self.path("contacts.jsonl")
+        export_contacts(book, path)
+        # a single batch is validated in this process, and no more workers are started than there are batches
+        for batch_size, workers in ((COUNT, None), (COUNT // 2, 2), (COUNT // 4, 4)):
+            executor = mock.Mock(wraps=importer.ProcessPoolExecutor)
+            with self.subTest(batch_size=batch_size), mock.patch.object(importer, "ProcessPoolExecutor", executor):
+                imported = AddressBook()
+                self.assertEqual((COUNT, 0, None), import_contacts(imported, path, batch_size=batch_size, workers=16))
+                self.assertEqual(contacts(book), contacts(imported))
+                if workers is None:
+                    executor.assert_not_called()
+                else:
+                    self.assertEqual(workers, executor.call_args.kwargs["max_workers"])
+
+    def test_filtered_and_sorted_contacts(self):
+        book = self.contact_books()["objects"]
+        path = self.path("filtered.csv")
+        records = list(book.iter_search("ko", ADDRESS_BOOK_FIELDS.NAME, ADDRESS_BOOK_FIELDS.EMAIL, "desc"))
+        self.assertEqual(len(records), export_contacts(book, path, keyword="ko", field=ADDRESS_BOOK_FIELDS.NAME,
+                                                       sort=ADDRESS_BOOK_FIELDS.EMAIL, direction_text="desc"))
+        imported = AddressBook()
+        import_contacts(imported, path, workers=0)
+        self.assertEqual([str(record) for record in records], contacts(imported))
+
+    def test_compressed_contacts(self):
+        book = self.contact_books()["objects"]
+        export_contacts(book, self.path("contacts.csv"))
+        export_contacts(book, self.path("contacts.csv.gz"))
+        with open(self.path("contacts.csv"), encoding="utf-8", newline="") as f, \
+                gzip.open(self.path("contacts.csv.gz"), "rt", encoding="utf-8", newline="") as compressed:
+            self.assertEqual(f.read(), compressed.read())
+
+    def test_notes(self):
+        books = {"objects": Notebook(), "sqlite": SqliteNotebook(self.path("notes.db"))}
+        self.addCleanup(books["sqlite"].close)
+        for storage, book in books.items():
+            book.add_notes(make_notes(COUNT))
+            for extension in ("csv", "jsonl"):
+                with self.subTest(storage=storage, format=extension):
+                    path = self.path(f"{storage}.{extension}")
+                    self.assertEqual(COUNT, export_notes(book, path))
+                    imported = Notebook()
+                    self.assertEqual((COUNT, 0, None), import_notes(imported, path, workers=0))
+                    self.assertEqual(notes(book), notes(imported))
+
+
+class RejectedRowsTest(ImportExportTestCase):
+    def test_invalid_contacts_rejected(self):
+        path = self.write("contacts.csv", "\n".join([
+            "name,phones,email,birthday,address",
+            "Anna,0501112233,anna@example.com,01.02.1990,Kyiv",
+            ",0501112233,,,",
+            "Bohdan,12345,,,",
+            "Dmytro,0501112244,not an email,,",
+            "Eduard,,,31.02.1990,",
+            "Anna,0509998877,,,",
+            "Iryna,0501112255 0501112266,,,Lviv",
+        ]) + "\n")
+        book = AddressBook()
+        book.add_records(make_records(1))
+
+        result = import_contacts(book, path, workers=0)
+
+        self.assertEqual((2, 5), (result.imported, result.rejected))
+        self.assertEqual(["Anna", "Iryna"], [name for name in book if name in ("Anna", "Iryna")])
+        self.assertEqual(["0501112255", "0501112266"], [phone.value for phone in book.find("Iryna").phones])
+        rejected = self.rejected(result.rejected_path)
+        self.assertEqual([3, 4, 5, 6, 7], [row["line"] for row in rejected])
+        self.assertEqual(["Bohdan", "Dmytro", "Eduard", "Anna"], [row["row"]["name"] for row in rejected[1:]])
+        self.assertTrue(all(row["error"] for row in rejected))
+        self.assertEqual("Anna already exists.", rejected[-1]["error"])
+
+    def test_invalid_json_rejected(self):
+        path = self.write("contacts.jsonl", "\n".join([
+            '{"name": "Anna", "phones": ["0501112233"]}',
+            '{"name": "Bohdan"',
+            '["Dmytro"]',
+            '{"Name": "Eduard", "Phone": "0501112244"}',
+        ]) + "\n")
+        book = AddressBook()
+
+        result = import_contacts(book, path, workers=0)
+
+        self.assertEqual((2, 2), (result.imported, result.rejected))
+        self.assertEqual(["Anna", "Eduard"], list(book))
+        self.assertEqual([2, 3], [row["line"] for row in self.rejected(result.rejected_path)])
+
+    def test_no_rejected_file_without_rejected_rows(self):
+        path = self.write("contacts.csv", "name,phones\nAnna,0501112233\n")
+
+        self.assertEqual((1, 0, None), import_contacts(AddressBook(), path, workers=0))
+        self.assertFalse(os.path.exists(path + ".rejected.jsonl"))
+
+    def test_invalid_notes_rejected(self):
+        path = self.write("notes.jsonl", "\n".join([
+            '{"title": "plan", "body": "release", "tags": ["work", "urgent"]}',
+            '{"title": "", "body": ""}',
+            '{"title": "plan", "body": "again"}',
+            '{"title": "idea", "body": "draft", "tags": "home,later"}',
+        ]) + "\n")
+        book = Notebook()
+
+        result = import_notes(book, path, workers=0)
+
+        self.assertEqual((2, 2), (result.imported, result.rejected))
+        self.assertEqual([("plan", "release", ["work", "urgent"]), ("idea", "draft", ["home", "later"])], notes(book))
+        self.assertEqual([2, 3], [row["line"] for row in self.rejected(result.rejected_path)])
+
+
+class VcardTest(ImportExportTestCase):
+    def test_contacts_imported(self):
+        path = self.write("contacts.vcf", "\r\n".join([
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            "FN:Anna Kozachenko",
+            "TEL;TYPE=cell:+380501112233",
+            "TEL;TYPE=work:+38 (050) 111-22-44",
+            "item1.EMAIL;TYPE=INTERNET:anna@example.com",
+            "BDAY:1990-02-01",
+            "ADR;TYPE=home:;;1 Khreshchatyk st;Kyiv;;01001;",
+            " Ukraine",
+            "END:VCARD",
+            "BEGIN:VCARD",
+            "VERSION:4.0",
+            "N:Melnyk;Taras;;;",
+            "TEL;VALUE=uri:tel:0501112255",
+            "BDAY:19851231",
+            "END:VCARD",
+            "BEGIN:VCARD",
+            "FN:Olena",
+            "TEL:12345",
+            "END:VCARD",
+        ]) + "\r\n")
+        book = AddressBook()
+
+        result = import_contacts(book, path, workers=0)
+
+        self.assertEqual((2, 1), (result.imported, result.rejected))
+        anna, taras = book.find("Anna Kozachenko"), book.find("Taras Melnyk")
+        self.assertEqual(["0501112233", "0501112244"], [phone.value for phone in anna.phones])
+        self.assertEqual("anna@example.com", anna.email.value)
+        self.assertEqual("01.02.1990", anna.birthday.value.strftime("%d.%m.%Y"))
+        self.assertEqual("1 Khreshchatyk st, Kyiv, 01001, Ukraine", anna.address.value)
+        self.assertEqual(["0501112255"], [phone.value for phone in taras.phones])
+        self.assertEqual("31.12.1985", taras.birthday.value.strftime("%d.%m.%Y"))
+        self.assertEqual([17], [row["line"] for row in self.rejected(result.rejected_path)])
+
+
+if __name__ == "__main__":
+    unittest.main()
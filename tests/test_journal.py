@@ -0,0 +1,176 @@
+"""
+Checks that the changes of a journaled book survive a crash, i.e. the app stopping without save_data,
+and that the journal merged into the snapshot leaves the same book.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import serialization
+from address_book import AddressBook
+from benchmarks.data import make_notes, make_records
+from notes_book import Notebook
+from serialization import load_book, read_snapshot, replay, save_data, write_snapshot
+
+CONTACTS_FILE = "addressbook.pkl"
+NOTES_FILE = "notesbook.pkl"
+
+
+def contacts(book: AddressBook) -> list:
+    return [str(record) for record in book.values()]
+
+
+def notes(book: Notebook) -> list:
+    return [(note.title, note.body, note.tags) for note in book]
+
+
+def saved_contacts() -> AddressBook:
+    book = AddressBook()
+    book.add_records(make_records(20))
+    return book
+
+
+def crash(book):
+    """
+    Stops using a journaled book the way a crash does, without closing the journal or saving the book.
+    """
+    book.journal.file.close()
+    if book.journal.compaction is not None:
+        book.journal.compaction.join()
+
+
+def change_contacts(book: AddressBook):
+    names = list(book)
+    book.delete(names[0])
+    book.find(names[1]).edit_name("Renamed Contact")
+    book.find(names[2]).add_email("changed@example.com")
+    book.find(names[3]).add_phone("0991112233")
+    book.add_record(next(make_records(1, seed=1)))
+
+
+def change_notes(book: Notebook):
+    titles = [note.title for note in book]
+    book.remove_note(titles[0])
+    book.get_note_by_title(titles[1]).title = "Renamed note"
+    book.get_note_by_title(titles[2]).body = "Changed body"
+    book.get_note_by_title(titles[3]).tags = ["changed"]
+    book.add_note(next(make_notes(1, seed=1)))
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(serialization, "app_folder", self.folder.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.folder.name, filename)
+
+    def test_contacts_survive_crash(self):
+        book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+        book.add_records(make_records(20))
+        change_contacts(book)
+        expected = contacts(book)
+        crash(book)
+
+        self.assertFalse(os.path.exists(self.path(CONTACTS_FILE)))
+        self.assertEqual(expected, contacts(load_book(CONTACTS_FILE, AddressBook)))
+
+    def test_notes_survive_crash(self):
+        book = load_book(NOTES_FILE, Notebook, journaled=True)
+        book.add_notes(make_notes(20))
+        change_notes(book)
+        expected = notes(book)
+        crash(book)
+
+        self.assertEqual(expected, notes(load_book(NOTES_FILE, Notebook)))
+
+    def test_journal_replayed_over_snapshot(self):
+        save_data(saved_contacts(), CONTACTS_FILE)
+        book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+        change_contacts(book)
+        expected = contacts(book)
+        crash(book)
+
+        self.assertEqual(expected, contacts(load_book(CONTACTS_FILE, AddressBook)))
+
+    def test_torn_entry_dropped(self):
+        # the entries torn by a crash in the middle of writing them, failing to unpickle in different ways
+        for torn in (b"\x80\x04\x95\x10\x00", b"\x80\x04X\x05\x00\x00\x00\xff\xfe\xfd\xfc\xfb.", b"N."):
+            with self.subTest(torn=torn):
+                for filename in os.listdir(self.folder.name):
+                    os.remove(self.path(filename))
+                book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+                book.add_records(make_records(20))
+                expected = contacts(book)
+                crash(book)
+                with open(self.path(CONTACTS_FILE + ".log"), "ab") as f:
+                    f.write(torn)
+
+                book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+                self.assertEqual(expected, contacts(book))
+                # the changes of the next session are appended after the complete entries
+                book.add_record(next(make_records(1, seed=1)))
+                expected = contacts(book)
+                crash(book)
+                self.assertEqual(expected, contacts(load_book(CONTACTS_FILE, AddressBook)))
+
+    def test_interrupted_compaction_finished(self):
+        save_data(saved_contacts(), CONTACTS_FILE)
+        book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+        change_contacts(book)
+        expected = contacts(book)
+        crash(book)
+        # the crash happened after the journal was rotated, before it was merged into the snapshot
+        os.replace(self.path(CONTACTS_FILE + ".log"), self.path(CONTACTS_FILE + ".log.old"))
+
+        self.assertEqual(expected, contacts(load_book(CONTACTS_FILE, AddressBook)))
+        book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+        save_data(book, CONTACTS_FILE)
+        self.assertFalse(os.path.exists(self.path(CONTACTS_FILE + ".log.old")))
+        self.assertEqual(expected, contacts(read_snapshot(self.path(CONTACTS_FILE), AddressBook)))
+
+    def test_merged_log_not_replayed_again(self):
+        book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+        book.add_record(next(make_records(1)))
+        name = next(iter(book))
+        book.find(name).edit_name("Renamed Contact")
+        expected = contacts(book)
+        crash(book)
+        # the crash happened after the rotated journal was merged into the snapshot, before it was removed
+        os.replace(self.path(CONTACTS_FILE + ".log"), self.path(CONTACTS_FILE + ".log.old"))
+        merged = read_snapshot(self.path(CONTACTS_FILE), AddressBook)
+        replay(merged, self.path(CONTACTS_FILE + ".log.old"))
+        write_snapshot(merged, self.path(CONTACTS_FILE))
+
+        self.assertEqual(expected, contacts(load_book(CONTACTS_FILE, AddressBook)))
+        book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+        book.add_record(next(make_records(1, seed=1)))
+        expected = contacts(book)
+        crash(book)
+        self.assertFalse(os.path.exists(self.path(CONTACTS_FILE + ".log.old")))
+        self.assertEqual(expected, contacts(load_book(CONTACTS_FILE, AddressBook)))
+
+    def test_compaction(self):
+        book = load_book(CONTACTS_FILE, AddressBook, journaled=True)
+        # every change rotates the journal unless a merge is running
+        book.journal.compact_threshold = 1
+        book.add_records(make_records(20))
+        change_contacts(book)
+        expected = contacts(book)
+        save_data(book, CONTACTS_FILE)
+
+        self.assertFalse(os.path.exists(self.path(CONTACTS_FILE + ".log.old")))
+        self.assertEqual(expected, contacts(load_book(CONTACTS_FILE, AddressBook)))
+
+
+if __name__ == "__main__":
+    unittest.main()
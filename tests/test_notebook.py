@@ -0,0 +1,100 @@
+"""
+Checks that the list methods of Notebook keep its indexes in sync with its notes,
+and that the lists made of a book leave its notes in it.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import unittest
+
+from benchmarks.data import make_notes
+from note import NOTES_BOOK_FIELDS, Note, normalize_tag
+from notes_book import Notebook
+
+COUNT = 20
+
+
+class NotebookTest(unittest.TestCase):
+    def setUp(self):
+        self.book = Notebook()
+        self.book.add_notes(make_notes(COUNT))
+
+    def assert_consistent(self, titles: list):
+        """
+        Checks that the book has the notes of the titles, in order, and finds them through every index.
+        """
+        self.assertEqual(titles, [note.title for note in self.book])
+        self.assertEqual(len(titles), len(self.book))
+        for note in self.book:
+            self.assertIs(note, self.book.get_note_by_title(note.title))
+            self.assertIs(self.book, note.book)
+        for note in self.book:
+            for keyword in (note.title, note.body.split()[0] if note.body else note.title):
+                self.assertEqual([n for n in self.book if n.match(keyword)], list(self.book.iter_filter(keyword)))
+            for tag in note.normalized_tags():
+                self.assertEqual([n for n in self.book if tag in n.normalized_tags()], self.book.query_tags(tag))
+        self.assertEqual(titles, [note.title for note in self.book.iter_search(sort=NOTES_BOOK_FIELDS.EMPTY)])
+
+    def test_list_methods(self):
+        titles = [note.title for note in self.book]
+        self.book.append(Note("appended", "body"))
+        self.book.extend([Note("extended", "body")])
+        self.book += [Note("added", "body")]
+        titles += ["appended", "extended", "added"]
+        self.assert_consistent(titles)
+
+        self.book.remove(self.book.get_note_by_title(titles[0]))
+        self.assertEqual(titles[-1], self.book.pop().title)
+        del self.book[0]
+        del self.book[:2]
+        self.assert_consistent(titles[4:-1])
+
+        self.book.clear()
+        self.assert_consistent([])
+
+    def test_reordering_refused(self):
+        titles = [note.title for note in self.book]
+        for change in (lambda: self.book.insert(0, Note("inserted", "body")), self.book.sort, self.book.reverse,
+                       lambda: self.book.__setitem__(0, Note("set", "body"))):
+            with self.assertRaises(TypeError):
+                change()
+        self.assert_consistent(titles)
+
+    def test_lists_leave_notes_in_book(self):
+        titles = [note.title for note in self.book]
+        lists = [self.book[:1], self.book.copy(), self.book + [], [] + self.book, self.book * 1]
+        for notes in lists:
+            self.assertIs(list, type(notes))
+        note = self.book[0]
+
+        note.title = "changed"
+        titles[0] = "changed"
+
+        self.assertIs(note, self.book.get_note_by_title("changed"))
+        self.assertIsNone(self.book.get_note_by_title("zork"))
+        self.assert_consistent(titles)
+
+    def test_taken_title_refused(self):
+        titles = [note.title for note in self.book]
+        with self.assertRaises(ValueError):
+            self.book[2].title = titles[0]
+        self.book[2].title = titles[2]
+
+        self.assert_consistent(titles)
+        self.book.remove_note(titles[0])
+        self.assert_consistent(titles[1:])
+
+    def test_changed_notes_found(self):
+        titles = [note.title for note in self.book]
+        note = self.book[3]
+        note.title = "changed"
+        note.body = "changed body"
+        note.tags = ["Changed "]
+        titles[3] = "changed"
+
+        self.assertEqual([note], self.book.query_tags(normalize_tag("Changed ")))
+        self.assert_consistent(titles)
+
+
+if __name__ == "__main__":
+    unittest.main()
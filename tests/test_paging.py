@@ -0,0 +1,146 @@
+"""
+Checks that the pages of the searches of every storage add up to the results of iter_search.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import address_book
+import columnar_storage
+import commands
+import notes_book
+import sqlite_storage
+from address_book import AddressBook
+from benchmarks.data import make_notes, make_records
+from columnar_storage import ColumnarAddressBook
+from note import NOTES_BOOK_FIELDS
+from notes_book import Notebook
+from paging import page_offset, paginate
+from record import ADDRESS_BOOK_FIELDS
+from sqlite_storage import SqliteAddressBook, SqliteNotebook
+
+COUNT = 100
+LIMIT = 7
+CONTACT_QUERIES = [
+    ("", ADDRESS_BOOK_FIELDS.ALL, ADDRESS_BOOK_FIELDS.EMPTY, "asc"),
+    ("", ADDRESS_BOOK_FIELDS.ALL, ADDRESS_BOOK_FIELDS.NAME, "desc"),
+    ("ko", ADDRESS_BOOK_FIELDS.ALL, ADDRESS_BOOK_FIELDS.EMPTY, "asc"),
+    ("ko", ADDRESS_BOOK_FIELDS.NAME, ADDRESS_BOOK_FIELDS.BIRTHDAY, "desc"),
+    ("zzz", ADDRESS_BOOK_FIELDS.ALL, ADDRESS_BOOK_FIELDS.EMPTY, "asc"),
+]
+NOTE_QUERIES = [
+    ("", NOTES_BOOK_FIELDS.ALL, NOTES_BOOK_FIELDS.EMPTY, "asc"),
+    ("plan", NOTES_BOOK_FIELDS.ALL, NOTES_BOOK_FIELDS.TITLE, "desc"),
+    ("tags:urgent", NOTES_BOOK_FIELDS.ALL, NOTES_BOOK_FIELDS.EMPTY, "asc"),
+    ("zzz", NOTES_BOOK_FIELDS.ALL, NOTES_BOOK_FIELDS.EMPTY, "asc"),
+]
+
+
+class PaginateTest(unittest.TestCase):
+    def test_list(self):
+        page = paginate(list(range(10)), offset=4, limit=4)
+        self.assertEqual(([4, 5, 6, 7], 10, True), (page.items, page.total, page.more))
+        self.assertEqual(3, page.next_page())
+
+    def test_last_page_of_generator_counts_all(self):
+        page = paginate(iter(range(10)), offset=8, limit=4)
+        self.assertEqual(([8, 9], 10, False), (page.items, page.total, page.more))
+
+    def test_generator_not_counted_before_last_page(self):
+        page = paginate(iter(range(10)), offset=0, limit=4)
+        self.assertEqual(([0, 1, 2, 3], None, True), (page.items, page.total, page.more))
+
+    def test_skipped(self):
+        page = paginate(iter(range(4, 10)), offset=4, limit=4, skipped=True)
+        self.assertEqual(([4, 5, 6, 7], True), (page.items, page.more))
+
+    def test_past_the_end(self):
+        page = paginate(iter(range(10)), offset=20, limit=4)
+        self.assertEqual(([], None, False), (page.items, page.total, page.more))
+
+    def test_no_limit(self):
+        page = paginate(iter(range(10)))
+        self.assertEqual((list(range(10)), 10, False), (page.items, page.total, page.more))
+
+    def test_page_offset(self):
+        self.assertEqual([0, 7, 14], [page_offset(page, LIMIT) for page in (1, 2, 3)])
+
+
+class PagingParamsTest(unittest.TestCase):
+    def test_numbers(self):
+        self.assertEqual({"limit": 5, "page": 2}, commands.parse_command("all-contacts limit:5 page:2")["arguments"])
+        self.assertEqual({"offset": 0}, commands.parse_command("all-contacts offset:0")["arguments"])
+
+    def test_invalid_numbers_reported(self):
+        # the characters str.isdigit accepts but int doesn't, like "²", are reported too
+        for arg in ("limit:0", "limit:x", "page:-1", "limit:²", "offset:1.5"):
+            with self.subTest(arg=arg), mock.patch.object(commands, "report_error") as report_error:
+                self.assertIsNone(commands.parse_command(f"all-contacts {arg}"))
+                report_error.assert_called_once()
+
+
+class SearchPagesTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.contact_books = {
+            "objects": AddressBook(),
+            "columnar": ColumnarAddressBook(),
+            "sqlite": SqliteAddressBook(os.path.join(folder.name, "contacts.db")),
+        }
+        self.note_books = {"objects": Notebook(), "sqlite": SqliteNotebook(os.path.join(folder.name, "notes.db"))}
+        for book in self.contact_books.values():
+            book.add_records(make_records(COUNT))
+        for book in self.note_books.values():
+            book.add_notes(make_notes(COUNT))
+        self.addCleanup(self.contact_books["sqlite"].close)
+        self.addCleanup(self.note_books["sqlite"].close)
+
+        # the pages the searches show are taken from their views
+        self.views = []
+        for module, view in ((address_book, "AddressBookView"), (columnar_storage, "AddressBookView"),
+                             (sqlite_storage, "AddressBookView"), (notes_book, "NotesBookView"), (sqlite_storage, "NotesBookView")):
+            patcher = mock.patch.object(module, view, side_effect=self.view)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def view(self, _items):
+        view = mock.Mock()
+        self.views.append(view)
+        return view
+
+    def pages(self, book, keyword, field, sort, direction) -> list:
+        pages = []
+        offset = 0
+        while True:
+            book.search(keyword, field, sort, direction, limit=LIMIT, offset=offset)
+            page = self.views[-1].page
+            pages.append(page)
+            if not page.more:
+                return pages
+            offset += LIMIT
+
+    def assert_pages(self, books, queries, key):
+        for storage, book in books.items():
+            for keyword, field, sort, direction in queries:
+                with self.subTest(storage=storage, keyword=keyword, sort=sort, direction=direction):
+                    expected = [key(item) for item in book.iter_search(keyword, field, sort, direction)]
+                    pages = self.pages(book, keyword, field, sort, direction)
+                    self.assertEqual(expected, [key(item) for page in pages for item in page.items])
+                    self.assertTrue(all(len(page.items) == LIMIT for page in pages[:-1]))
+                    self.assertEqual(len(expected), pages[-1].total)
+                    self.assertTrue(all(page.total in (None, len(expected)) for page in pages))
+
+    def test_contacts(self):
+        self.assert_pages(self.contact_books, CONTACT_QUERIES, lambda record: record.name.value)
+
+    def test_notes(self):
+        self.assert_pages(self.note_books, NOTE_QUERIES, lambda note: note.title)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Checks that the cached search results of the books are dropped by every change of the books,
+of their records and of their notes, so the same search finds the changed ones.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import unittest
+from unittest import mock
+
+import address_book
+import notes_book
+from address_book import AddressBook
+from benchmarks.data import make_notes, make_records
+from note import NOTES_BOOK_FIELDS, Note
+from notes_book import Notebook
+from record import ADDRESS_BOOK_FIELDS, Record
+
+COUNT = 20
+NEW_PHONE = "0991112233"
+
+
+class SearchCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        # the found items are taken from the views of the searches
+        self.views = []
+        for module, view in ((address_book, "AddressBookView"), (notes_book, "NotesBookView")):
+            patcher = mock.patch.object(module, view, side_effect=self.view)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def view(self, _items):
+        view = mock.Mock()
+        self.views.append(view)
+        return view
+
+    def assert_fresh(self, book, search, change, before: list, after: list):
+        """
+        Checks that the search finds the items before the change, the second time from the cache,
+        and the items after the change once it's made.
+        """
+        self.assertEqual(before, search())
+        hits = book.cache_stats().hits
+        self.assertEqual(before, search())
+        self.assertEqual(hits + 1, book.cache_stats().hits)
+
+        change()
+
+        self.assertEqual(after, search())
+
+
+class ContactsCacheTest(SearchCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = AddressBook()
+        self.book.add_records(make_records(COUNT))
+        self.name = list(self.book)[5]
+
+    def search(self, keyword: str, field: ADDRESS_BOOK_FIELDS = ADDRESS_BOOK_FIELDS.ALL):
+        def found() -> list:
+            self.book.search(keyword, field)
+            return [record.name.value for record in self.views[-1].page.items]
+        return found
+
+    def test_add_record(self):
+        self.assert_fresh(self.book, self.search("zork"), lambda: self.book.add_record(Record("Zork Zorkin")),
+                          [], ["Zork Zorkin"])
+
+    def test_delete(self):
+        self.assert_fresh(self.book, self.search(self.name, ADDRESS_BOOK_FIELDS.NAME),
+                          lambda: self.book.delete(self.name), [self.name], [])
+
+    def test_add_phone(self):
+        self.assert_fresh(self.book, self.search(NEW_PHONE, ADDRESS_BOOK_FIELDS.PHONE),
+                          lambda: self.book.find(self.name).add_phone(NEW_PHONE), [], [self.name])
+
+    def test_edit_phone(self):
+        record = self.book.find(self.name)
+        old_phone = record.phones[0].value
+        self.assert_fresh(self.book, self.search(old_phone, ADDRESS_BOOK_FIELDS.PHONE),
+                          lambda: record.edit_phone(old_phone, NEW_PHONE), [self.name], [])
+        self.assertEqual([self.name], self.search(NEW_PHONE, ADDRESS_BOOK_FIELDS.PHONE)())
+
+    def test_edit_name(self):
+        self.assert_fresh(self.book, self.search("zork", ADDRESS_BOOK_FIELDS.NAME),
+                          lambda: self.book.find(self.name).edit_name("Zork Zorkin"), [], ["Zork Zorkin"])
+        self.assertEqual([], self.search(self.name, ADDRESS_BOOK_FIELDS.NAME)())
+
+
+class NotesCacheTest(SearchCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = Notebook()
+        self.book.add_notes(make_notes(COUNT))
+        self.note = self.book[5]
+        self.title = self.note.title
+
+    def search(self, keyword: str, field: NOTES_BOOK_FIELDS = NOTES_BOOK_FIELDS.ALL):
+        def found() -> list:
+            self.book.search(keyword, field)
+            return [note.title for note in self.views[-1].page.items]
+        return found
+
+    def test_add_note(self):
+        self.assert_fresh(self.book, self.search("zork"), lambda: self.book.add_note(Note("zork", "plan")),
+                          [], ["zork"])
+
+    def test_remove_note(self):
+        self.assert_fresh(self.book, self.search(self.title, NOTES_BOOK_FIELDS.TITLE),
+                          lambda: self.book.remove_note(self.title), [self.title], [])
+
+    def test_title(self):
+        def change():
+            self.note.title = "zork"
+        self.assert_fresh(self.book, self.search("zork", NOTES_BOOK_FIELDS.TITLE), change, [], ["zork"])
+        self.assertEqual([], self.search(self.title, NOTES_BOOK_FIELDS.TITLE)())
+
+    def test_body(self):
+        def change():
+            self.note.body = "zork"
+        self.assert_fresh(self.book, self.search("zork", NOTES_BOOK_FIELDS.BODY), change, [], [self.title])
+
+    def test_tags(self):
+        def change():
+            self.note.tags = ["zork"]
+        self.assert_fresh(self.book, self.search("tags:zork"), change, [], [self.title])
+
+    def test_tags_changed_only_by_setter(self):
+        self.note.tags = ["zork"]
+        with self.assertRaises(AttributeError):
+            self.note.tags.append("gork")
+        self.assertEqual([self.title], [note.title for note in self.book.query_tags("zork")])
+        self.assertEqual([], self.book.query_tags("gork"))
+
+    def test_update_note(self):
+        new_note = Note("zork", "zork body")
+        new_note.tags = ["zork"]
+        self.assert_fresh(self.book, self.search("tags:zork"), lambda: self.book.update_note(self.note, new_note),
+                          [], ["zork"])
+        self.assertEqual(["zork"], self.search("zork body", NOTES_BOOK_FIELDS.BODY)())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+"""
+Checks that the SQLite and columnar storages find the same contacts and notes, in the same order,
+as the in-memory AddressBook and Notebook, while the books are changed.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import copy
+import os
+import random
+import tempfile
+import unittest
+
+from address_book import AddressBook
+from columnar_storage import ColumnarAddressBook
+from note import NOTES_BOOK_FIELDS, Note
+from notes_book import Notebook
+from record import ADDRESS_BOOK_FIELDS, Record
+from sqlite_storage import SqliteAddressBook, SqliteNotebook
+
+# most of the names and addresses are Cyrillic, which SQLite doesn't lowercase
+WORDS = ["ann", "bob", "kyiv", "ol", "київ", "олена", "Ірина"]
+EMAIL_WORDS = ["ann", "bob", "kyiv", "lviv", "ol"]
+CONTACT_KEYWORDS = ["", "a", "kyiv", "05", "1", "ol", "київ", "ОЛЕНА", "ір"]
+CONTACT_FIELDS = [ADDRESS_BOOK_FIELDS.ALL, ADDRESS_BOOK_FIELDS.NAME, ADDRESS_BOOK_FIELDS.EMAIL,
+                  ADDRESS_BOOK_FIELDS.ADDRESS, ADDRESS_BOOK_FIELDS.PHONE]
+CONTACT_SORTS = [ADDRESS_BOOK_FIELDS.EMPTY, ADDRESS_BOOK_FIELDS.NAME, ADDRESS_BOOK_FIELDS.EMAIL,
+                 ADDRESS_BOOK_FIELDS.ADDRESS, ADDRESS_BOOK_FIELDS.PHONE, ADDRESS_BOOK_FIELDS.BIRTHDAY]
+NOTE_KEYWORDS = ["", "a", "Kyiv", "ol", "КИЇВ", "ірина", "tags:bob", "tags:ann or kyiv", "tags:київ", "tags:ОЛЕНА|bob -ірина"]
+NOTE_FIELDS = [NOTES_BOOK_FIELDS.ALL, NOTES_BOOK_FIELDS.TITLE, NOTES_BOOK_FIELDS.BODY, NOTES_BOOK_FIELDS.TAGS]
+NOTE_SORTS = [NOTES_BOOK_FIELDS.EMPTY, NOTES_BOOK_FIELDS.TITLE, NOTES_BOOK_FIELDS.BODY, NOTES_BOOK_FIELDS.TAGS]
+DIRECTIONS = ["asc", "desc"]
+STEPS = 300
+# the searches are compared every this many changes
+CHECK_EVERY = 25
+
+
+class StoragesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.rng = random.Random(0)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def db_path(self, name: str) -> str:
+        return os.path.join(self.folder.name, name)
+
+    def word(self) -> str:
+        return self.rng.choice(WORDS)
+
+
+class ContactStoragesTest(StoragesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.books = {
+            "columnar": ColumnarAddressBook(),
+            "sqlite": SqliteAddressBook(self.db_path("contacts.db")),
+        }
+        self.expected = AddressBook()
+
+    def tearDown(self):
+        self.books["sqlite"].close()
+        super().tearDown()
+
+    def make_record(self, name: str) -> Record:
+        record = Record(name)
+        if self.rng.random() < 0.6:
+            record.add_phone("05" + "".join(self.rng.choice("0123") for _ in range(8)))
+        if self.rng.random() < 0.5:
+            record.add_email(f"{self.rng.choice(EMAIL_WORDS)}@{self.rng.choice(['a', 'b'])}.com")
+        if self.rng.random() < 0.5:
+            record.add_address(f"{self.word()} st")
+        if self.rng.random() < 0.4:
+            record.add_birthday(f"{self.rng.randint(1, 28):02d}.0{self.rng.randint(1, 9)}.19{self.rng.randint(50, 99)}")
+        return record
+
+    def change(self, names: set):
+        """
+        Makes a random change to all the books: adds, deletes, renames or edits a contact.
+        """
+        operation = self.rng.random()
+        name = f"{self.word().title()} {self.rng.randint(0, 60)}"
+        if operation < 0.5 or not names:
+            if name not in names:
+                names.add(name)
+                record = self.make_record(name)
+                for book in [self.expected, *self.books.values()]:
+                    book.add_record(copy.deepcopy(record))
+        elif operation < 0.65:
+            old_name = self.rng.choice(sorted(names))
+            names.discard(old_name)
+            for book in [self.expected, *self.books.values()]:
+                book.delete(old_name)
+        elif operation < 0.8:
+            old_name = self.rng.choice(sorted(names))
+            if name not in names:
+                names.discard(old_name)
+                names.add(name)
+                for book in [self.expected, *self.books.values()]:
+                    book.find(old_name).edit_name(name)
+        else:
+            old_name = self.rng.choice(sorted(names))
+            phone = "05" + "".join(self.rng.choice("0123") for _ in range(8))
+            email = f"{self.rng.choice(EMAIL_WORDS)}@c.com"
+            for book in [self.expected, *self.books.values()]:
+                record = book.find(old_name)
+                record.add_email(email)
+                record.add_phone(phone)
+
+    def assert_same_searches(self):
+        for keyword in CONTACT_KEYWORDS:
+            for field in CONTACT_FIELDS:
+                for sort in CONTACT_SORTS:
+                    for direction in DIRECTIONS:
+                        expected = [record.name.value for record in self.expected.iter_search(keyword, field, sort, direction)]
+                        for storage, book in self.books.items():
+                            with self.subTest(storage=storage, keyword=keyword, field=field, sort=sort, direction=direction):
+                                self.assertEqual(expected, [record.name.value for record in book.iter_search(keyword, field, sort, direction)])
+
+    def test_same_search_results(self):
+        names = set()
+        for step in range(STEPS):
+            self.change(names)
+            if step % CHECK_EVERY == 0:
+                self.assert_same_searches()
+        self.assert_same_searches()
+
+    def test_same_records(self):
+        names = set()
+        for _ in range(STEPS):
+            self.change(names)
+        expected = {record.name.value: str(record) for record in self.expected.iter_filter()}
+        for storage, book in self.books.items():
+            with self.subTest(storage=storage):
+                self.assertEqual(expected, {record.name.value: str(record) for record in book.iter_filter()})
+                for name in expected:
+                    self.assertEqual(expected[name], str(book.find(name)))
+
+    def test_same_phone_lookups(self):
+        names = set()
+        for _ in range(STEPS):
+            self.change(names)
+        for phone in ["05", "050", "0512", "0500000000"]:
+            expected = sorted(record.name.value for record in self.expected.find_by_phone(phone))
+            for storage, book in self.books.items():
+                with self.subTest(storage=storage, phone=phone):
+                    self.assertEqual(expected, sorted(record.name.value for record in book.find_by_phone(phone)))
+
+
+class NoteStoragesTest(StoragesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = SqliteNotebook(self.db_path("notes.db"))
+        self.expected = Notebook()
+
+    def tearDown(self):
+        self.book.close()
+        super().tearDown()
+
+    def make_note(self, title: str) -> Note:
+        note = Note(title, " ".join(self.word() for _ in range(self.rng.randint(0, 5))).capitalize())
+        # the tags are normalized by stripping any whitespace around them
+        note.tags = [self.word().title() + self.rng.choice(["", " ", "\t"]) for _ in range(self.rng.randint(0, 3))]
+        return note
+
+    def change(self, titles: set):
+        """
+        Makes a random change to both books: adds, removes, retitles or edits a note.
+        """
+        operation = self.rng.random()
+        title = f"{self.word()} {self.rng.randint(0, 60)}"
+        if operation < 0.5 or not titles:
+            if title not in titles:
+                titles.add(title)
+                note = self.make_note(title)
+                self.book.add_note(copy.deepcopy(note))
+                self.expected.add_note(note)
+        elif operation < 0.65:
+            old_title = self.rng.choice(sorted(titles))
+            titles.discard(old_title)
+            self.expected.remove_note(old_title)
+            self.book.remove_note(old_title)
+        elif operation < 0.8:
+            old_title = self.rng.choice(sorted(titles))
+            if title not in titles:
+                titles.discard(old_title)
+                titles.add(title)
+                for book in (self.expected, self.book):
+                    book.get_note_by_title(old_title).title = title
+        else:
+            old_title = self.rng.choice(sorted(titles))
+            body, tags = f"{self.word()} {self.word()}", [self.word()]
+            for book in (self.expected, self.book):
+                note = book.get_note_by_title(old_title)
+                note.body = body
+                note.tags = tags
+
+    def assert_same_searches(self):
+        for keyword in NOTE_KEYWORDS:
+            for field in NOTE_FIELDS:
+                for sort in NOTE_SORTS:
+                    for direction in DIRECTIONS:
+                        with self.subTest(keyword=keyword, field=field, sort=sort, direction=direction):
+                            self.assertEqual([note.title for note in self.expected.iter_search(keyword, field, sort, direction)],
+                                             [note.title for note in self.book.iter_search(keyword, field, sort, direction)])
+
+    def test_same_search_results(self):
+        titles = set()
+        for step in range(STEPS):
+            self.change(titles)
+            if step % CHECK_EVERY == 0:
+                self.assert_same_searches()
+        self.assert_same_searches()
+
+    def test_same_tag_counts(self):
+        titles = set()
+        for _ in range(STEPS):
+            self.change(titles)
+        self.assertEqual(sorted(self.expected.get_tag_counts()), sorted(self.book.get_tag_counts()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Checks that the search of AddressBook narrowed by the trigram indexes finds the same contacts
+as the full scan of the contacts, in the same order, before and after the contacts change.
+
+Run from the project folder:
+    python -m unittest discover -s tests
+"""
+import unittest
+
+from address_book import AddressBook
+from benchmarks.data import make_records
+from record import ADDRESS_BOOK_FIELDS, Record
+
+# shorter than a trigram, with spaces, in other cases and scripts, and lowercased to more characters
+KEYWORDS = ["", "a", "ko", "shevchenko 12", "Khreshchatyk", "gmail", "ukr.net", "067", "0671", "Olena Melnyk",
+            "ОЛЕНА", "ірина", "zzz", "İst", "i̇st", "office"]
+FIELDS = [ADDRESS_BOOK_FIELDS.ALL, ADDRESS_BOOK_FIELDS.NAME, ADDRESS_BOOK_FIELDS.EMAIL, ADDRESS_BOOK_FIELDS.PHONE,
+          ADDRESS_BOOK_FIELDS.ADDRESS]
+
+
+def scan(book: AddressBook, keyword: str, field: ADDRESS_BOOK_FIELDS) -> list:
+    def matches(record: Record) -> bool:
+        match field:
+            case ADDRESS_BOOK_FIELDS.NAME:
+                return record.name.match(keyword)
+            case ADDRESS_BOOK_FIELDS.EMAIL:
+                return record.email is not None and record.email.match(keyword)
+            case ADDRESS_BOOK_FIELDS.PHONE:
+                return record.match_phone(keyword)
+            case ADDRESS_BOOK_FIELDS.ADDRESS:
+                return record.address is not None and record.address.match(keyword)
+        return record.match(keyword)
+    return [record.name.value for record in book.values() if matches(record)]
+
+
+class TrigramSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        self.book.add_records(make_records(300))
+        office = Record("İstanbul Office")
+        office.add_address("Office 1, İstiklal")
+        self.book.add_record(office)
+
+    def assert_scanned(self):
+        for keyword in KEYWORDS:
+            for field in FIELDS:
+                with self.subTest(keyword=keyword, field=field):
+                    self.assertEqual(scan(self.book, keyword, field),
+                                     [record.name.value for record in self.book.iter_filter(keyword, field)])
+
+    def test_found_as_scanned(self):
+        self.assert_scanned()
+
+    def test_changed_contacts_found_as_scanned(self):
+        names = list(self.book)
+        self.book.find(names[0]).edit_name("Olena Melnyk-Office")
+        self.book.find(names[1]).add_email("olena@gmail.com")
+        record = self.book.find(names[2])
+        record.edit_phone(record.phones[0].value, "0671234567")
+        self.book.find(names[3]).add_address("Khreshchatyk 1")
+        self.book.delete(names[4])
+        self.assert_scanned()
+
+
+if __name__ == "__main__":
+    unittest.main()
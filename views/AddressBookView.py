@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterable
 
 from field import Field
 from record import Record, ADDRESS_BOOK_FIELDS
@@ -8,9 +8,9 @@ from datetime import datetime
 
 
 class AddressBookView(TableView):
-    data: List[Record]
+    data: Iterable[Record]
 
-    def __init__(self, contact_list: List[Record]):
+    def __init__(self, contact_list: Iterable[Record]):
         # possible validation of type
         super().__init__(contact_list)
         self.output_data = OutputData()
@@ -22,11 +22,11 @@ class AddressBookView(TableView):
             ADDRESS_BOOK_FIELDS.EMAIL.value]
         self.title = "Addressbook view"
 
-    def get_row(self, record: Record):
+    def get_values(self, record: Record):
         return [
-            self.escape(record.name.value if isinstance(record.name, Field) else ''),
-            self.escape(", ".join(phone.value if isinstance(phone, Field) else '' for phone in record.phones)),
-            self.escape(record.address.value if isinstance(record.address, Field) else ''),
-            self.escape(str(record.birthday.value.strftime("%d.%m.%Y") if isinstance(record.birthday, Field) else '')),
-            self.escape(record.email.value if isinstance(record.email, Field) else ''),
+            record.name.value if isinstance(record.name, Field) else '',
+            ", ".join(phone.value if isinstance(phone, Field) else '' for phone in record.phones),
+            record.address.value if isinstance(record.address, Field) else '',
+            str(record.birthday.value.strftime("%d.%m.%Y") if isinstance(record.birthday, Field) else ''),
+            record.email.value if isinstance(record.email, Field) else '',
         ]
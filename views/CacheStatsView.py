@@ -0,0 +1,27 @@
+from typing import List, Tuple
+
+from search_cache import SearchCacheStats
+from views.TableView import TableView
+from views.View import OutputData
+
+
+class CacheStatsView(TableView):
+    data: List[Tuple[str, SearchCacheStats]]
+
+    def __init__(self, book_stats: List[Tuple[str, SearchCacheStats]]):
+        super().__init__(book_stats)
+        self.output_data = OutputData()
+        self.header = ["book", "cached", "hits", "misses", "hit rate", "evicted", "invalidated"]
+        self.title = "Search cache view"
+
+    def get_values(self, record: Tuple[str, SearchCacheStats]):
+        book, stats = record
+        return [
+            book,
+            str(stats.entries),
+            str(stats.hits),
+            str(stats.misses),
+            f"{stats.hit_rate:.0%}",
+            str(stats.evictions),
+            str(stats.invalidations),
+        ]
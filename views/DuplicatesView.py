@@ -0,0 +1,30 @@
+from typing import List, Tuple
+
+from duplicates import DuplicateGroup
+from field import Field
+from record import Record
+from views.TableView import TableView
+from views.View import OutputData
+
+
+class DuplicatesView(TableView):
+    # (group number, group, contact), the group columns are filled on the first contact of the group only
+    data: List[Tuple[int, DuplicateGroup, Record]]
+
+    def __init__(self, groups: List[Tuple[DuplicateGroup, List[Record]]]):
+        super().__init__([(number, group, record) for number, (group, records) in enumerate(groups, 1) for record in records])
+        self.output_data = OutputData()
+        self.header = ["group", "score", "reasons", "name", "phone", "email"]
+        self.title = "Duplicates view"
+
+    def get_values(self, row: Tuple[int, DuplicateGroup, Record]):
+        number, group, record = row
+        first = record.name.value == group.names[0]
+        return [
+            str(number) if first else "",
+            f"{group.score:.2f}" if first else "",
+            ", ".join(group.reasons) if first else "",
+            record.name.value,
+            ", ".join(phone.value for phone in record.phones),
+            record.email.value if isinstance(record.email, Field) else '',
+        ]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterable
 
 from note import Note, NOTES_BOOK_FIELDS
 from views.TableView import TableView
@@ -6,18 +6,18 @@ from views.View import OutputData
 
 
 class NotesBookView(TableView):
-    data: List[Note]
+    data: Iterable[Note]
 
-    def __init__(self, contact_list: List[Note]):
+    def __init__(self, contact_list: Iterable[Note]):
         # possible validation of type
         super().__init__(contact_list)
         self.output_data = OutputData()
         self.header = [NOTES_BOOK_FIELDS.TITLE.value, NOTES_BOOK_FIELDS.BODY.value, NOTES_BOOK_FIELDS.TAGS.value]
         self.title = "Notes book view"
 
-    def get_row(self, record: Note):
+    def get_values(self, record: Note):
         return [
-            self.escape(record.title),
-            self.escape(record.body),
-            self.escape(", ".join(tag for tag in record.tags)),
+            record.title,
+            record.body,
+            ", ".join(tag for tag in record.tags),
         ]
@@ -1,11 +1,29 @@
-from typing import List, NamedTuple
+from functools import partial
+from itertools import batched, islice
+from typing import Callable, Iterable, List, NamedTuple
 from rich import box
+from rich.padding import Padding
 from rich.table import Table
 from rich.markup import escape
+from rich.text import Text
 
+import json
 import re
+import sys
 
-from views.View import View, OutputData
+from paging import Page
+from views.View import View, OutputData, get_console, get_output_format, TABLE_FORMAT, TSV_FORMAT
+
+# the number of the rows rendered as one table, more rows are rendered a chunk at a time as they are read,
+# instead of measuring and laying out all of them at once
+CHUNK_ROWS = 200
+
+
+def tsv_value(value: str) -> str:
+    """
+    Escapes the characters a TSV value can't hold, the way e.g. PostgreSQL COPY does.
+    """
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
 
 
 class Sort(NamedTuple):
@@ -17,38 +35,159 @@ class TableView(View):
     title: str = ""
     sort_column: Sort | None = None
     keyword: str = ""
+    # the page of the results the data is, if they are shown a page at a time
+    page: Page | None = None
+    # the keyword the highlighter was compiled for, and the highlighter, None for no keyword
+    __highlighted: str | None = None
+    __highlighter: Callable[[str], str] | None = None
 
-    def __init__(self, data: List):
+    def __init__(self, data: Iterable):
+        # any iterable, e.g. a generator of the search results, which is read once as the rows are added
         self.data = data
 
-    def prepare_output_data(self):
-        if len(self.data) == 0:
+    def prepare_output_data(self, rows: Iterable[List[str]] | None = None):
+        if rows is None:
+            rows = map(self.get_row, self.data)
+        table = self.__table()
+        for row in rows:
+            table.add_row(*row)
+        if table.row_count == 0:
             self.output_data.data = f"{self.title}. Records not found!"
             self.output_data.style = "bold red"
             self.output_data.justify = "center"
             return
 
-        table = Table(title=self.title)
+        table.caption = self.get_caption()
+        self.output_data.data = table
+        self.output_data.justify = "center"
 
-        for column in self.header:
+    def output(self, clear = False):
+        output_format = get_output_format()
+        if output_format != TABLE_FORMAT:
+            self.write_values(output_format)
+            return
+        rows = map(self.get_row, self.data)
+        chunk = list(islice(rows, CHUNK_ROWS + 1))
+        if len(chunk) <= CHUNK_ROWS:
+            self.prepare_output_data(chunk)
+            super().output(clear = clear)
+            return
+        self.__output_chunks(chunk, rows, clear)
+
+    def __output_chunks(self, chunk: List[List[str]], rows: Iterable[List[str]], clear: bool):
+        """
+        Prints the rows a table of CHUNK_ROWS rows at a time, as the rows are read.
+        All the tables get the widths of the columns of the first one, so they line up as a single table.
+        Parameters:
+            chunk (List[List[str]]): The first rows read.
+            rows (Iterable[List[str]]): The rest of the rows.
+        """
+        console = get_console()
+        if clear:
+            console.clear()
+        widths = self.__column_widths(chunk, console.width)
+        # the tables are printed without the blank edges of box.SIMPLE, the padding keeps their place,
+        # so the title and the caption are printed apart, the way the table prints them
+        table = self.__table(widths)
+        # the title is printed with the first rows, for them to show up at once
+        renderables = [Text(self.title, style="table.title")] if self.title else []
+        padding = (1, 1, 0, 1)
+        while chunk:
+            for row in chunk:
+                table.add_row(*row)
+            console.print(*renderables, Padding(table, padding), justify="center")
+            chunk = list(islice(rows, CHUNK_ROWS))
+            table = self.__table(widths, show_header=False)
+            renderables = []
+            padding = (0, 1)
+        console.print()
+        caption = self.get_caption()
+        if caption is not None:
+            console.print(Text(caption, style="table.caption"), justify="center")
+
+    def __table(self, widths: List[int] | None = None, show_header: bool = True) -> Table:
+        """
+        Creates an empty table of the columns of the view.
+        Parameters:
+            widths (List[int] | None, optional): The fixed widths of the columns, for a chunk of the rows without
+                the title and the edges, or None for the whole table, fitting the columns to the rows.
+            show_header (bool, optional): Whether to show the header of the columns.
+        """
+        if widths is None:
+            table = Table(title=self.title, box=box.SIMPLE)
+        else:
+            table = Table(show_header=show_header, box=box.SIMPLE, show_edge=False)
+        for i, column in enumerate(self.header):
+            width = widths[i] if widths is not None else None
             if self.sort_column is not None and self.sort_column.column == column.lower():
-                table.add_column(f"{column} {'▲' if self.sort_column.order == 'asc' else '▼'}", style="cyan", header_style="bold cyan")
+                table.add_column(self.__sort_header(column), style="cyan", header_style="bold cyan", width=width)
             else:
-                table.add_column(column)
+                table.add_column(column, width=width)
+        return table
 
-        for record in self.data:
-            table.add_row(*self.get_row(record))
+    def __sort_header(self, column: str) -> str:
+        return f"{column} {'▲' if self.sort_column.order == 'asc' else '▼'}"
 
-        table.box = box.SIMPLE
-        self.output_data.data = table
-        self.output_data.justify = "center"
+    def __column_widths(self, rows: List[List[str]], max_width: int) -> List[int]:
+        """
+        Returns the widths of the columns fitting the rows and the header, the longest line of a cell,
+        narrowing the widest columns, if they don't fit the console, the rest of the cells are wrapped.
+        """
+        widths = [Text(self.__sort_header(column) if self.sort_column is not None
+                       and self.sort_column.column == column.lower() else column).cell_len for column in self.header]
+        for row in rows:
+            for i, cell in enumerate(row):
+                width = max(Text.from_markup(line).cell_len for line in cell.split("\n"))
+                if width > widths[i]:
+                    widths[i] = width
+        # the padding of every column, the space between the columns, and the padding of the table
+        available = max_width - 3 * len(widths) + 1 - 2
+        while sum(widths) > available and max(widths) > 1:
+            widths[widths.index(max(widths))] -= 1
+        return widths
 
-    def output(self, clear = False):
-        self.prepare_output_data()
-        super().output(clear = clear)
+    def write_values(self, output_format: str):
+        """
+        Writes the plain values of the rows to stdout, with no markup, highlighting or layout, for other programs:
+        a TSV line of the header and a line of every row, or a JSON object line of every row.
+        The lines are written a chunk at a time as the rows are read.
+        """
+        write = sys.stdout.write
+        rows = map(self.get_values, self.data)
+        if output_format == TSV_FORMAT:
+            write("\t".join(self.header) + "\n")
+            lines = ("\t".join([tsv_value(value) for value in values]) for values in rows)
+        else:
+            header = self.header
+            lines = (json.dumps(dict(zip(header, values)), ensure_ascii=False) for values in rows)
+        for chunk in batched(lines, CHUNK_ROWS):
+            write("\n".join(chunk) + "\n")
+
+    def get_caption(self) -> str | None:
+        page = self.page
+        if page is None or page.limit is None:
+            return None
+        first, last = page.offset + 1, page.offset + len(page.items)
+        total = page.total if page.total is not None else f"more than {last}"
+        caption = f"{first}-{last} of {total}"
+        if page.more:
+            caption += f", next: page:{page.next_page()}" if page.offset % page.limit == 0 else f", next: offset:{last}"
+        return caption
 
     def escape(self, s: str) -> str:
-        return re.sub(rf"({re.escape(self.keyword)})", r"[b magenta not dim]\1[/]", escape(s), flags=re.IGNORECASE)
+        if self.__highlighted != self.keyword:
+            # compiled once for all the cells, the keyword is set after the view is created
+            self.__highlighted = self.keyword
+            self.__highlighter = partial(re.compile(re.escape(self.keyword), flags=re.IGNORECASE).sub,
+                                         r"[b magenta not dim]\g<0>[/]") if self.keyword else None
+        s = escape(s)
+        return s if self.__highlighter is None else self.__highlighter(s)
 
     def get_row(self, record: any) -> List[str]:
-        raise NotImplementedError("get_row is not implemented")
+        return [self.escape(value) for value in self.get_values(record)]
+
+    def get_values(self, record: any) -> List[str]:
+        """
+        Returns the plain text of the cells of the row, get_row escapes and highlights them for the table.
+        """
+        raise NotImplementedError("get_values is not implemented")
@@ -0,0 +1,18 @@
+from typing import List, Tuple
+
+from views.TableView import TableView
+from views.View import OutputData
+
+
+class TagsView(TableView):
+    data: List[Tuple[str, int]]
+
+    def __init__(self, tag_counts: List[Tuple[str, int]]):
+        super().__init__(tag_counts)
+        self.output_data = OutputData()
+        self.header = ["tag", "notes"]
+        self.title = "Tags view"
+
+    def get_values(self, record: Tuple[str, int]):
+        tag, count = record
+        return [tag, str(count)]
@@ -1,5 +1,7 @@
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import List, Literal
+from functools import cache
+from typing import Iterator, List, Literal
 
 from rich.console import Console
 
@@ -10,11 +12,59 @@ class OutputData:
     style: str = ""
     justify: Literal["default", "left", "center", "right", "full"] = "default"
 
+
+# the formats the tables are printed in, the others than TABLE_FORMAT are plain text for other programs
+TABLE_FORMAT = "table"
+TSV_FORMAT = "tsv"
+JSONL_FORMAT = "jsonl"
+OUTPUT_FORMATS = [TABLE_FORMAT, TSV_FORMAT, JSONL_FORMAT]
+
+_output_format = TABLE_FORMAT
+
+
+def get_output_format() -> str:
+    return _output_format
+
+
+def set_output_format(output_format: str):
+    """
+    Sets the format all the tables are printed in, one of OUTPUT_FORMATS.
+    """
+    global _output_format
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"'{output_format}' is not valid output format, use one of: {", ".join(OUTPUT_FORMATS)}")
+    _output_format = output_format
+
+
+@contextmanager
+def output_format(output_format: str | None) -> Iterator[None]:
+    """
+    Prints the tables in the format within the block, e.g. for a single command, None keeps the current one.
+    """
+    previous = get_output_format()
+    if output_format is not None:
+        set_output_format(output_format)
+    try:
+        yield
+    finally:
+        set_output_format(previous)
+
+
+@cache
+def get_console(stderr: bool = False) -> Console:
+    """
+    Returns the console all the views print to, created once, as creating it costs more than printing a message.
+    It writes to the current sys.stdout, or sys.stderr, and follows the terminal size.
+    """
+    return Console(stderr=stderr)
+
+
 class View:
     output_data: OutputData = OutputData()
 
     def output(self, clear = False):
-        console = Console()
+        # the messages don't get mixed with the rows printed for other programs
+        console = get_console(stderr=get_output_format() != TABLE_FORMAT)
 
         if clear:
             console.clear()